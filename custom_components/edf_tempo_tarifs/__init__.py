@@ -6,14 +6,36 @@ import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-
-from .const import CONF_PUISSANCE_SOUSCRITE, DOMAIN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+
+from .backfill import async_get_backfill
+from .client import async_close_session
+from .const import (
+    CONF_BACKGROUND_SETUP,
+    CONF_CSV_HISTORY,
+    CONF_PUISSANCE_SOUSCRITE,
+    CSV_URL,
+    DOMAIN,
+)
 from .coordinator import EDFTempoTarifsCoordinator
+from .exceptions import FETCH_ERRORS
+from .hub import async_get_hub
+from .services import async_setup_services
+from .websocket_api import async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.SENSOR]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001
+    """Set up the EDF Tempo Tarifs services and websocket commands."""
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -25,17 +47,79 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     coordinator = EDFTempoTarifsCoordinator(hass, puissance_souscrite)
 
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
+    # Le hub partagé transmet à ce coordinateur les données récupérées pour les autres entrées
+    entry.async_on_unload(coordinator.hub.async_register(coordinator))
+
+    if await coordinator.async_load_cached_data():
+        # Cache disponible : revalidation en arrière-plan, sans bloquer le démarrage
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_revalidate_{entry.entry_id}"
+        )
+    elif entry.options.get(CONF_BACKGROUND_SETUP):
+        # Sans cache : les entités reprennent leur dernier état, premier appel en arrière-plan
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_first_refresh_{entry.entry_id}"
+        )
+    else:
+        # Fetch initial data
+        await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    _async_update_csv_url(hass)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    async_schedule_backfill(hass, entry, puissance_souscrite)
+
     return True
 
 
+@callback
+def async_schedule_backfill(
+    hass: HomeAssistant, entry: ConfigEntry, puissance_souscrite: int
+) -> None:
+    """Import the past tariffs of a power as long-term statistics, in background."""
+    if "recorder" in hass.config.components:
+        # Tarifs passés importés en statistiques long terme, sans bloquer le démarrage
+        entry.async_create_background_task(
+            hass,
+            _async_backfill_statistics(hass, puissance_souscrite),
+            f"{DOMAIN}_backfill_{entry.entry_id}",
+        )
+
+
+async def _async_backfill_statistics(hass: HomeAssistant, puissance_souscrite: int) -> None:
+    """Import the missing hours of the tariff statistics."""
+    try:
+        await async_get_backfill(hass).async_backfill(puissance_souscrite)
+    except FETCH_ERRORS as err:
+        _LOGGER.warning("Unable to import EDF Tempo Tarifs statistics: %s", err)
+
+
+@callback
+def _loaded_entries(hass: HomeAssistant) -> list[ConfigEntry]:
+    """Return the config entries whose coordinator is set up."""
+    loaded = hass.data.get(DOMAIN, {})
+    return [
+        entry for entry in hass.config_entries.async_entries(DOMAIN) if entry.entry_id in loaded
+    ]
+
+
+@callback
+def _async_update_csv_url(hass: HomeAssistant) -> None:
+    """Point the shared hub at the CSV file while a loaded entry enables it."""
+    # Historique commun à toutes les entrées : l'option d'une seule suffit
+    csv_history = any(entry.options.get(CONF_CSV_HISTORY) for entry in _loaded_entries(hass))
+    async_get_hub(hass).csv_url = CSV_URL if csv_history else None
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:  # noqa: ARG001
+    """Apply the options that do not need a reload."""
+    _async_update_csv_url(hass)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading EDF Tempo Tarifs integration")
@@ -44,6 +128,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     if unload_ok and entry.entry_id in hass.data[DOMAIN]:
         hass.data[DOMAIN].pop(entry.entry_id)
+        _async_update_csv_url(hass)
+
+        if not _loaded_entries(hass):
+            # Dernière entrée déchargée : connexions fermées, session rouverte au besoin
+            await async_close_session(hass)
 
     return unload_ok
 
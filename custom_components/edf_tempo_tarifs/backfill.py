@@ -0,0 +1,145 @@
+"""Import of the tariff history into long-term statistics."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticMeanType
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_BACKFILL, DOMAIN, LOGGER, SENSOR_TYPES, STATISTICS_BATCH_SIZE
+from .hub import EDFTempoTarifsDataHub, async_get_hub
+from .periods import PRICE_KEYS
+
+
+def statistic_id(sensor_key: str, puissance_souscrite: int) -> str:
+    """Return the external statistic id of a price slot for a power."""
+    return f"{DOMAIN}:{sensor_key.lower()}_{puissance_souscrite}kva"
+
+
+def statistic_metadata(sensor_key: str, puissance_souscrite: int) -> dict[str, Any]:
+    """Return the metadata of a price statistic: hourly mean, no sum."""
+    return {
+        "has_sum": False,
+        "mean_type": StatisticMeanType.ARITHMETIC,
+        "name": f"{SENSOR_TYPES[sensor_key]['name']} {puissance_souscrite} kVA",
+        "source": DOMAIN,
+        "statistic_id": statistic_id(sensor_key, puissance_souscrite),
+        # €/kWh n'appartient à aucune classe d'unités convertibles
+        "unit_class": None,
+        "unit_of_measurement": SENSOR_TYPES[sensor_key]["unit"],
+    }
+
+
+def _segments(rows: list[dict[str, Any]], end: datetime) -> list[tuple[int, int, dict[str, Any]]]:
+    """Return (start, end, row) of each tariff row in effect, as POSIX timestamps."""
+    last = int(end.timestamp())
+    starts = [
+        int(dt_util.start_of_local_day(date.fromisoformat(str(row["DATE_DEBUT"])[:10])).timestamp())
+        for row in rows
+    ]
+    stops = [*starts[1:], last]
+    return [
+        (start, min(stop, last), row) for start, stop, row in zip(starts, stops, rows, strict=True)
+    ]
+
+
+class TariffStatisticsBackfill:
+    """Import des tarifs passés en statistiques long terme externes.
+
+    Chaque créneau (période HC/HP et couleur) d'une puissance devient une statistique
+    horaire. Seules les heures postérieures à la dernière statistique importée
+    sont ajoutées, par lots de STATISTICS_BATCH_SIZE heures.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: EDFTempoTarifsDataHub) -> None:
+        """Initialize the backfill."""
+        self.hass = hass
+        self.hub = hub
+        self._lock = asyncio.Lock()
+
+    async def _async_last_hour(self, stat_id: str) -> int | None:
+        """Return the end of the last imported hour of a statistic."""
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, stat_id, False, {"mean"}
+        )
+        if not (rows := last.get(stat_id)):
+            return None
+        return int(rows[0]["end"])
+
+    async def async_backfill(self, puissance_souscrite: int) -> int:
+        """
+        Importe les heures manquantes des statistiques de prix d'une puissance.
+
+        Args:
+            puissance_souscrite: Puissance dont les tarifs sont importés
+
+        Returns:
+            Nombre d'heures importées, tous créneaux confondus
+        """
+        async with self._lock:
+            history = await self.hub.async_get_history(puissance_souscrite)
+            if not (rows := history.rows()):
+                return 0
+
+            # L'heure en cours n'est pas encore terminée
+            end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+            segments = _segments(rows, end)
+            imported = 0
+
+            for sensor_key in PRICE_KEYS:
+                stat_id = statistic_id(sensor_key, puissance_souscrite)
+                api_field = SENSOR_TYPES[sensor_key]["api_field"]
+                resume = await self._async_last_hour(stat_id)
+                statistics = []
+
+                for start, stop, row in segments:
+                    if (value := row.get(api_field)) is None:
+                        continue
+                    price = float(value)
+
+                    for timestamp in range(max(start, resume or start), stop, 3600):
+                        statistics.append(
+                            {
+                                "start": dt_util.utc_from_timestamp(timestamp),
+                                "mean": price,
+                                "min": price,
+                                "max": price,
+                            }
+                        )
+
+                if not statistics:
+                    continue
+
+                metadata = statistic_metadata(sensor_key, puissance_souscrite)
+
+                for index in range(0, len(statistics), STATISTICS_BATCH_SIZE):
+                    async_add_external_statistics(
+                        self.hass, metadata, statistics[index : index + STATISTICS_BATCH_SIZE]
+                    )
+
+                imported += len(statistics)
+
+            LOGGER.debug(
+                "Imported %s hours of tariff statistics for %s kVA", imported, puissance_souscrite
+            )
+            return imported
+
+
+@callback
+def async_get_backfill(hass: HomeAssistant) -> TariffStatisticsBackfill:
+    """Return the domain-wide statistics backfill, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if (backfill := domain_data.get(DATA_BACKFILL)) is None:
+        backfill = domain_data[DATA_BACKFILL] = TariffStatisticsBackfill(hass, async_get_hub(hass))
+
+    return backfill
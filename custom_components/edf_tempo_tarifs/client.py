@@ -0,0 +1,149 @@
+"""Dedicated HTTP client for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from collections.abc import Hashable, Mapping
+from importlib.util import find_spec
+from typing import Any
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from aiohttp.hdrs import (
+    ACCEPT_ENCODING,
+    ETAG,
+    IF_MODIFIED_SINCE,
+    IF_NONE_MATCH,
+    LAST_MODIFIED,
+    USER_AGENT,
+)
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util import ssl as ssl_util
+
+from .const import (
+    API_TIMEOUT,
+    DATA_SESSION,
+    DATA_SESSION_LISTENER,
+    DOMAIN,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_READ_TIMEOUT,
+    HTTP_VALIDATOR_CACHE_SIZE,
+)
+
+# Durée totale bornée pour les réponses JSON ; le fichier CSV, lu en flux, n'est
+# borné que par l'absence de données (voir STREAM_TIMEOUT)
+REQUEST_TIMEOUT = ClientTimeout(
+    total=API_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT
+)
+STREAM_TIMEOUT = ClientTimeout(
+    total=None, connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT
+)
+
+
+def accept_encoding() -> str:
+    """Return the encodings aiohttp can decode here, brotli only if installed."""
+    if find_spec("brotli") or find_spec("brotlicffi"):
+        return "gzip, deflate, br"
+    return "gzip, deflate"
+
+
+@callback
+def async_get_session(hass: HomeAssistant) -> ClientSession:
+    """Return the domain-wide HTTP session, creating it on first use.
+
+    Une seule session (et un seul pool de connexions) sert toutes les requêtes
+    de l'intégration ; elle est fermée à l'arrêt de Home Assistant ou au
+    déchargement de la dernière entrée (voir async_close_session).
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if (session := domain_data.get(DATA_SESSION)) is not None:
+        return session
+
+    connector = TCPConnector(
+        ssl=ssl_util.get_default_context(),
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+    )
+    session = domain_data[DATA_SESSION] = ClientSession(
+        connector=connector,
+        timeout=REQUEST_TIMEOUT,
+        headers={USER_AGENT: SERVER_SOFTWARE, ACCEPT_ENCODING: accept_encoding()},
+    )
+
+    async def _async_close_session(_event: Event) -> None:
+        """Close the session and its connections."""
+        # Écouteur déjà consommé : rien à désinscrire
+        domain_data.pop(DATA_SESSION_LISTENER, None)
+        await async_close_session(hass)
+
+    domain_data[DATA_SESSION_LISTENER] = hass.bus.async_listen_once(
+        EVENT_HOMEASSISTANT_CLOSE, _async_close_session
+    )
+    return session
+
+
+async def async_close_session(hass: HomeAssistant) -> None:
+    """Close the domain-wide HTTP session, if open; the next use opens a new one."""
+    domain_data = hass.data.get(DOMAIN, {})
+
+    if (unsub := domain_data.pop(DATA_SESSION_LISTENER, None)) is not None:
+        unsub()
+
+    if (session := domain_data.pop(DATA_SESSION, None)) is not None:
+        await session.close()
+
+
+class ValidatorCache:
+    """Validateurs HTTP (ETag, Last-Modified) des dernières réponses, avec leur contenu.
+
+    Une requête déjà vue est renvoyée sous condition : une réponse 304 réutilise
+    le contenu gardé, sans transfert ni décodage du corps. Les entrées les moins
+    récemment utilisées sont écartées au-delà de max_entries.
+    """
+
+    __slots__ = ("_entries", "max_entries")
+
+    def __init__(self, max_entries: int = HTTP_VALIDATOR_CACHE_SIZE) -> None:
+        """Initialize the cache."""
+        self._entries: dict[Hashable, tuple[dict[str, str], Any]] = {}
+        self.max_entries = max_entries
+
+    def __len__(self) -> int:
+        """Return the number of cached responses."""
+        return len(self._entries)
+
+    def request_headers(self, key: Hashable) -> dict[str, str]:
+        """Return the conditional headers for a request, if a response is cached."""
+        if (entry := self._entries.get(key)) is None:
+            return {}
+        return entry[0]
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the content of a cached response, marking it recently used."""
+        if (entry := self._entries.pop(key, None)) is None:
+            return None
+        self._entries[key] = entry
+        return entry[1]
+
+    def store(self, key: Hashable, headers: Mapping[str, Any], data: Any) -> None:
+        """Cache a response content if the server sent validators for it."""
+        conditions = {
+            condition: value
+            for header, condition in ((ETAG, IF_NONE_MATCH), (LAST_MODIFIED, IF_MODIFIED_SINCE))
+            if header in headers and isinstance(value := headers[header], str)
+        }
+
+        self._entries.pop(key, None)
+        if not conditions:
+            return
+
+        self._entries[key] = (conditions, data)
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
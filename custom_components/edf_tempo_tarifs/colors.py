@@ -0,0 +1,152 @@
+"""Tempo day colors for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from datetime import date, timedelta
+from typing import Any
+
+from aiohttp import ClientSession
+from homeassistant.core import HomeAssistant
+
+from .client import async_get_session
+from .const import COLOR_API_URL, COLOR_CODES, TEMPO_SEASON_DAYS, TEMPO_SEASON_START
+from .exceptions import EDFTempoTarifsApiError
+
+
+def season_start(day: date) -> date:
+    """Return the first day of the Tempo season a day belongs to."""
+    month, first_day = TEMPO_SEASON_START
+    start = date(day.year, month, first_day)
+    return start if day >= start else date(day.year - 1, month, first_day)
+
+
+def _parse_day(item: Any) -> tuple[date, str] | None:
+    """Parse a day of the color API, ignoring days without a known color."""
+    try:
+        day = date.fromisoformat(str(item["dateJour"])[:10])
+        color = COLOR_CODES.get(int(item["codeJour"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if color is None:
+        return None
+
+    return day, color
+
+
+class TempoColorProvider(ABC):
+    """Source des couleurs Tempo.
+
+    Une autre source (autre API, calendrier local) peut être branchée sur le
+    hub en remplaçant son attribut color_provider.
+    """
+
+    @abstractmethod
+    async def async_get_color(self, day: date) -> str | None:
+        """Return the color of a day, or None if not published yet."""
+
+    @abstractmethod
+    async def async_get_season(self, start: date) -> dict[date, str]:
+        """Return the known colors of the season starting on a given day."""
+
+
+class ApiCouleurTempoProvider(TempoColorProvider):
+    """Colors from api-couleur-tempo.fr."""
+
+    def __init__(self, hass: HomeAssistant, url: str = COLOR_API_URL) -> None:
+        """Initialize the provider."""
+        self.hass = hass
+        self.url = url
+
+    @property
+    def _session(self) -> ClientSession:
+        """Return the domain-wide session, reopened if it was closed."""
+        return async_get_session(self.hass)
+
+    async def _get(self, path: str, params: dict | None = None) -> Any:
+        """Query an endpoint of the color API, within the session timeouts."""
+        async with self._session.get(f"{self.url}/{path}", params=params) as response:
+            if response.status != 200:
+                raise EDFTempoTarifsApiError(response.status)
+
+            return await response.json()
+
+    async def async_get_color(self, day: date) -> str | None:
+        """Return the color of a day, or None if not published yet."""
+        if (parsed := _parse_day(await self._get(f"jourTempo/{day.isoformat()}"))) is None:
+            return None
+        return parsed[1]
+
+    async def async_get_season(self, start: date) -> dict[date, str]:
+        """Return the known colors of the season starting on a given day."""
+        data = await self._get("joursTempo", {"periode": f"{start.year}-{start.year + 1}"})
+
+        if not isinstance(data, list):
+            raise ValueError("Unexpected color API response")
+
+        return dict(parsed for item in data if (parsed := _parse_day(item)) is not None)
+
+
+class TempoCalendar:
+    """Calendrier des couleurs Tempo connues, indexé par jour.
+
+    Seules la saison en cours et la précédente sont conservées, ce qui suffit
+    à calculer localement le nombre de jours Blanc et Rouge restants.
+    """
+
+    __slots__ = ("_colors",)
+
+    def __init__(self, colors: Mapping[date, str] | None = None) -> None:
+        """Initialize the calendar."""
+        self._colors: dict[date, str] = dict(colors or {})
+
+    def __contains__(self, day: object) -> bool:
+        """Return True if the color of a day is known."""
+        return day in self._colors
+
+    def __len__(self) -> int:
+        """Return the number of known days."""
+        return len(self._colors)
+
+    def get(self, day: date) -> str | None:
+        """Return the color of a day, if known."""
+        return self._colors.get(day)
+
+    def update(self, colors: Mapping[date, str]) -> bool:
+        """Merge colors, returning True if anything changed."""
+        changed = False
+
+        for day, color in colors.items():
+            if self._colors.get(day) != color:
+                self._colors[day] = color
+                changed = True
+
+        return changed
+
+    def used_days(self, color: str, today: date) -> int:
+        """Return the number of known days of a color in the current season."""
+        start = season_start(today)
+        end = date(start.year + 1, start.month, start.day)
+        return sum(1 for day, c in self._colors.items() if c == color and start <= day < end)
+
+    def remaining_days(self, color: str, today: date) -> int | None:
+        """Return the days of a color left in the current season."""
+        if (quota := TEMPO_SEASON_DAYS.get(color)) is None:
+            return None
+        return max(quota - self.used_days(color, today), 0)
+
+    def prune(self, today: date) -> None:
+        """Forget the days older than the previous season."""
+        oldest = season_start(season_start(today) - timedelta(days=1))
+        self._colors = {day: c for day, c in self._colors.items() if day >= oldest}
+
+    def as_dict(self) -> dict[str, str]:
+        """Return a JSON serializable representation."""
+        return {day.isoformat(): color for day, color in sorted(self._colors.items())}
+
+    @classmethod
+    def from_dict(cls, stored: Mapping[str, str]) -> TempoCalendar:
+        """Rebuild a calendar from as_dict() output."""
+        return cls({date.fromisoformat(day): color for day, color in stored.items()})
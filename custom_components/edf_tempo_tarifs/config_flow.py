@@ -5,8 +5,16 @@ from __future__ import annotations
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr
 
-from .const import CONF_PUISSANCE_SOUSCRITE, DOMAIN, VALID_PUISSANCES
+from . import async_schedule_backfill
+from .const import (
+    CONF_BACKGROUND_SETUP,
+    CONF_CSV_HISTORY,
+    CONF_PUISSANCE_SOUSCRITE,
+    DOMAIN,
+    VALID_PUISSANCES,
+)
 
 
 class EDFTempoTarifsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -93,24 +101,33 @@ class EDFTempoTarifsOptionsFlowHandler(config_entries.OptionsFlow):
                         title=f"EDF Tempo Tarifs {puissance} kVA",
                     )
 
-                    # SI la puissance change, TOUJOURS recharger pour mettre à jour le nom du device
-                    if puissance != current_puissance:
+                    coordinator = self.hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id)
+
+                    if coordinator is not None:
+                        # Changement à chaud : données, entités et device mis à jour sur place
+                        await coordinator.update_puissance(puissance)
+                        self._async_rename_device(puissance)
+                        if puissance != current_puissance:
+                            # Pas de rechargement : import des statistiques de la nouvelle puissance
+                            async_schedule_backfill(self.hass, self._config_entry, puissance)
+                    elif puissance != current_puissance:
+                        # Entrée non chargée : rechargement complet
                         await self.hass.config_entries.async_reload(self._config_entry.entry_id)
-                    else:
-                        # Si même puissance, juste mettre à jour le coordinateur
-                        if (
-                            DOMAIN in self.hass.data
-                            and self._config_entry.entry_id in self.hass.data[DOMAIN]
-                        ):
-                            coordinator = self.hass.data[DOMAIN][self._config_entry.entry_id]
-                            await coordinator.update_puissance(puissance)
-
-                    return self.async_create_entry(title="", data={})
+
+                    return self.async_create_entry(
+                        title="",
+                        data={
+                            CONF_BACKGROUND_SETUP: user_input.get(CONF_BACKGROUND_SETUP, False),
+                            CONF_CSV_HISTORY: user_input.get(CONF_CSV_HISTORY, False),
+                        },
+                    )
             except (ValueError, TypeError):
                 errors[CONF_PUISSANCE_SOUSCRITE] = "invalid_puissance"
 
         # Récupérer la valeur actuelle
         current_puissance = self._config_entry.data.get(CONF_PUISSANCE_SOUSCRITE, "6")
+        background_setup = self._config_entry.options.get(CONF_BACKGROUND_SETUP, False)
+        csv_history = self._config_entry.options.get(CONF_CSV_HISTORY, False)
 
         puissance_options = {str(p): f"{p} kVA" for p in VALID_PUISSANCES}
 
@@ -118,7 +135,9 @@ class EDFTempoTarifsOptionsFlowHandler(config_entries.OptionsFlow):
             {
                 vol.Required(CONF_PUISSANCE_SOUSCRITE, default=current_puissance): vol.In(
                     puissance_options
-                )
+                ),
+                vol.Optional(CONF_BACKGROUND_SETUP, default=background_setup): bool,
+                vol.Optional(CONF_CSV_HISTORY, default=csv_history): bool,
             }
         )
 
@@ -128,3 +147,13 @@ class EDFTempoTarifsOptionsFlowHandler(config_entries.OptionsFlow):
             errors=errors,
             description_placeholders={"valid_puissances": ", ".join(map(str, VALID_PUISSANCES))},
         )
+
+    @callback
+    def _async_rename_device(self, puissance: int) -> None:
+        """Rename the entry's device after the power."""
+        device_registry = dr.async_get(self.hass)
+
+        if device := device_registry.async_get_device(
+            identifiers={(DOMAIN, self._config_entry.entry_id)}
+        ):
+            device_registry.async_update_device(device.id, name=f"EDF Tempo Tarifs {puissance} kVA")
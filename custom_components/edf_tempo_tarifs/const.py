@@ -1,9 +1,15 @@
 """Constants for EDF Tempo Tarifs integration."""
 
 import logging
-from datetime import date, timedelta
+from datetime import date, time, timedelta
 
-from homeassistant.const import CURRENCY_EURO, UnitOfEnergy, UnitOfTime
+from homeassistant.const import (
+    CURRENCY_EURO,
+    PERCENTAGE,
+    UnitOfEnergy,
+    UnitOfInformation,
+    UnitOfTime,
+)
 
 DOMAIN = "edf_tempo_tarifs"
 LOGGER = logging.getLogger(__name__)
@@ -16,8 +22,41 @@ API_URL = (
 )
 API_BASE_PARAMS = {"page_size": 1, "DATE_DEBUT__sort": "desc"}
 API_TIMEOUT = 30  # secondes
+API_PAGE_SIZE = 50  # maximum accepté par l'API tabulaire
+API_MAX_PAGES = 20
+API_HISTORY_MAX_PAGES = 200
+API_MAX_BODY_SIZE = 1024 * 1024  # octets, bien au-delà d'une page de 50 lignes
+API_READ_CHUNK_SIZE = 16 * 1024  # octets lus à la fois
+
+# Fichier CSV complet de la même ressource, lu en flux pour l'historique
+CSV_URL = "https://www.data.gouv.fr/fr/datasets/r/0c3d1d36-c412-4620-8566-e5cbb4fa2b5a"
+CSV_CHUNK_SIZE = 64 * 1024  # octets lus à la fois
+
+# Client HTTP dédié à l'intégration (API tabulaire, fichier CSV, couleurs Tempo)
+HTTP_CONNECT_TIMEOUT = 10  # secondes, établissement de la connexion
+HTTP_READ_TIMEOUT = 20  # secondes sans recevoir de données
+HTTP_POOL_LIMIT = 10  # connexions simultanées
+HTTP_POOL_LIMIT_PER_HOST = 4
+HTTP_DNS_CACHE_TTL = 3600  # secondes
+HTTP_KEEPALIVE_TIMEOUT = 30  # secondes, connexions gardées entre les pages
+HTTP_VALIDATOR_CACHE_SIZE = 16  # réponses gardées pour les requêtes conditionnelles
+
+# Clés des objets partagés dans hass.data[DOMAIN] (hub, client HTTP, moteur de coût,
+# import des statistiques), à côté des coordinateurs par entrée
+DATA_HUB = "hub"
+DATA_SESSION = "session"
+DATA_SESSION_LISTENER = "session_listener"
+DATA_COST_ENGINE = "cost_engine"
+DATA_BACKFILL = "backfill"
+HUB_CACHE_TTL = timedelta(minutes=1)
+
+# Cache persistant des dernières lignes de tarifs (.storage/edf_tempo_tarifs.tariffs)
+STORAGE_KEY = f"{DOMAIN}.tariffs"
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # secondes
 
-UPDATE_INTERVAL = timedelta(days=1)
+# Import des tarifs passés en statistiques long terme : heures par appel au recorder
+STATISTICS_BATCH_SIZE = 5000
 
 
 def get_api_params(puissance_souscrite: int, date_max: date | None = None) -> dict:
@@ -36,12 +75,78 @@ def get_api_params(puissance_souscrite: int, date_max: date | None = None) -> di
 
     return {
         **API_BASE_PARAMS,
+        "columns": API_COLUMNS,
         "P_SOUSCRITE__exact": str(puissance_souscrite),
         "DATE_DEBUT__less": date_max.isoformat(),
     }
 
 
+def get_multi_api_params(puissances: list[int], date_max: date | None = None) -> dict:
+    """
+    Génère les paramètres d'API pour plusieurs puissances en une seule requête.
+
+    Args:
+        puissances: Les puissances souscrites en kVA
+        date_max: Date maximum pour les tarifs (défaut: aujourd'hui)
+
+    Returns:
+        Dictionnaire des paramètres pour l'API
+    """
+    if date_max is None:
+        date_max = date.today()
+
+    return {
+        **API_BASE_PARAMS,
+        "page_size": API_PAGE_SIZE,
+        "columns": API_COLUMNS,
+        "P_SOUSCRITE__in": ",".join(str(p) for p in puissances),
+        "DATE_DEBUT__less": date_max.isoformat(),
+    }
+
+
+def get_history_api_params(puissances: list[int]) -> dict:
+    """
+    Génère les paramètres d'API pour parcourir tout l'historique des tarifs.
+
+    Args:
+        puissances: Les puissances souscrites en kVA
+
+    Returns:
+        Dictionnaire des paramètres pour l'API
+    """
+    return {
+        "page_size": API_PAGE_SIZE,
+        "DATE_DEBUT__sort": "asc",
+        "columns": API_COLUMNS,
+        "P_SOUSCRITE__in": ",".join(str(p) for p in puissances),
+    }
+
+
+def get_incremental_api_params(puissances: list[int], date_min: date) -> dict:
+    """
+    Génère les paramètres d'API pour ne récupérer que les tarifs les plus récents.
+
+    La borne est incluse : la dernière révision connue est redemandée à chaque
+    synchronisation, pour qu'une correction publiée sur sa ligne soit reprise.
+
+    Args:
+        puissances: Les puissances souscrites en kVA
+        date_min: DATE_DEBUT à partir de laquelle les lignes sont demandées (incluse)
+
+    Returns:
+        Dictionnaire des paramètres pour l'API
+    """
+    return {
+        **get_history_api_params(puissances),
+        "DATE_DEBUT__greater": date_min.isoformat(),
+    }
+
+
 CONF_PUISSANCE_SOUSCRITE = "puissance_souscrite"
+# Option : entités créées sans attendre le premier appel à l'API
+CONF_BACKGROUND_SETUP = "background_setup"
+# Option : historique lu depuis le fichier CSV complet plutôt que page par page
+CONF_CSV_HISTORY = "csv_history"
 
 VALID_PUISSANCES = [6, 9, 12, 15, 18, 30, 36]
 
@@ -117,5 +222,93 @@ SENSOR_TYPES = {
     },
 }
 
+# Capteurs calculés localement à partir des tarifs
+CURRENT_PRICE_KEY = "CURRENT_PRICE"
+LIVE_SENSOR_TYPES = {
+    CURRENT_PRICE_KEY: {
+        "name": "Tarif actuel TTC",
+        "device_class": "monetary",
+        "state_class": "measurement",
+        "unit": f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+        "icon": "mdi:cash-clock",
+        "suggested_display_precision": 4,
+    },
+}
+
+# Capteurs de diagnostic, désactivés par défaut : mesures des rafraîchissements
+REFRESH_DURATION_KEY = "REFRESH_DURATION"
+CACHE_HIT_RATIO_KEY = "CACHE_HIT_RATIO"
+PAYLOAD_SIZE_KEY = "PAYLOAD_SIZE"
+DIAGNOSTIC_SENSOR_TYPES = {
+    REFRESH_DURATION_KEY: {
+        "name": "Durée du dernier rafraîchissement",
+        "device_class": "duration",
+        "state_class": "measurement",
+        "unit": UnitOfTime.MILLISECONDS,
+        "icon": "mdi:timer-outline",
+        "suggested_display_precision": 1,
+    },
+    CACHE_HIT_RATIO_KEY: {
+        "name": "Taux de réponses servies par le cache",
+        "state_class": "measurement",
+        "unit": PERCENTAGE,
+        "icon": "mdi:cached",
+        "suggested_display_precision": 0,
+    },
+    PAYLOAD_SIZE_KEY: {
+        "name": "Taille de la dernière réponse",
+        "device_class": "data_size",
+        "state_class": "measurement",
+        "unit": UnitOfInformation.BYTES,
+        "icon": "mdi:download-network",
+        "suggested_display_precision": 0,
+    },
+}
+
+# Périodes tarifaires de l'option Tempo : heures creuses de 22h à 6h
+PERIOD_HC = "HC"
+PERIOD_HP = "HP"
+HC_START = time(22, 0)
+HP_START = time(6, 0)
+
+# Couleurs Tempo et lettre utilisée dans les clés de SENSOR_TYPES (HCJB, HPJW, ...)
+TEMPO_COLORS = {"bleu": "B", "blanc": "W", "rouge": "R"}
+
+# Couleur des jours Tempo : une journée Tempo va de 6h à 6h le lendemain, la
+# couleur du lendemain est publiée par RTE en fin de matinée
+COLOR_API_URL = "https://www.api-couleur-tempo.fr/api"
+COLOR_CODES = {1: "bleu", 2: "blanc", 3: "rouge"}  # codeJour de l'API, 0 = inconnue
+COLOR_PUBLICATION_TIME = time(11, 0)
+COLOR_RETRY_INTERVAL = timedelta(minutes=30)
+TEMPO_SEASON_START = (9, 1)  # (mois, jour) : la saison va du 1er septembre au 31 août
+TEMPO_SEASON_DAYS = {"blanc": 43, "rouge": 22}
+
+# Colonnes utilisées, seules conservées dans l'historique et les lignes en cache
+HISTORY_FIELDS = (
+    "P_SOUSCRITE",
+    *(sensor_info["api_field"] for sensor_info in SENSOR_TYPES.values()),
+)
+# Projection demandée à l'API : seules ces colonnes sont renvoyées
+API_COLUMNS = ",".join(HISTORY_FIELDS)
+
 UPDATE_INTERVAL = timedelta(hours=24)
 RETRY_INTERVAL = timedelta(minutes=30)
+
+# Nouvelles tentatives par classe d'erreur : (délai initial, délai maximum)
+RETRY_BACKOFF = {
+    "rate_limited": (timedelta(minutes=15), timedelta(hours=6)),
+    "server": (timedelta(minutes=5), timedelta(hours=2)),
+    "network": (timedelta(minutes=2), timedelta(hours=1)),
+    "invalid_data": (RETRY_INTERVAL, timedelta(hours=12)),
+}
+RETRY_JITTER = 0.5  # part du délai tirée au hasard
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_DURATION = timedelta(hours=6)
+
+# Planification adaptative : interrogation dense autour des révisions tarifaires
+# réglementaires (1er février, 1er août) et des DATE_DEBUT nouvellement publiées
+TARIFF_REVISION_DATES = ((2, 1), (8, 1))  # (mois, jour)
+REVISION_WINDOW_BEFORE = timedelta(days=7)
+REVISION_WINDOW_AFTER = timedelta(days=2)
+DENSE_UPDATE_INTERVAL = timedelta(hours=3)
+SPARSE_UPDATE_INTERVAL = timedelta(days=3)
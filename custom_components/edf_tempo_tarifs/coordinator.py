@@ -2,29 +2,40 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from time import perf_counter
 from typing import Any
 
-import async_timeout
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .const import (
-    API_TIMEOUT,
-    API_URL,
-    DOMAIN,
-    LOGGER,
-    RETRY_INTERVAL,
-    SENSOR_TYPES,
-    UPDATE_INTERVAL,
-    get_api_params,
-)
+from .const import DOMAIN, HISTORY_FIELDS, LOGGER, RETRY_INTERVAL, UPDATE_INTERVAL
+from .exceptions import EDFTempoTarifsBackoffError
+from .hub import async_get_hub
+from .metrics import RefreshMetrics, elapsed_ms
+from .periods import period_at, price_key, tempo_day
+from .retry import CIRCUIT_OPEN
+from .scheduler import next_update_time
+from .snapshot import TariffSnapshot, parse_row
 
 
-class EDFTempoTarifsCoordinator(DataUpdateCoordinator):
+def _row_hash(row: dict[str, Any]) -> int:
+    """Return a hash of the fields a snapshot is built from, independent of key order.
+
+    Les valeurs sont comparées par leur repr : une valeur non hachable (liste,
+    objet) apparue avec une dérive du schéma ne fait pas échouer le calcul.
+    """
+    return hash(tuple(repr(row.get(field)) for field in HISTORY_FIELDS))
+
+
+class EDFTempoTarifsCoordinator(DataUpdateCoordinator[TariffSnapshot]):
     """Class to manage fetching EDF Tempo Tarifs data."""
 
+    last_update: datetime | None = None
+    last_checked: datetime | None = None
+
     def __init__(self, hass: HomeAssistant, puissance_souscrite: int) -> None:
         """Initialize coordinator."""
         super().__init__(
@@ -33,110 +44,209 @@ class EDFTempoTarifsCoordinator(DataUpdateCoordinator):
             name=DOMAIN,
             update_interval=UPDATE_INTERVAL,
             update_method=self._async_update_data_logic,
+            # Données identiques (même instantané) : pas de réveil des entités
+            always_update=False,
         )
 
         self.puissance_souscrite = puissance_souscrite
-        self._session = async_get_clientsession(hass)
-
-    async def _async_update_data_logic(self) -> dict[str, Any]:
+        self.hub = async_get_hub(hass)
+        self._row_hash: int | None = None
+        self._next_planned_fetch: datetime | None = None
+        self.metrics = RefreshMetrics()
+        self._metrics_listeners: list[CALLBACK_TYPE] = []
+
+    @property
+    def next_planned_fetch(self) -> datetime | None:
+        """Return when the next API query is planned."""
+        return self._next_planned_fetch
+
+    @callback
+    def _schedule_next_fetch(self) -> None:
+        """Plan the next API query from the tariff calendar."""
+        now = dt_util.now()
+        self._next_planned_fetch = next_update_time(now, self.hub.watch_dates)
+        self.update_interval = self._next_planned_fetch - now
+
+    @callback
+    def _schedule_retry(self) -> timedelta:
+        """Plan the next attempt from the hub's backoff state."""
+        now = dt_util.now()
+        retry_at = self.hub.next_request_time
+
+        if retry_at is None or retry_at <= now:
+            retry_at = now + RETRY_INTERVAL
+
+        self._next_planned_fetch = dt_util.as_local(retry_at)
+        # Changer temporairement l'intervalle (sera reset au prochain succès)
+        self.update_interval = retry_at - now
+        return self.update_interval
+
+    @property
+    def circuit_state(self) -> str:
+        """Return the state of the API circuit breaker."""
+        return self.hub.circuit_breaker.state
+
+    @callback
+    def async_add_metrics_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Listen for new metrics, after every refresh attempt even without new data."""
+        self._metrics_listeners.append(update_callback)
+
+        @callback
+        def _remove() -> None:
+            self._metrics_listeners.remove(update_callback)
+
+        return _remove
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the entities, timing the fan-out."""
+        start = perf_counter()
+        super().async_update_listeners()
+        self.metrics.listeners_ms = elapsed_ms(start)
+
+    async def _async_update_data_logic(self) -> TariffSnapshot:
         """Fetch data from API with retry logic."""
         try:
             data = await self._fetch_data()
-            # Reset à l'intervalle normal après succès
-            self.update_interval = UPDATE_INTERVAL
+            # Après succès, intervalle selon le calendrier des révisions tarifaires
+            self._schedule_next_fetch()
             return data
         except Exception as err:
+            self.metrics.failures += 1
+            retry_in = self._schedule_retry()
+
+            if self.data is not None and (
+                self.circuit_state == CIRCUIT_OPEN or isinstance(err, EDFTempoTarifsBackoffError)
+            ):
+                # API indisponible ou requête différée : on sert les dernières données connues
+                LOGGER.debug("EDF Tempo Tarifs API backed off (%s), serving cached data", err)
+                return self.data
+
             LOGGER.warning(
                 "Failed to update EDF Tempo Tarifs data: %s. Retrying in %s",
                 err,
-                RETRY_INTERVAL,
+                retry_in,
             )
-            # Changer temporairement l'intervalle (sera reset au prochain succès)
-            self.update_interval = RETRY_INTERVAL
             raise UpdateFailed(f"Error fetching data: {err}") from err
+        finally:
+            for update_callback in list(self._metrics_listeners):
+                update_callback()
 
-    async def _fetch_data(self) -> dict[str, Any]:
-        """Fetch data from API."""
-        params = get_api_params(self.puissance_souscrite)
+    async def _fetch_data(self) -> TariffSnapshot:
+        """Fetch data from the shared hub, timing the refresh."""
+        start = perf_counter()
+        try:
+            return await self._fetch_snapshot()
+        finally:
+            self.metrics.refreshes += 1
+            self.metrics.refresh_ms = elapsed_ms(start)
 
+    async def _fetch_snapshot(self) -> TariffSnapshot:
+        """Fetch and parse the row of this coordinator's power."""
         LOGGER.debug("Fetching EDF Tempo Tarifs data for %s kVA", self.puissance_souscrite)
 
-        async with (
-            async_timeout.timeout(API_TIMEOUT),
-            self._session.get(API_URL, params=params) as response,
-        ):
-            if response.status != 200:
-                raise UpdateFailed(f"API returned status {response.status}")
-
-            data = await response.json()
-
-            if not data.get("data") or not isinstance(data["data"], list) or len(data["data"]) == 0:
-                raise UpdateFailed("No data returned from API")
-
-            # Get the most recent entry (first in the list due to __id__sort=desc)
-            latest_data = data["data"][0]
-
-            # Check if we have valid data (not all null in source)
-            has_valid_data = False
-            for sensor_info in SENSOR_TYPES.values():
-                if latest_data.get(sensor_info["api_field"]) is not None:
-                    has_valid_data = True
-                    break
-
-            if not has_valid_data:
-                raise UpdateFailed("No valid data found in API response")
-
-            # Parse and convert data based on device_class
-            parsed_data = {}
-
-            for sensor_key, sensor_info in SENSOR_TYPES.items():
-                api_field = sensor_info["api_field"]
-                raw_value = latest_data.get(api_field)
-
-                value = None
-                if raw_value is not None:
-                    try:
-                        # Conversion selon le device_class
-                        if sensor_info.get("device_class") == "date":
-                            value = datetime.strptime(str(raw_value), "%Y-%m-%d").date()
-                        elif sensor_info.get("device_class") == "monetary":
-                            value = float(raw_value)
-                        else:
-                            value = raw_value
-
-                    except (ValueError, TypeError) as e:
-                        LOGGER.error(
-                            "Erreur conversion %s: %s (valeur: %s, type: %s)",
-                            sensor_key,
-                            e,
-                            raw_value,
-                            type(raw_value),
-                        )
-                        value = None
-
-                parsed_data[sensor_key] = value
-
-            # Check if we have at least some successfully converted data
-            has_converted_data = False
-            for _key, value in parsed_data.items():
-                if value is not None:
-                    has_converted_data = True
-                    break
-
-            if not has_converted_data:
-                raise UpdateFailed("No valid data after conversion")
-
-            # Store metadata
-            parsed_data["raw_data"] = latest_data
-            parsed_data["last_update"] = datetime.now()
-            parsed_data["puissance_souscrite"] = self.puissance_souscrite
-
-            LOGGER.debug("Successfully updated EDF Tempo Tarifs data")
-            return parsed_data
+        latest_data = await self.hub.async_get_row(self.puissance_souscrite, requester=self)
+
+        row_hash = _row_hash(latest_data)
+        self.last_checked = dt_util.now()
+
+        if row_hash == self._row_hash and self.data is not None:
+            # Ligne inchangée depuis la dernière synchronisation : pas de nouvelle
+            # conversion, et le même objet évite de notifier les entités
+            return self.data
+
+        data = self._parse_row(latest_data)
+        self._row_hash = row_hash
+        return data
+
+    def color_at(self, moment: datetime) -> str | None:
+        """Return the Tempo color in effect at a moment, if known."""
+        return self.hub.colors.get(tempo_day(moment))
+
+    def price_at(self, moment: datetime) -> float | None:
+        """Return the price in effect at a moment, from the known colors."""
+        if not self.data or (color := self.color_at(moment)) is None:
+            return None
+        return self.data.get(price_key(period_at(moment), color))
+
+    def remaining_days(self, color: str) -> int | None:
+        """Return the days of a color left in the current Tempo season."""
+        return self.hub.remaining_days(color, tempo_day(dt_util.now()))
+
+    @callback
+    def async_handle_colors(self) -> None:
+        """Notify the entities that the known Tempo colors changed."""
+        if self.data is not None:
+            self.async_update_listeners()
+
+    async def async_load_cached_data(self) -> bool:
+        """Serve the snapshot saved on disk, without any network access.
+
+        Returns:
+            True si des données en cache ont été chargées
+        """
+        await self.hub.async_load()
+
+        if (latest_data := self.hub.rows.get(self.puissance_souscrite)) is None:
+            return False
+
+        try:
+            data = self._parse_row(latest_data)
+        except UpdateFailed:
+            return False
+
+        LOGGER.debug("Using cached EDF Tempo Tarifs data for %s kVA", self.puissance_souscrite)
+        self._row_hash = _row_hash(latest_data)
+        self._schedule_next_fetch()
+        self.async_set_updated_data(data)
+        return True
+
+    @callback
+    def async_handle_hub_rows(self, rows: dict[int, dict[str, Any]]) -> None:
+        """Use the rows fetched by the hub for another entry."""
+        if (latest_data := rows.get(self.puissance_souscrite)) is None:
+            return
+
+        row_hash = _row_hash(latest_data)
+        self.last_checked = dt_util.now()
+
+        if row_hash == self._row_hash:
+            return
+
+        try:
+            data = self._parse_row(latest_data)
+        except UpdateFailed as err:
+            LOGGER.debug("Ignoring shared EDF Tempo Tarifs data: %s", err)
+            return
+
+        self._row_hash = row_hash
+        self._schedule_next_fetch()
+        self.async_set_updated_data(data)
+
+    def _parse_row(self, latest_data: dict[str, Any]) -> TariffSnapshot:
+        """Parse an API row for this coordinator's power."""
+        start = perf_counter()
+        snapshot = parse_row(latest_data, self.puissance_souscrite)
+        self.metrics.parse_ms = elapsed_ms(start)
+        self.last_update = dt_util.now()
+
+        LOGGER.debug("Successfully updated EDF Tempo Tarifs data")
+        return snapshot
 
     async def update_puissance(self, nouvelle_puissance: int):
-        """Mettre à jour la puissance souscrite sans recréer le coordinateur."""
-        if nouvelle_puissance != self.puissance_souscrite:
-            self.puissance_souscrite = nouvelle_puissance
-            # Forcer une mise à jour immédiate avec la nouvelle puissance
+        """Mettre à jour la puissance souscrite sans recréer le coordinateur.
+
+        Le hub récupère les lignes de toutes les puissances en une requête : la
+        ligne de la nouvelle puissance est en général déjà connue et remplace
+        les données sur place, sans appel à l'API.
+        """
+        if nouvelle_puissance == self.puissance_souscrite:
+            return
+
+        self.puissance_souscrite = nouvelle_puissance
+        self._row_hash = None
+        self.async_handle_hub_rows(self.hub.rows)
+
+        if self._row_hash is None:
+            # Pas de ligne en cache : mise à jour immédiate avec la nouvelle puissance
             await self.async_request_refresh()
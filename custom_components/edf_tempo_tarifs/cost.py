@@ -0,0 +1,499 @@
+"""Vectorized energy cost engine for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import date, timedelta
+from functools import partial
+from typing import Any
+
+import numpy as np
+from aiohttp import ClientError
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import get_metadata, statistics_during_period
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .colors import TempoCalendar, season_start
+from .const import (
+    DATA_COST_ENGINE,
+    DOMAIN,
+    HC_START,
+    HP_START,
+    LOGGER,
+    SENSOR_TYPES,
+    TEMPO_COLORS,
+    VALID_PUISSANCES,
+)
+from .history import TariffHistory
+from .hub import EDFTempoTarifsDataHub, async_get_hub
+from .periods import PRICE_KEYS
+
+COLOR_ORDER = tuple(TEMPO_COLORS)
+
+# Colonnes de la matrice des prix : créneau = indice couleur * 2 + indice période (HC, HP)
+SLOT_FIELDS = tuple(SENSOR_TYPES[key]["api_field"] for key in PRICE_KEYS)
+FIXED_FIELD = SENSOR_TYPES["PART_FIXE_TTC"]["api_field"]
+
+# Unités de puissance de pointe converties en kVA (kW assimilés à des kVA)
+PEAK_UNIT_FACTORS = {"VA": 0.001, "W": 0.001, "kVA": 1.0, "kW": 1.0}
+
+
+def _to_float(value: Any) -> float:
+    """Convert an API value, None becoming NaN."""
+    return np.nan if value is None else float(value)
+
+
+def day_boundaries(first_day: date, days: int) -> np.ndarray:
+    """Return the local 0h, 6h and 22h of each day, as POSIX timestamps.
+
+    Une heure tombant entre les bornes k et k+1 appartient au jour k // 3 et à
+    la plage k % 3 : 0 (0h-6h, HC de la veille), 1 (6h-22h, HP) ou 2 (22h-0h, HC).
+    """
+    bounds = np.empty(days * 3)
+
+    for index in range(days):
+        midnight = dt_util.start_of_local_day(first_day + timedelta(days=index))
+        bounds[index * 3] = midnight.timestamp()
+        bounds[index * 3 + 1] = midnight.replace(hour=HP_START.hour).timestamp()
+        bounds[index * 3 + 2] = midnight.replace(hour=HC_START.hour).timestamp()
+
+    return bounds
+
+
+def price_matrix(rows: Iterable[dict[str, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """Return the DATE_DEBUT ordinals and the price slots of each tariff row."""
+    ordinals = []
+    prices = []
+
+    for row in rows:
+        ordinals.append(date.fromisoformat(str(row["DATE_DEBUT"])[:10]).toordinal())
+        prices.append([_to_float(row.get(field)) for field in SLOT_FIELDS])
+
+    return np.array(ordinals, dtype=np.int64), np.array(prices, dtype=float).reshape(
+        -1, len(SLOT_FIELDS)
+    )
+
+
+def hour_slots(
+    starts: np.ndarray, first_day: date, days: int, colors: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the day index and the price slot (-1 if the color is unknown) of each hour."""
+    k = np.searchsorted(day_boundaries(first_day, days), starts, side="right") - 1
+    day_index = k // 3
+    part = k % 3
+
+    # Entre 0h et 6h, la journée Tempo est encore celle de la veille
+    color = colors[day_index + (part != 0)]
+    period = (part == 1).astype(np.intp)
+
+    return day_index, np.where(color >= 0, color * 2 + period, -1)
+
+
+def complete_days(starts: np.ndarray, first_day: date, days: int) -> np.ndarray:
+    """Return whether the statistics have a row for every hour of each local day.
+
+    Une journée de 23 ou 25 heures (changement d'heure) attend autant de lignes.
+    """
+    midnights = np.array(
+        [
+            dt_util.start_of_local_day(first_day + timedelta(days=index)).timestamp()
+            for index in range(days + 1)
+        ]
+    )
+    hours = np.diff(midnights) / 3600
+    rows = np.diff(np.searchsorted(np.sort(starts), midnights))
+    return rows >= hours
+
+
+def day_revisions(revision_ordinals: np.ndarray, first_day: date, days: int) -> np.ndarray:
+    """Return the index of the tariff row in effect each day (-1 before the first one)."""
+    day_ordinals = first_day.toordinal() + np.arange(days)
+    return np.searchsorted(revision_ordinals, day_ordinals, side="right") - 1
+
+
+def compute_costs(
+    starts: np.ndarray,
+    energy: np.ndarray,
+    first_day: date,
+    days: int,
+    colors: np.ndarray,
+    revision_ordinals: np.ndarray,
+    prices: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calcule le coût de chaque jour en un seul passage vectorisé.
+
+    Args:
+        starts: Début de chaque heure (timestamps POSIX)
+        energy: Consommation de chaque heure (kWh)
+        first_day: Premier jour local de la plage
+        days: Nombre de jours de la plage
+        colors: Indice de couleur (-1 si inconnue) de chaque journée Tempo,
+            depuis la veille de first_day
+        revision_ordinals: DATE_DEBUT des lignes de tarifs, triées
+        prices: Prix de chaque ligne de tarifs, par créneau (voir SLOT_FIELDS)
+
+    Returns:
+        Coût, consommation et consommation sans prix connu de chaque jour
+    """
+    day_index, slot = hour_slots(starts, first_day, days, colors)
+    revision = day_revisions(revision_ordinals, first_day, days)[day_index]
+
+    priced = (slot >= 0) & (revision >= 0)
+    price = np.full(len(starts), np.nan)
+    price[priced] = prices[revision[priced], slot[priced]]
+    priced &= ~np.isnan(price)
+
+    cost = np.where(priced, energy * price, 0.0)
+
+    return (
+        np.bincount(day_index, weights=cost, minlength=days),
+        np.bincount(day_index, weights=energy, minlength=days),
+        np.bincount(day_index, weights=np.where(priced, 0.0, energy), minlength=days),
+    )
+
+
+def power_tables(
+    histories: Mapping[int, TariffHistory], puissances: Sequence[int]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the revision dates and, per revision and power, the price slots and fixed part.
+
+    Les DATE_DEBUT de toutes les puissances sont fusionnées : à chaque date,
+    chaque puissance prend la ligne alors en vigueur.
+    """
+    ordinals = sorted(
+        {
+            date.fromisoformat(str(row["DATE_DEBUT"])[:10]).toordinal()
+            for puissance in puissances
+            for row in histories[puissance].rows()
+        }
+    )
+    prices = np.full((len(ordinals), len(puissances), len(SLOT_FIELDS)), np.nan)
+    fixed = np.full((len(ordinals), len(puissances)), np.nan)
+
+    for index, ordinal in enumerate(ordinals):
+        for column, puissance in enumerate(puissances):
+            if (row := histories[puissance].at(date.fromordinal(ordinal))) is None:
+                continue
+            prices[index, column] = [_to_float(row.get(field)) for field in SLOT_FIELDS]
+            fixed[index, column] = _to_float(row.get(FIXED_FIELD))
+
+    return np.array(ordinals, dtype=np.int64), prices, fixed
+
+
+def compare_costs(
+    starts: np.ndarray,
+    energy: np.ndarray,
+    peaks: np.ndarray,
+    first_day: date,
+    days: int,
+    colors: np.ndarray,
+    revision_ordinals: np.ndarray,
+    prices: np.ndarray,
+    fixed: np.ndarray,
+    puissances: Sequence[int],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    Calcule le coût de la même consommation pour toutes les puissances à la fois.
+
+    La part variable est un produit de la consommation horaire par la matrice
+    des prix (heures, puissances) ; la part fixe est répartie jour par jour.
+
+    Args:
+        starts: Début de chaque heure (timestamps POSIX)
+        energy: Consommation de chaque heure (kWh)
+        peaks: Puissance maximale de chaque heure (kVA)
+        first_day: Premier jour local de la plage
+        days: Nombre de jours de la plage
+        colors: Indice de couleur de chaque journée Tempo, depuis la veille de first_day
+        revision_ordinals: DATE_DEBUT fusionnées des lignes de tarifs
+        prices: Prix par révision, puissance et créneau (voir power_tables)
+        fixed: Part fixe annuelle par révision et puissance
+        puissances: Puissances comparées, dans l'ordre des colonnes
+
+    Returns:
+        Part variable, part fixe et heures de dépassement par puissance, et
+        consommation sans prix connu
+    """
+    day_index, slot = hour_slots(starts, first_day, days, colors)
+    revision_day = day_revisions(revision_ordinals, first_day, days)
+    revision = revision_day[day_index]
+
+    priced = (slot >= 0) & (revision >= 0)
+    hourly_prices = prices[revision[priced], :, slot[priced]]  # (heures, puissances)
+
+    variable = energy[priced] @ hourly_prices
+    fixed_cost = fixed[revision_day[revision_day >= 0]].sum(axis=0) / 365
+    hours_over = (peaks[:, np.newaxis] > np.asarray(puissances)[np.newaxis, :]).sum(axis=0)
+
+    return variable, fixed_cost, hours_over, float(energy[~priced].sum())
+
+
+class TempoCostEngine:
+    """Coût réel de la consommation d'après les statistiques long terme.
+
+    Les jours terminés dont toutes les heures ont un prix sont mis en cache :
+    une nouvelle demande ne relit les statistiques qu'à partir du premier jour
+    absent du cache.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: EDFTempoTarifsDataHub) -> None:
+        """Initialize the engine."""
+        self.hass = hass
+        self.hub = hub
+        self._days: dict[tuple[str, int], dict[date, tuple[float, float]]] = {}
+        # Couleurs des saisons demandées par les calculs, jamais élaguées
+        self._colors = TempoCalendar()
+        self._synced_seasons: set[date] = set()
+
+    async def _async_load_statistics(
+        self, statistic_ids: set[str], first_day: date, end_day: date, types: set[str]
+    ) -> dict[str, list[Any]]:
+        """Load the hourly statistics of a range of days, in one query."""
+        return await get_instance(self.hass).async_add_executor_job(
+            statistics_during_period,
+            self.hass,
+            dt_util.start_of_local_day(first_day),
+            dt_util.start_of_local_day(end_day),
+            statistic_ids,
+            "hour",
+            None,
+            types,
+        )
+
+    async def _async_load_energy(
+        self, statistic_id: str, first_day: date, end_day: date
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Load the hourly energy statistics of a range of days, in bulk."""
+        stats = await self._async_load_statistics({statistic_id}, first_day, end_day, {"change"})
+        rows = stats.get(statistic_id, [])
+
+        starts = np.fromiter((row["start"] for row in rows), dtype=float, count=len(rows))
+        energy = np.fromiter(
+            (row.get("change") or 0.0 for row in rows), dtype=float, count=len(rows)
+        )
+        return starts, energy
+
+    async def _async_colors(self, first_day: date, days: int) -> np.ndarray:
+        """Return the color index of each Tempo day, from the day before first_day.
+
+        Le hub ne garde que la saison en cours et la précédente : les saisons
+        plus anciennes couvertes par la plage sont demandées à la source des
+        couleurs, une seule fois, et gardées dans un calendrier propre au moteur.
+        """
+        tempo_days = [first_day + timedelta(days=offset) for offset in range(-1, days)]
+        today = dt_util.now().date()
+        current_season = season_start(today)
+        missing_seasons = {
+            season_start(day)
+            for day in tempo_days
+            if day <= today and day not in self.hub.colors and day not in self._colors
+        }
+
+        for start in sorted(missing_seasons - self._synced_seasons):
+            try:
+                self._colors.update(await self.hub.color_provider.async_get_season(start))
+            except (UpdateFailed, TimeoutError, ClientError, ValueError) as err:
+                LOGGER.debug("Tempo colors of the %s season unavailable: %s", start, err)
+                continue
+
+            # Une saison terminée ne change plus ; la saison en cours reste à compléter
+            if start < current_season:
+                self._synced_seasons.add(start)
+
+        return np.array(
+            [
+                (
+                    COLOR_ORDER.index(color)
+                    if (color := self.hub.colors.get(day) or self._colors.get(day))
+                    else -1
+                )
+                for day in tempo_days
+            ],
+            dtype=np.intp,
+        )
+
+    async def async_get_costs(
+        self, statistic_id: str, puissance_souscrite: int, start: date, end: date
+    ) -> dict[str, Any]:
+        """
+        Calcule les coûts journaliers et mensuels d'une statistique d'énergie.
+
+        Args:
+            statistic_id: Statistique d'énergie (kWh) du recorder
+            puissance_souscrite: Puissance dont les tarifs s'appliquent
+            start: Premier jour inclus
+            end: Dernier jour exclu
+
+        Returns:
+            Coûts par jour et par mois, et totaux
+        """
+        days = (end - start).days
+        today = dt_util.now().date()
+        cache = self._days.setdefault((statistic_id, puissance_souscrite), {})
+
+        first_missing = next(
+            (
+                start + timedelta(days=i)
+                for i in range(days)
+                if start + timedelta(days=i) not in cache
+            ),
+            end,
+        )
+
+        if first_missing < end:
+            missing = (end - first_missing).days
+            history = await self.hub.async_get_history(puissance_souscrite)
+            revision_ordinals, prices = price_matrix(history.rows())
+            starts, energy = await self._async_load_energy(statistic_id, first_missing, end)
+
+            costs, energies, unpriced = compute_costs(
+                starts,
+                energy,
+                first_missing,
+                missing,
+                await self._async_colors(first_missing, missing),
+                revision_ordinals,
+                prices,
+            )
+            LOGGER.debug("Computed %s hours of cost for %s", len(starts), statistic_id)
+
+            complete = complete_days(starts, first_missing, missing)
+
+            fresh: dict[date, tuple[float, float, float]] = {}
+            for index in range(missing):
+                day = first_missing + timedelta(days=index)
+                fresh[day] = (float(costs[index]), float(energies[index]), float(unpriced[index]))
+
+                # Seuls les jours terminés, entièrement valorisés et dont chaque heure est
+                # compilée par le recorder (la dernière l'est après minuit) sont mis en cache
+                if day < today and unpriced[index] == 0 and complete[index]:
+                    cache[day] = fresh[day][:2]
+        else:
+            fresh = {}
+
+        result_days = []
+        months: dict[str, list[float]] = {}
+        total_unpriced = 0.0
+
+        for index in range(days):
+            day = start + timedelta(days=index)
+            cost, kwh, unpriced_kwh = fresh[day] if day in fresh else (*cache[day], 0.0)
+            total_unpriced += unpriced_kwh
+            result_days.append(
+                {"date": day.isoformat(), "cost": round(cost, 4), "energy_kwh": round(kwh, 3)}
+            )
+            month = months.setdefault(day.strftime("%Y-%m"), [0.0, 0.0])
+            month[0] += cost
+            month[1] += kwh
+
+        return {
+            "statistic_id": statistic_id,
+            "puissance_souscrite": puissance_souscrite,
+            "total_cost": round(sum(m[0] for m in months.values()), 4),
+            "energy_kwh": round(sum(m[1] for m in months.values()), 3),
+            "unpriced_energy_kwh": round(total_unpriced, 3),
+            "days": result_days,
+            "months": [
+                {"month": month, "cost": round(cost, 4), "energy_kwh": round(kwh, 3)}
+                for month, (cost, kwh) in months.items()
+            ],
+        }
+
+    async def async_compare_puissances(
+        self, statistic_id: str, peak_statistic_id: str | None, start: date, end: date
+    ) -> dict[str, Any]:
+        """
+        Compare le coût d'une consommation pour chaque puissance souscriptible.
+
+        Args:
+            statistic_id: Statistique d'énergie (kWh) du recorder
+            peak_statistic_id: Statistique de puissance maximale, optionnelle
+            start: Premier jour inclus
+            end: Dernier jour exclu
+
+        Returns:
+            Puissances classées de la moins chère à la plus chère, celles
+            dépassées par la puissance de pointe en dernier
+        """
+        days = (end - start).days
+        puissances = tuple(VALID_PUISSANCES)
+
+        # Une seule synchronisation de l'historique sert toutes les puissances
+        histories = {p: await self.hub.async_get_history(p) for p in puissances}
+        revision_ordinals, prices, fixed = power_tables(histories, puissances)
+
+        statistic_ids = {statistic_id} | ({peak_statistic_id} if peak_statistic_id else set())
+        stats = await self._async_load_statistics(statistic_ids, start, end, {"change", "max"})
+
+        rows = stats.get(statistic_id, [])
+        starts = np.fromiter((row["start"] for row in rows), dtype=float, count=len(rows))
+        energy = np.fromiter(
+            (row.get("change") or 0.0 for row in rows), dtype=float, count=len(rows)
+        )
+        peaks = np.zeros(0)
+
+        if peak_statistic_id:
+            peak_rows = stats.get(peak_statistic_id, [])
+            metadata = await get_instance(self.hass).async_add_executor_job(
+                partial(get_metadata, self.hass, statistic_ids={peak_statistic_id})
+            )
+            unit = metadata.get(peak_statistic_id, (None, {}))[1].get("unit_of_measurement")
+            peaks = np.fromiter(
+                (row.get("max") or 0.0 for row in peak_rows), dtype=float, count=len(peak_rows)
+            ) * PEAK_UNIT_FACTORS.get(unit, 1.0)
+
+        variable, fixed_cost, hours_over, unpriced = compare_costs(
+            starts,
+            energy,
+            peaks,
+            start,
+            days,
+            await self._async_colors(start, days),
+            revision_ordinals,
+            prices,
+            fixed,
+            puissances,
+        )
+        total = variable + fixed_cost
+
+        ranking = sorted(
+            range(len(puissances)),
+            key=lambda column: (hours_over[column] > 0, np.nan_to_num(total[column], nan=np.inf)),
+        )
+
+        return {
+            "statistic_id": statistic_id,
+            "start": start.isoformat(),
+            "end": (end - timedelta(days=1)).isoformat(),
+            "energy_kwh": round(float(energy.sum()), 3),
+            "unpriced_energy_kwh": round(unpriced, 3),
+            "puissances": [
+                {
+                    "puissance_souscrite": puissances[column],
+                    "total_cost": _rounded(total[column]),
+                    "fixed_cost": _rounded(fixed_cost[column]),
+                    "variable_cost": _rounded(variable[column]),
+                    "hours_over_capacity": int(hours_over[column]),
+                }
+                for column in ranking
+            ],
+        }
+
+
+def _rounded(value: float) -> float | None:
+    """Round a cost, NaN (missing tariff) becoming None."""
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+@callback
+def async_get_cost_engine(hass: HomeAssistant) -> TempoCostEngine:
+    """Return the domain-wide cost engine, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if (engine := domain_data.get(DATA_COST_ENGINE)) is None:
+        engine = domain_data[DATA_COST_ENGINE] = TempoCostEngine(hass, async_get_hub(hass))
+
+    return engine
@@ -0,0 +1,110 @@
+"""Streaming ingestion of the tariff resource published as a CSV file."""
+
+from __future__ import annotations
+
+import codecs
+import csv
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from datetime import datetime
+from typing import Any
+
+from .const import HISTORY_FIELDS
+
+# Colonnes indispensables pour ranger une ligne dans l'historique
+_REQUIRED_FIELDS = ("P_SOUSCRITE", "DATE_DEBUT")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Yield the text lines of a byte stream, decoding it incrementally.
+
+    Un caractère UTF-8 ou une fin de ligne coupés entre deux blocs sont
+    reconstitués ; seule la ligne en cours est gardée en mémoire.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    pending += decoder.decode(b"", final=True)
+    if pending.rstrip("\r"):
+        yield pending.rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Yield the CSV records of a byte stream, joining quoted line breaks."""
+    record: str | None = None
+
+    async for line in iter_lines(chunks):
+        record = line if record is None else f"{record}\n{line}"
+        # Un nombre impair de guillemets : le champ entre guillemets continue
+        if record.count('"') % 2 == 0:
+            yield record
+            record = None
+
+    if record is not None:
+        yield record
+
+
+async def iter_csv_rows(
+    chunks: AsyncIterable[bytes], puissances: Iterable[int]
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield the rows of the given powers, as the tabular API would return them.
+
+    Seules les colonnes de HISTORY_FIELDS sont gardées ; les nombres à virgule
+    décimale et les dates JJ/MM/AAAA du fichier sont convertis comme l'API.
+
+    Raises:
+        ValueError: si l'en-tête ne contient pas les colonnes indispensables
+    """
+    wanted = set(puissances)
+    delimiter = ";"
+    columns: list[tuple[str, int]] | None = None
+
+    async for record in iter_records(chunks):
+        if not record.strip():
+            continue
+
+        if columns is None:
+            delimiter = ";" if record.count(";") >= record.count(",") else ","
+            header = [name.strip() for name in _split(record, delimiter)]
+            if missing := [field for field in _REQUIRED_FIELDS if field not in header]:
+                raise ValueError(f"Missing CSV columns: {', '.join(missing)}")
+            columns = [(field, header.index(field)) for field in HISTORY_FIELDS if field in header]
+            continue
+
+        values = _split(record, delimiter)
+        row = {
+            field: _convert(field, values[index]) for field, index in columns if index < len(values)
+        }
+
+        if row.get("P_SOUSCRITE") in wanted:
+            yield row
+
+
+def _split(record: str, delimiter: str) -> list[str]:
+    """Split one CSV record into its fields."""
+    return next(csv.reader([record], delimiter=delimiter))
+
+
+def _convert(field: str, value: str) -> Any:
+    """Convert a CSV field to the type returned by the tabular API."""
+    if not (value := value.strip()):
+        return None
+
+    if field == "DATE_DEBUT":
+        try:
+            return datetime.strptime(value, "%d/%m/%Y").date().isoformat()
+        except ValueError:
+            return value
+
+    try:
+        if field == "P_SOUSCRITE":
+            return int(float(value.replace(",", ".")))
+        return float(value.replace(",", "."))
+    except ValueError:
+        # Valeur laissée telle quelle : rejetée ensuite comme une ligne invalide de l'API
+        return value
@@ -0,0 +1,116 @@
+"""Decoding of the tabular API responses."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import Any, TypedDict
+
+from aiohttp import ClientResponse
+
+from .const import API_MAX_BODY_SIZE, API_READ_CHUNK_SIZE
+from .exceptions import EDFTempoTarifsPayloadTooLargeError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson est fourni avec Home Assistant
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class TabularLinks(TypedDict, total=False):
+    """Pagination links of a tabular API page."""
+
+    next: str | None
+    prev: str | None
+    profile: str | None
+    swagger: str | None
+
+
+class TabularMeta(TypedDict, total=False):
+    """Pagination metadata of a tabular API page."""
+
+    page: int
+    page_size: int
+    total: int
+
+
+class TabularPage(TypedDict):
+    """Envelope of a tabular API page."""
+
+    data: list[dict[str, Any]]
+    links: TabularLinks
+    meta: TabularMeta
+
+
+def _msgspec_loads(body: bytes) -> Any:
+    """Decode JSON with msgspec, raising ValueError like the other decoders."""
+    try:
+        return msgspec.json.decode(body)
+    except msgspec.DecodeError as err:
+        raise ValueError(str(err)) from err
+
+
+# Décodeurs disponibles, du plus rapide au plus lent ; la bibliothèque standard
+# reste toujours utilisable
+JSON_DECODERS: dict[str, Callable[[bytes], Any]] = {
+    **({"orjson": orjson.loads} if orjson is not None else {}),
+    **({"msgspec": _msgspec_loads} if msgspec is not None else {}),
+    "json": json.loads,
+}
+JSON_BACKEND = next(iter(JSON_DECODERS))
+json_loads = JSON_DECODERS[JSON_BACKEND]
+
+
+async def read_body(response: ClientResponse, max_bytes: int | None = None) -> bytes:
+    """Read a response body, refusing bodies larger than max_bytes.
+
+    La taille annoncée (Content-Length) est vérifiée avant toute lecture ; sans
+    elle, la lecture s'arrête dès que la limite est dépassée.
+
+    Raises:
+        EDFTempoTarifsPayloadTooLargeError: si le corps dépasse max_bytes
+            (API_MAX_BODY_SIZE par défaut)
+    """
+    if max_bytes is None:
+        max_bytes = API_MAX_BODY_SIZE
+
+    if isinstance(length := response.content_length, int) and length > max_bytes:
+        raise EDFTempoTarifsPayloadTooLargeError(length, max_bytes)
+
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(API_READ_CHUNK_SIZE):
+        body += chunk
+        if len(body) > max_bytes:
+            raise EDFTempoTarifsPayloadTooLargeError(len(body), max_bytes)
+
+    return bytes(body)
+
+
+def decode_page(body: bytes, loads: Callable[[bytes], Any] = json_loads) -> TabularPage:
+    """Decode a tabular API page, normalizing its envelope.
+
+    Un champ data, links ou meta absent ou d'un type inattendu est remplacé par
+    une valeur vide : la pagination s'arrête alors comme sur une page vide.
+
+    Raises:
+        ValueError: si le corps n'est pas un objet JSON
+    """
+    decoded = loads(body)
+
+    if not isinstance(decoded, dict):
+        raise ValueError("Unexpected API response")
+
+    data = decoded.get("data")
+    links = decoded.get("links")
+    meta = decoded.get("meta")
+
+    return {
+        "data": data if isinstance(data, list) else [],
+        "links": links if isinstance(links, dict) else {},
+        "meta": meta if isinstance(meta, dict) else {},
+    }
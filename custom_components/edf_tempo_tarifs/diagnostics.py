@@ -0,0 +1,62 @@
+"""Diagnostics support for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import EDFTempoTarifsCoordinator
+from .snapshot import SENSOR_INDEX
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: EDFTempoTarifsCoordinator = hass.data[DOMAIN][entry.entry_id]
+    hub = coordinator.hub
+
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "puissance_souscrite": coordinator.puissance_souscrite,
+            "last_update_success": coordinator.last_update_success,
+            "last_update": _isoformat(coordinator.last_update),
+            "last_checked": _isoformat(coordinator.last_checked),
+            "next_planned_fetch": _isoformat(coordinator.next_planned_fetch),
+            "update_interval": str(coordinator.update_interval),
+            "data": _snapshot(coordinator),
+            "metrics": coordinator.metrics.as_dict(),
+        },
+        "hub": {
+            "api_url": hub.api_url,
+            "csv_url": hub.csv_url,
+            "powers_cached": sorted(hub.rows),
+            "watermark": _isoformat(hub.watermark),
+            "next_request_time": _isoformat(hub.next_request_time),
+            "metrics": hub.metrics.as_dict(),
+            "conditional_responses": len(hub.validators),
+            "single_flight": hub.single_flight.as_dict(),
+            "retry_policy": hub.retry_policy.as_dict(),
+            "circuit_breaker": hub.circuit_breaker.as_dict(),
+            "known_colors": len(hub.colors),
+        },
+    }
+
+
+def _snapshot(coordinator: EDFTempoTarifsCoordinator) -> dict[str, Any] | None:
+    """Return the coordinator data as JSON serializable values."""
+    if not coordinator.data:
+        return None
+    return {key: _isoformat(coordinator.data.get(key)) for key in SENSOR_INDEX}
+
+
+def _isoformat(value: Any) -> Any:
+    """Return dates and datetimes as ISO strings, other values unchanged."""
+    return value.isoformat() if hasattr(value, "isoformat") else value
@@ -0,0 +1,50 @@
+"""Exceptions for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from aiohttp import ClientError
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+
+class EDFTempoTarifsApiError(UpdateFailed):
+    """Error status returned by the tabular API."""
+
+    def __init__(self, status: int, retry_after: datetime | None = None) -> None:
+        """Initialize the error."""
+        super().__init__(f"API returned status {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class EDFTempoTarifsRateLimitError(EDFTempoTarifsApiError):
+    """The tabular API asked us to slow down (HTTP 429)."""
+
+
+class EDFTempoTarifsServerError(EDFTempoTarifsApiError):
+    """The tabular API failed on its side (HTTP 5xx)."""
+
+
+class EDFTempoTarifsBackoffError(UpdateFailed):
+    """A request was skipped because the API is backed off or its circuit is open."""
+
+    def __init__(self, message: str, retry_at: datetime) -> None:
+        """Initialize the error."""
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+class EDFTempoTarifsPayloadTooLargeError(ValueError):
+    """A response body exceeded the maximum size accepted."""
+
+    def __init__(self, size: int, max_size: int) -> None:
+        """Initialize the error."""
+        super().__init__(f"Response body of {size} bytes exceeds {max_size} bytes")
+        self.size = size
+        self.max_size = max_size
+
+
+# Erreurs qu'une récupération de données peut lever (voir _fetch_page) : à
+# intercepter par les tâches de fond, services et commandes qui en dépendent
+FETCH_ERRORS: tuple[type[Exception], ...] = (UpdateFailed, TimeoutError, ClientError, ValueError)
@@ -0,0 +1,93 @@
+"""Tariff history for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Iterable
+from datetime import date
+from typing import Any
+
+from .const import HISTORY_FIELDS
+
+
+def _parse_date(value: Any) -> date | None:
+    """Parse a DATE_DEBUT value from the API."""
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+class TariffHistory:
+    """Historique des tarifs d'une puissance, trié par DATE_DEBUT.
+
+    Les lignes sont stockées sous forme de tuples (ordre de HISTORY_FIELDS)
+    à côté d'une liste triée des ordinaux de DATE_DEBUT, ce qui permet de
+    trouver le tarif en vigueur à une date par recherche dichotomique.
+    """
+
+    __slots__ = ("_ordinals", "_values")
+
+    def __init__(self, rows: Iterable[dict[str, Any]] = ()) -> None:
+        """Initialize the history from API rows."""
+        self._ordinals: list[int] = []
+        self._values: list[tuple[Any, ...]] = []
+
+        for row in rows:
+            self.add(row)
+
+    def __len__(self) -> int:
+        """Return the number of tariff rows."""
+        return len(self._ordinals)
+
+    @property
+    def latest_date(self) -> date | None:
+        """Return the most recent DATE_DEBUT known."""
+        if not self._ordinals:
+            return None
+        return date.fromordinal(self._ordinals[-1])
+
+    def add(self, row: dict[str, Any]) -> bool:
+        """Insert or replace a row, keeping the history sorted.
+
+        Returns:
+            True si la ligne est nouvelle ou différente de celle connue
+        """
+        if (date_debut := _parse_date(row.get("DATE_DEBUT"))) is None:
+            return False
+
+        ordinal = date_debut.toordinal()
+        values = tuple(row.get(field) for field in HISTORY_FIELDS)
+        index = bisect_right(self._ordinals, ordinal)
+
+        if index and self._ordinals[index - 1] == ordinal:
+            if self._values[index - 1] == values:
+                return False
+            self._values[index - 1] = values
+            return True
+
+        self._ordinals.insert(index, ordinal)
+        self._values.insert(index, values)
+        return True
+
+    def at(self, day: date) -> dict[str, Any] | None:
+        """Return the row in effect on a given day, in O(log n)."""
+        index = bisect_right(self._ordinals, day.toordinal())
+
+        if index == 0:
+            return None
+
+        return dict(zip(HISTORY_FIELDS, self._values[index - 1], strict=True))
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Return every row, oldest first."""
+        return [dict(zip(HISTORY_FIELDS, values, strict=True)) for values in self._values]
+
+    def as_list(self) -> list[list[Any]]:
+        """Return a compact, JSON serializable representation."""
+        return [list(values) for values in self._values]
+
+    @classmethod
+    def from_list(cls, stored: Iterable[Iterable[Any]]) -> TariffHistory:
+        """Rebuild a history from as_list() output."""
+        return cls(dict(zip(HISTORY_FIELDS, values, strict=False)) for values in stored)
@@ -0,0 +1,611 @@
+"""Shared data hub for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from datetime import date, datetime, timedelta
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import ClientError, ClientResponse, ClientSession
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .client import STREAM_TIMEOUT, ValidatorCache, async_get_session
+from .colors import ApiCouleurTempoProvider, TempoCalendar, TempoColorProvider, season_start
+from .const import (
+    API_HISTORY_MAX_PAGES,
+    API_MAX_PAGES,
+    API_URL,
+    COLOR_PUBLICATION_TIME,
+    COLOR_RETRY_INTERVAL,
+    CSV_CHUNK_SIZE,
+    DATA_HUB,
+    DOMAIN,
+    HISTORY_FIELDS,
+    HUB_CACHE_TTL,
+    LOGGER,
+    STORAGE_KEY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+    VALID_PUISSANCES,
+    get_history_api_params,
+    get_incremental_api_params,
+    get_multi_api_params,
+)
+from .csv_history import iter_csv_rows
+from .decoding import TabularPage, decode_page, read_body
+from .exceptions import (
+    EDFTempoTarifsApiError,
+    EDFTempoTarifsBackoffError,
+    EDFTempoTarifsRateLimitError,
+    EDFTempoTarifsServerError,
+)
+from .history import TariffHistory
+from .metrics import ApiMetrics, elapsed_ms
+from .periods import tempo_day
+from .retry import CIRCUIT_OPEN, CircuitBreaker, RetryPolicy, parse_retry_after
+from .singleflight import SingleFlight, params_key
+
+if TYPE_CHECKING:
+    from .coordinator import EDFTempoTarifsCoordinator
+
+
+class EDFTempoTarifsDataHub:
+    """Fetch the latest tariff row of every subscribed power in one request.
+
+    Une seule instance est partagée par toutes les entrées de configuration :
+    chaque coordinateur reçoit la ligne correspondant à sa puissance.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.api_url = API_URL
+        # URL du fichier CSV de la ressource : l'historique y est lu en flux plutôt
+        # que page par page (voir CONF_CSV_HISTORY)
+        self.csv_url: str | None = None
+        self._lock = asyncio.Lock()
+        self._rows: dict[int, dict[str, Any]] = {}
+        self._fetched_at: datetime | None = None
+        self._coordinators: set[EDFTempoTarifsCoordinator] = set()
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._loaded = False
+        self._load_task: asyncio.Task[None] | None = None
+        self._histories: dict[int, TariffHistory] = {}
+        self._history_synced = False
+        self.retry_policy = RetryPolicy()
+        self.circuit_breaker = CircuitBreaker()
+        self.single_flight = SingleFlight()
+        self.metrics = ApiMetrics()
+        self.validators = ValidatorCache()
+        self.colors = TempoCalendar()
+        self.color_provider: TempoColorProvider = ApiCouleurTempoProvider(hass)
+        self._color_season: date | None = None
+        self._unsub_colors: CALLBACK_TYPE | None = None
+        self._colors_job = HassJob(
+            self._handle_colors_timer, f"{DOMAIN} colors", cancel_on_shutdown=True
+        )
+
+    @property
+    def _session(self) -> ClientSession:
+        """Return the domain-wide session, reopened after the last entry unloaded."""
+        return async_get_session(self.hass)
+
+    @property
+    def rows(self) -> dict[int, dict[str, Any]]:
+        """Return the latest known row for each subscribed power."""
+        return self._rows
+
+    async def async_load(self) -> None:
+        """Load the last rows saved on disk, once.
+
+        Les appels concurrents (entrées configurées en parallèle, couleurs)
+        attendent le même chargement : aucun ne voit le hub avant sa fin.
+        """
+        if self._loaded:
+            return
+
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(
+                self._async_load_store(), f"{DOMAIN}_load"
+            )
+
+        try:
+            # L'annulation d'un appelant n'interrompt pas le chargement partagé
+            await asyncio.shield(self._load_task)
+        except Exception:
+            # Chargement relancé par l'appel suivant
+            self._load_task = None
+            raise
+
+    async def _async_load_store(self) -> None:
+        """Read the store and merge it with what was fetched meanwhile."""
+        if (stored := await self._store.async_load()) is not None:
+            stored_rows = {int(p): row for p, row in stored.get("rows", {}).items()}
+            # Une ligne déjà récupérée depuis l'API reste prioritaire sur le cache
+            self._rows = {**stored_rows, **self._rows}
+            if self._fetched_at is None and (fetched_at := stored.get("fetched_at")):
+                # Redémarrage rapide : les lignes restent fraîches jusqu'à HUB_CACHE_TTL
+                self._fetched_at = dt_util.parse_datetime(fetched_at)
+
+            if (stored_history := stored.get("history")) is not None:
+                self._histories = {
+                    int(p): TariffHistory.from_list(values) for p, values in stored_history.items()
+                }
+                self._history_synced = stored.get("history_complete", True)
+
+            self.colors = TempoCalendar.from_dict(stored.get("colors", {}))
+            if color_season := stored.get("color_season"):
+                self._color_season = date.fromisoformat(color_season)
+            LOGGER.debug("Loaded cached EDF Tempo Tarifs data for %s kVA", list(stored_rows))
+
+        self._loaded = True
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the data to persist."""
+        return {
+            "rows": {str(p): row for p, row in self._rows.items()},
+            "fetched_at": self._fetched_at.isoformat() if self._fetched_at else None,
+            "history": {str(p): history.as_list() for p, history in self._histories.items()},
+            "history_complete": self._history_synced,
+            "colors": self.colors.as_dict(),
+            "color_season": self._color_season.isoformat() if self._color_season else None,
+        }
+
+    @property
+    def watch_dates(self) -> set[date]:
+        """Return the most recent DATE_DEBUT of each power, for the update scheduler."""
+        return {d for history in self._histories.values() if (d := history.latest_date)}
+
+    @property
+    def watermark(self) -> date | None:
+        """Return the DATE_DEBUT from which rows are requested, for every power.
+
+        Plus ancienne des dernières DATE_DEBUT connues par puissance : une ligne
+        publiée en retard pour une puissance n'est pas sautée parce qu'une autre
+        a déjà une ligne plus récente. Les lignes déjà connues renvoyées en plus
+        sont fusionnées sans effet.
+        """
+        return min(
+            (d for history in self._histories.values() if (d := history.latest_date)),
+            default=None,
+        )
+
+    async def async_get_history(self, puissance_souscrite: int) -> TariffHistory:
+        """Return the tariff history of a power, paging through the resource once."""
+        await self.async_load()
+
+        async with self._lock:
+            if not self._history_synced:
+                self._histories = await self._fetch_history()
+                self._history_synced = True
+                self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+        return self._histories.get(puissance_souscrite) or TariffHistory()
+
+    async def async_tariff_at(self, puissance_souscrite: int, day: date) -> dict[str, Any] | None:
+        """Return the tariff row in effect on a given day."""
+        return (await self.async_get_history(puissance_souscrite)).at(day)
+
+    @callback
+    def async_register(self, coordinator: EDFTempoTarifsCoordinator) -> Callable[[], None]:
+        """Register a coordinator to receive its slice after each fetch."""
+        self._coordinators.add(coordinator)
+
+        if self._unsub_colors is None:
+            # Premier coordinateur : synchronisation immédiate des couleurs
+            self._schedule_colors(dt_util.utcnow())
+
+        @callback
+        def _unregister() -> None:
+            self._coordinators.discard(coordinator)
+
+            if not self._coordinators and self._unsub_colors is not None:
+                self._unsub_colors()
+                self._unsub_colors = None
+
+        return _unregister
+
+    def remaining_days(self, color: str, today: date) -> int | None:
+        """Return the days of a color left in the season, once the season is synced."""
+        if self._color_season != season_start(today):
+            return None
+        return self.colors.remaining_days(color, today)
+
+    @callback
+    def _schedule_colors(self, when: datetime) -> None:
+        """Schedule the next color sync."""
+        if self._unsub_colors is not None:
+            self._unsub_colors()
+        self._unsub_colors = async_track_point_in_utc_time(self.hass, self._colors_job, when)
+
+    @callback
+    def _handle_colors_timer(self, _now: datetime) -> None:
+        """Run a scheduled color sync."""
+        self._unsub_colors = None
+        self.hass.async_create_background_task(self.async_refresh_colors(), f"{DOMAIN}_colors")
+
+    async def async_refresh_colors(self) -> bool:
+        """
+        Synchronise les couleurs Tempo.
+
+        La saison est récupérée en une fois, puis seules les couleurs manquantes
+        sont demandées : celle du jour et, après l'heure de publication, celle
+        du lendemain. La synchronisation suivante est programmée à la prochaine
+        publication, ou plus tôt si une couleur attendue manque encore.
+
+        Returns:
+            True si de nouvelles couleurs ont été reçues
+        """
+        await self.async_load()
+
+        now = dt_util.now()
+        today = tempo_day(now)
+        publication = now.replace(
+            hour=COLOR_PUBLICATION_TIME.hour,
+            minute=COLOR_PUBLICATION_TIME.minute,
+            second=0,
+            microsecond=0,
+        )
+        last_published = now.date() + timedelta(days=1) if now >= publication else now.date()
+        changed = False
+
+        try:
+            if self._color_season != (start := season_start(today)):
+                changed = self.colors.update(await self.color_provider.async_get_season(start))
+                self._color_season = start
+                self.colors.prune(today)
+
+            day = today
+            while day <= last_published:
+                if day not in self.colors and (
+                    color := await self.color_provider.async_get_color(day)
+                ):
+                    changed |= self.colors.update({day: color})
+                day += timedelta(days=1)
+        except (UpdateFailed, TimeoutError, ClientError, ValueError) as err:
+            LOGGER.debug("Tempo colors unavailable: %s", err)
+
+        next_publication = publication if now < publication else publication + timedelta(days=1)
+        complete = all(
+            today + timedelta(days=offset) in self.colors
+            for offset in range((last_published - today).days + 1)
+        )
+
+        if self._coordinators:
+            self._schedule_colors(
+                next_publication if complete else min(next_publication, now + COLOR_RETRY_INTERVAL)
+            )
+
+        if changed:
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+            for coordinator in list(self._coordinators):
+                coordinator.async_handle_colors()
+
+        return changed
+
+    async def async_get_row(
+        self,
+        puissance_souscrite: int,
+        requester: EDFTempoTarifsCoordinator | None = None,
+    ) -> dict[str, Any]:
+        """Return the latest row for a power, fetching all powers if needed."""
+        rows = await self.async_refresh_rows(requester)
+
+        if (row := rows.get(puissance_souscrite)) is None:
+            raise UpdateFailed("No data returned from API")
+
+        return row
+
+    async def async_refresh_rows(
+        self, requester: EDFTempoTarifsCoordinator | None = None
+    ) -> dict[int, dict[str, Any]]:
+        """Sync the rows unless a fetch just happened, then fan out what changed.
+
+        Les appelants concurrents dont la requête aurait les mêmes paramètres
+        attendent la synchronisation déjà en cours (voir single_flight).
+        """
+        if self._is_fresh():
+            self.metrics.cache_hits += 1
+            return self._rows
+
+        if (watermark := self.watermark) is None:
+            params = get_multi_api_params(VALID_PUISSANCES)
+        else:
+            # Synchronisation incrémentale : la dernière révision connue est redemandée
+            # pour reprendre une correction publiée sur sa ligne
+            params = get_incremental_api_params(VALID_PUISSANCES, watermark)
+
+        async def sync() -> None:
+            await self._async_sync_rows(params, watermark is None, requester)
+
+        await self.single_flight.async_run(params_key(params), sync)
+        return self._rows
+
+    async def _async_sync_rows(
+        self,
+        params: dict,
+        latest: bool,
+        requester: EDFTempoTarifsCoordinator | None,
+    ) -> None:
+        """Run one sync of the rows, then fan out what changed.
+
+        Les appels concurrents sont fusionnés en amont (single_flight) ; le verrou
+        ne fait qu'exclure la synchronisation de l'historique complet, qui
+        remplace les mêmes historiques.
+        """
+        async with self._lock:
+            self.metrics.start_sync()
+
+            if latest:
+                updated = self._merge_latest_rows(await self._fetch_rows(params))
+            else:
+                updated = self._merge_new_rows(await self._fetch_new_rows(params))
+
+            self._fetched_at = dt_util.utcnow()
+            self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+        if not updated:
+            # Rien de nouveau : ni conversion ni diffusion aux entités
+            return
+
+        # Les autres coordinateurs reçoivent leur part sans refaire d'appel
+        start = perf_counter()
+        for coordinator in list(self._coordinators):
+            if coordinator is not requester:
+                coordinator.async_handle_hub_rows(self._rows)
+        self.metrics.fan_out_ms = elapsed_ms(start)
+
+    def _merge_latest_rows(self, rows: dict[int, dict[str, Any]]) -> set[int]:
+        """Store the latest rows and seed the histories with them."""
+        self._rows = {**self._rows, **rows}
+
+        for puissance, row in rows.items():
+            self._histories.setdefault(puissance, TariffHistory()).add(row)
+
+        return set(rows)
+
+    def _merge_new_rows(self, new_rows: list[dict[str, Any]]) -> set[int]:
+        """Merge rows from the watermark on and promote those now in effect."""
+        for row in new_rows:
+            if (puissance := _row_puissance(row)) is not None:
+                self._histories.setdefault(puissance, TariffHistory()).add(row)
+
+        # Une ligne publiée à l'avance ne devient la ligne courante qu'à sa DATE_DEBUT
+        today = dt_util.now().date()
+        updated: set[int] = set()
+
+        for puissance, history in self._histories.items():
+            if (row := history.at(today)) is None:
+                continue
+
+            current = self._rows.get(puissance)
+            if current is None or any(current.get(field) != value for field, value in row.items()):
+                self._rows[puissance] = row
+                updated.add(puissance)
+
+        return updated
+
+    def _is_fresh(self) -> bool:
+        """Return True if the cached rows were fetched less than HUB_CACHE_TTL ago."""
+        return self._fetched_at is not None and dt_util.utcnow() - self._fetched_at < HUB_CACHE_TTL
+
+    async def _fetch_rows(self, params: dict) -> dict[int, dict[str, Any]]:
+        """Fetch the latest row of every valid power, following pagination."""
+        LOGGER.debug("Fetching EDF Tempo Tarifs data for %s kVA", VALID_PUISSANCES)
+
+        rows: dict[int, dict[str, Any]] = {}
+
+        async for page_rows in self._iter_pages(params, API_MAX_PAGES):
+            # Lignes triées par DATE_DEBUT décroissante : la première vue est la plus récente
+            for row in page_rows:
+                if (puissance := _row_puissance(row)) is not None:
+                    rows.setdefault(puissance, row)
+
+            if all(p in rows for p in VALID_PUISSANCES):
+                break
+
+        if not rows:
+            raise UpdateFailed("No data returned from API")
+
+        return rows
+
+    async def _fetch_new_rows(self, params: dict) -> list[dict[str, Any]]:
+        """Fetch the rows of every valid power from the watermark on."""
+        LOGGER.debug("Fetching EDF Tempo Tarifs rows from %s", params["DATE_DEBUT__greater"])
+
+        new_rows: list[dict[str, Any]] = []
+
+        async for page_rows in self._iter_pages(params, API_HISTORY_MAX_PAGES):
+            new_rows.extend(page_rows)
+
+        return new_rows
+
+    async def _fetch_history(self) -> dict[int, TariffHistory]:
+        """Page through the complete resource for every valid power."""
+        if self.csv_url is not None:
+            try:
+                return await self._fetch_csv_history(self.csv_url)
+            except (EDFTempoTarifsApiError, TimeoutError, ClientError, ValueError) as err:
+                LOGGER.debug("CSV download failed (%s), paging through the tabular API", err)
+
+        LOGGER.debug("Fetching EDF Tempo Tarifs history for %s kVA", VALID_PUISSANCES)
+
+        histories: dict[int, TariffHistory] = {}
+
+        async for page_rows in self._iter_pages(
+            get_history_api_params(VALID_PUISSANCES), API_HISTORY_MAX_PAGES
+        ):
+            for row in page_rows:
+                if (puissance := _row_puissance(row)) is not None:
+                    histories.setdefault(puissance, TariffHistory()).add(row)
+
+        if not histories:
+            raise UpdateFailed("No data returned from API")
+
+        return histories
+
+    async def _fetch_csv_history(self, url: str) -> dict[int, TariffHistory]:
+        """Stream the CSV file of the resource, row by row, for every valid power.
+
+        Le corps n'est jamais chargé en entier : il est décodé et analysé bloc
+        par bloc, seules les lignes des puissances valides étant conservées.
+        """
+        LOGGER.debug("Streaming EDF Tempo Tarifs history from %s", url)
+
+        histories: dict[int, TariffHistory] = {}
+        payload_bytes = 0
+        start = perf_counter()
+
+        async def chunks(response: ClientResponse) -> AsyncIterator[bytes]:
+            nonlocal payload_bytes
+            async for chunk in response.content.iter_chunked(CSV_CHUNK_SIZE):
+                payload_bytes += len(chunk)
+                yield chunk
+
+        async with self._session.get(url, timeout=STREAM_TIMEOUT) as response:
+            if response.status != 200:
+                raise EDFTempoTarifsApiError(response.status)
+
+            http_ms = elapsed_ms(start)
+            decode_start = perf_counter()
+            async for row in iter_csv_rows(chunks(response), VALID_PUISSANCES):
+                histories.setdefault(row["P_SOUSCRITE"], TariffHistory()).add(row)
+
+        if not histories:
+            raise ValueError("No data in the CSV file")
+
+        self.metrics.record_page(http_ms, elapsed_ms(decode_start), payload_bytes)
+        return histories
+
+    async def _iter_pages(
+        self, params: dict, max_pages: int
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield the rows of each page, following links.next."""
+        url: str | None = self.api_url
+        page_params: dict | None = params
+
+        for _page in range(max_pages):
+            if url is None:
+                return
+
+            data = await self._fetch_page(url, page_params)
+
+            if not (page_rows := data["data"]):
+                return
+
+            # Colonnes inutilisées écartées dès le décodage, si l'API a ignoré la projection
+            yield [_project(row) for row in page_rows]
+
+            url = data["links"].get("next")
+            page_params = None
+
+    @property
+    def next_request_time(self) -> datetime | None:
+        """Return when the API may be queried again, if backed off."""
+        times = [self.retry_policy.retry_at]
+        if self.circuit_breaker.state == CIRCUIT_OPEN:
+            times.append(self.circuit_breaker.open_until)
+        return max((t for t in times if t is not None), default=None)
+
+    def _check_request_allowed(self, now: datetime) -> None:
+        """Raise if the retry policy or the circuit breaker forbids a request."""
+        if (retry_at := self.retry_policy.retry_at) is not None and now < retry_at:
+            raise EDFTempoTarifsBackoffError(
+                f"Backing off after {self.retry_policy.last_error} error", retry_at
+            )
+
+        if not self.circuit_breaker.allow_request(now):
+            raise EDFTempoTarifsBackoffError(
+                "Circuit open after repeated API failures", self.circuit_breaker.open_until
+            )
+
+    async def _fetch_page(self, url: str, params: dict | None) -> TabularPage:
+        """Fetch one page of the tabular API.
+
+        La requête est conditionnelle si la même page a déjà été reçue avec un
+        ETag ou une date Last-Modified : une réponse 304 réutilise son contenu.
+        """
+        now = dt_util.utcnow()
+        self._check_request_allowed(now)
+        key = (url, params_key(params or {}))
+        start = perf_counter()
+
+        try:
+            async with self._session.get(
+                url, params=params, headers=self.validators.request_headers(key)
+            ) as response:
+                if response.status == 304 and (cached := self.validators.get(key)) is not None:
+                    data = cached
+                    http_ms = elapsed_ms(start)
+                    decode_start = None
+                else:
+                    if response.status == 429:
+                        raise EDFTempoTarifsRateLimitError(
+                            response.status,
+                            parse_retry_after(response.headers.get("Retry-After"), now),
+                        )
+                    if response.status == 503:
+                        raise EDFTempoTarifsServerError(
+                            response.status,
+                            parse_retry_after(response.headers.get("Retry-After"), now),
+                        )
+                    if response.status >= 500:
+                        raise EDFTempoTarifsServerError(response.status)
+                    if response.status != 200:
+                        raise EDFTempoTarifsApiError(response.status)
+
+                    http_ms = elapsed_ms(start)
+                    decode_start = perf_counter()
+                    body = await read_body(response)
+                    data = decode_page(body)
+                    # Taille transférée (compressée) si annoncée, sinon celle du corps lu
+                    content_length = response.content_length
+                    if not isinstance(content_length, int):
+                        content_length = len(body)
+                    self.validators.store(key, response.headers, data)
+        except (EDFTempoTarifsApiError, TimeoutError, ClientError, ValueError) as err:
+            self.circuit_breaker.record_failure(now)
+            self.retry_policy.record_failure(err, now)
+            raise
+
+        self.circuit_breaker.record_success()
+        self.retry_policy.reset()
+        if decode_start is None:
+            self.metrics.record_not_modified(http_ms)
+        else:
+            self.metrics.record_page(http_ms, elapsed_ms(decode_start), content_length)
+        return data
+
+
+def _project(row: Any) -> dict[str, Any]:
+    """Keep only the columns used by the integration."""
+    if not isinstance(row, dict):
+        return {}
+    return {field: row[field] for field in HISTORY_FIELDS if field in row}
+
+
+def _row_puissance(row: dict[str, Any]) -> int | None:
+    """Return the subscribed power of an API row."""
+    try:
+        return int(row.get("P_SOUSCRITE"))
+    except (TypeError, ValueError):
+        return None
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> EDFTempoTarifsDataHub:
+    """Return the domain-wide data hub, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+
+    if (hub := domain_data.get(DATA_HUB)) is None:
+        hub = domain_data[DATA_HUB] = EDFTempoTarifsDataHub(hass)
+
+    return hub
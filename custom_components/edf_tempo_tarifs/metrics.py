@@ -0,0 +1,125 @@
+"""Lightweight performance metrics for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from time import perf_counter
+from typing import Any
+
+
+def elapsed_ms(start: float) -> float:
+    """Return the milliseconds elapsed since a perf_counter() value."""
+    return (perf_counter() - start) * 1000
+
+
+class ApiMetrics:
+    """Mesures des synchronisations du hub avec l'API.
+
+    Les durées et la taille portent sur la dernière synchronisation (toutes pages
+    confondues) : http_ms jusqu'à la réception des en-têtes, decode_ms pour la
+    lecture et le décodage JSON du corps. Les compteurs sont cumulés depuis le
+    démarrage ; not_modified compte les pages servies par une réponse 304.
+    """
+
+    __slots__ = (
+        "cache_hits",
+        "cache_misses",
+        "decode_ms",
+        "fan_out_ms",
+        "http_ms",
+        "not_modified",
+        "pages",
+        "payload_bytes",
+        "requests",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.http_ms = 0.0
+        self.decode_ms = 0.0
+        self.payload_bytes = 0
+        self.pages = 0
+        self.fan_out_ms = 0.0
+        self.requests = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def start_sync(self) -> None:
+        """Reset the measures of the last sync before a new one."""
+        self.cache_misses += 1
+        self.http_ms = 0.0
+        self.decode_ms = 0.0
+        self.payload_bytes = 0
+        self.pages = 0
+        self.fan_out_ms = 0.0
+
+    def record_page(self, http_ms: float, decode_ms: float, payload_bytes: int | None) -> None:
+        """Add the measures of one page to the current sync."""
+        self.requests += 1
+        self.pages += 1
+        self.http_ms += http_ms
+        self.decode_ms += decode_ms
+        self.payload_bytes += payload_bytes or 0
+
+    def record_not_modified(self, http_ms: float) -> None:
+        """Add a page answered by 304 Not Modified, without body to decode."""
+        self.requests += 1
+        self.pages += 1
+        self.not_modified += 1
+        self.http_ms += http_ms
+
+    @property
+    def cache_hit_ratio(self) -> float | None:
+        """Return the share of row requests served without a sync."""
+        if not (total := self.cache_hits + self.cache_misses):
+            return None
+        return self.cache_hits / total
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        ratio = self.cache_hit_ratio
+        return {
+            "http_ms": round(self.http_ms, 3),
+            "decode_ms": round(self.decode_ms, 3),
+            "payload_bytes": self.payload_bytes,
+            "pages": self.pages,
+            "fan_out_ms": round(self.fan_out_ms, 3),
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_ratio": round(ratio, 3) if ratio is not None else None,
+        }
+
+
+class RefreshMetrics:
+    """Mesures des rafraîchissements d'un coordinateur.
+
+    refresh_ms couvre tout _fetch_data (attente du hub comprise), parse_ms la
+    conversion des champs et listeners_ms la notification des entités.
+    """
+
+    __slots__ = ("failures", "listeners_ms", "parse_ms", "refresh_ms", "refreshes")
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.refresh_ms: float | None = None
+        self.parse_ms: float | None = None
+        self.listeners_ms: float | None = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for diagnostics."""
+        return {
+            "refresh_ms": _round(self.refresh_ms),
+            "parse_ms": _round(self.parse_ms),
+            "listeners_ms": _round(self.listeners_ms),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+def _round(value: float | None) -> float | None:
+    """Round a duration, keeping None."""
+    return round(value, 3) if value is not None else None
@@ -0,0 +1,66 @@
+"""HC/HP periods of the Tempo option."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .const import HC_START, HP_START, PERIOD_HC, PERIOD_HP, TEMPO_COLORS
+
+
+def period_at(moment: datetime) -> str:
+    """Return the period (HC or HP) in effect at a local moment."""
+    if HP_START <= dt_util.as_local(moment).time() < HC_START:
+        return PERIOD_HP
+    return PERIOD_HC
+
+
+def day_transitions(day: date) -> tuple[tuple[datetime, str], ...]:
+    """Return the HC/HP transitions of a local day, with the period they start."""
+    midnight = dt_util.start_of_local_day(day)
+    return (
+        (midnight.replace(hour=HP_START.hour, minute=HP_START.minute), PERIOD_HP),
+        (midnight.replace(hour=HC_START.hour, minute=HC_START.minute), PERIOD_HC),
+    )
+
+
+def upcoming_transitions(now: datetime) -> list[tuple[datetime, str]]:
+    """
+    Calcule les changements de période à venir.
+
+    Renvoie les changements restants du jour et ceux du lendemain, de sorte
+    qu'il y en ait toujours au moins un.
+
+    Args:
+        now: Instant courant (avec fuseau horaire)
+
+    Returns:
+        Liste triée de (instant, période qui commence)
+    """
+    today = dt_util.as_local(now).date()
+    return [
+        (instant, period)
+        for day in (today, today + timedelta(days=1))
+        for instant, period in day_transitions(day)
+        if instant > now
+    ]
+
+
+def price_key(period: str, color: str) -> str:
+    """Return the SENSOR_TYPES key of a period and a Tempo color."""
+    return f"{period}J{TEMPO_COLORS[color]}"
+
+
+def tempo_day(moment: datetime) -> date:
+    """Return the Tempo day (6h to 6h) a moment belongs to."""
+    local = dt_util.as_local(moment)
+    if local.time() < HP_START:
+        return local.date() - timedelta(days=1)
+    return local.date()
+
+
+# Clés des prix du kWh, par couleur puis par période (HCJB, HPJB, HCJW, ...)
+PRICE_KEYS = tuple(
+    price_key(period, color) for color in TEMPO_COLORS for period in (PERIOD_HC, PERIOD_HP)
+)
@@ -0,0 +1,132 @@
+"""Retry policy and circuit breaker for the data.gouv tabular API."""
+
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from aiohttp import ClientError
+from homeassistant.util import dt as dt_util
+
+from .const import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_DURATION, RETRY_BACKOFF, RETRY_JITTER
+from .exceptions import (
+    EDFTempoTarifsApiError,
+    EDFTempoTarifsRateLimitError,
+    EDFTempoTarifsServerError,
+)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+def classify_error(err: BaseException) -> str:
+    """Return the RETRY_BACKOFF class of an error."""
+    if isinstance(err, EDFTempoTarifsRateLimitError):
+        return "rate_limited"
+    if isinstance(err, EDFTempoTarifsServerError):
+        return "server"
+    if isinstance(err, (TimeoutError, ClientError)):
+        return "network"
+    return "invalid_data"
+
+
+def parse_retry_after(value: str | None, now: datetime) -> datetime | None:
+    """Parse a Retry-After header (delay in seconds or HTTP date)."""
+    if not value:
+        return None
+
+    if value.strip().isdigit():
+        return now + timedelta(seconds=int(value))
+
+    try:
+        retry_after = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return dt_util.as_utc(retry_after) if retry_after.tzinfo else None
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter, per error class."""
+
+    def __init__(self) -> None:
+        """Initialize the policy."""
+        self.attempts = 0
+        self.last_error: str | None = None
+        self.retry_at: datetime | None = None
+
+    def record_failure(self, err: BaseException, now: datetime) -> datetime:
+        """Record a failure and return when the next request is allowed."""
+        self.attempts += 1
+        self.last_error = classify_error(err)
+
+        base, maximum = RETRY_BACKOFF[self.last_error]
+        delay = min(maximum, base * 2 ** (self.attempts - 1))
+        # Jitter : évite que toutes les instances relancent au même instant
+        delay *= random.uniform(1 - RETRY_JITTER, 1)
+
+        self.retry_at = now + delay
+
+        if isinstance(err, EDFTempoTarifsApiError) and err.retry_after:
+            self.retry_at = max(self.retry_at, err.retry_after)
+
+        return self.retry_at
+
+    def reset(self) -> None:
+        """Forget previous failures after a success."""
+        self.attempts = 0
+        self.last_error = None
+        self.retry_at = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the policy state for diagnostics."""
+        return {
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "retry_at": self.retry_at.isoformat() if self.retry_at else None,
+        }
+
+
+class CircuitBreaker:
+    """Stop querying the API after repeated failures."""
+
+    def __init__(self) -> None:
+        """Initialize the circuit breaker."""
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.open_until: datetime | None = None
+
+    def allow_request(self, now: datetime) -> bool:
+        """Return True if a request may be sent, moving to half-open after the cooldown."""
+        if self.state == CIRCUIT_OPEN:
+            if self.open_until is not None and now < self.open_until:
+                return False
+            # Une seule requête d'essai après la période d'ouverture
+            self.state = CIRCUIT_HALF_OPEN
+
+        return True
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.open_until = None
+
+    def record_failure(self, now: datetime) -> None:
+        """Count a failure, opening the circuit past the threshold."""
+        self.failures += 1
+
+        if self.state == CIRCUIT_HALF_OPEN or self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self.state = CIRCUIT_OPEN
+            self.open_until = now + CIRCUIT_OPEN_DURATION
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the circuit state for diagnostics."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "open_until": self.open_until.isoformat() if self.open_until else None,
+        }
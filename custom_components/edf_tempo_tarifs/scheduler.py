@@ -0,0 +1,76 @@
+"""Calendar-aware update scheduling for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DENSE_UPDATE_INTERVAL,
+    REVISION_WINDOW_AFTER,
+    REVISION_WINDOW_BEFORE,
+    SPARSE_UPDATE_INTERVAL,
+    TARIFF_REVISION_DATES,
+)
+
+
+def revision_dates(today: date) -> set[date]:
+    """Return the regulatory revision dates around a given day."""
+    return {
+        date(year, month, day)
+        for year in (today.year - 1, today.year, today.year + 1)
+        for month, day in TARIFF_REVISION_DATES
+    }
+
+
+def _next_grid_time(now: datetime, interval: timedelta) -> datetime:
+    """Return the first instant after now on a grid anchored on local midnights.
+
+    Toutes les entrées calculent ainsi les mêmes instants, ce qui permet au hub
+    de ne faire qu'un seul appel pour toutes.
+    """
+    if interval >= timedelta(days=1):
+        days = interval.days
+        day = now.date() + timedelta(days=1)
+        day += timedelta(days=-day.toordinal() % days)
+        return dt_util.start_of_local_day(day)
+
+    start = dt_util.start_of_local_day(now)
+    steps = (now - start) // interval + 1
+    return start + steps * interval
+
+
+def next_update_time(now: datetime, watch_dates: Iterable[date] = ()) -> datetime:
+    """
+    Calcule la prochaine interrogation de l'API.
+
+    Interrogation toutes les DENSE_UPDATE_INTERVAL dans les fenêtres entourant
+    chaque date surveillée, toutes les SPARSE_UPDATE_INTERVAL sinon, sur une
+    grille commune à toutes les entrées. Une interrogation est aussi prévue au
+    début de chaque fenêtre et à minuit le jour de chaque date surveillée.
+
+    Args:
+        now: Instant courant (avec fuseau horaire)
+        watch_dates: DATE_DEBUT connues à surveiller en plus des révisions
+
+    Returns:
+        Instant de la prochaine interrogation
+    """
+    candidates = [_next_grid_time(now, SPARSE_UPDATE_INTERVAL)]
+
+    for day in revision_dates(now.date()) | set(watch_dates):
+        window_start = dt_util.start_of_local_day(day - REVISION_WINDOW_BEFORE)
+        window_end = dt_util.start_of_local_day(day + REVISION_WINDOW_AFTER)
+        effective = dt_util.start_of_local_day(day)
+
+        if window_start <= now < window_end:
+            candidates.append(_next_grid_time(now, DENSE_UPDATE_INTERVAL))
+        elif now < window_start:
+            candidates.append(window_start)
+
+        if now < effective:
+            candidates.append(effective)
+
+    return min(candidates)
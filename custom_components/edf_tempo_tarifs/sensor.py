@@ -2,16 +2,73 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
+from datetime import datetime, timedelta
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import RestoreSensor, SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import EntityCategory
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, State, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_point_in_time
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, SENSOR_TYPES
+from .const import (
+    CACHE_HIT_RATIO_KEY,
+    CURRENT_PRICE_KEY,
+    DIAGNOSTIC_SENSOR_TYPES,
+    DOMAIN,
+    LIVE_SENSOR_TYPES,
+    PAYLOAD_SIZE_KEY,
+    REFRESH_DURATION_KEY,
+    SENSOR_TYPES,
+)
 from .coordinator import EDFTempoTarifsCoordinator
+from .periods import period_at, tempo_day, upcoming_transitions
+
+ATTR_STALE = "stale"
+
+# Attributs repris de l'état restauré tant que le coordinateur n'a pas de données
+RESTORED_ATTRIBUTES = ("puissance_souscrite_kva", "last_update", "next_update", "circuit_breaker")
+
+
+def _cache_hit_percent(coordinator: EDFTempoTarifsCoordinator) -> float | None:
+    """Return the share of row requests served by the hub cache, in percent."""
+    if (ratio := coordinator.hub.metrics.cache_hit_ratio) is None:
+        return None
+    return ratio * 100
+
+
+def _refresh_details(coordinator: EDFTempoTarifsCoordinator) -> dict[str, Any]:
+    """Return the breakdown of the last refresh."""
+    api = coordinator.hub.metrics.as_dict()
+    return {
+        **coordinator.metrics.as_dict(),
+        "http_ms": api["http_ms"],
+        "decode_ms": api["decode_ms"],
+        "fan_out_ms": api["fan_out_ms"],
+        "pages": api["pages"],
+        "retry": coordinator.hub.retry_policy.as_dict(),
+        "circuit_breaker": coordinator.hub.circuit_breaker.as_dict(),
+        "coalesced_calls": coordinator.hub.single_flight.coalesced,
+    }
+
+
+# Valeur et attributs de chaque capteur de diagnostic
+DIAGNOSTIC_VALUES: dict[str, Callable[[EDFTempoTarifsCoordinator], Any]] = {
+    REFRESH_DURATION_KEY: lambda coordinator: coordinator.metrics.refresh_ms,
+    CACHE_HIT_RATIO_KEY: _cache_hit_percent,
+    PAYLOAD_SIZE_KEY: lambda coordinator: coordinator.hub.metrics.payload_bytes,
+}
+DIAGNOSTIC_ATTRIBUTES: dict[str, Callable[[EDFTempoTarifsCoordinator], dict[str, Any]]] = {
+    REFRESH_DURATION_KEY: _refresh_details,
+    CACHE_HIT_RATIO_KEY: lambda coordinator: {
+        "cache_hits": coordinator.hub.metrics.cache_hits,
+        "cache_misses": coordinator.hub.metrics.cache_misses,
+    },
+}
 
 
 async def async_setup_entry(
@@ -26,13 +83,27 @@ async def async_setup_entry(
     for sensor_key in SENSOR_TYPES:
         entities.append(EDFTempoTarifsSensor(coordinator, sensor_key, config_entry.entry_id))
 
+    entities.append(
+        EDFTempoTarifsCurrentPriceSensor(coordinator, CURRENT_PRICE_KEY, config_entry.entry_id)
+    )
+
+    for sensor_key in DIAGNOSTIC_SENSOR_TYPES:
+        entities.append(
+            EDFTempoTarifsDiagnosticSensor(coordinator, sensor_key, config_entry.entry_id)
+        )
+
     async_add_entities(entities)
 
 
-class EDFTempoTarifsSensor(CoordinatorEntity, SensorEntity):
-    """Representation of an EDF Tempo Tarifs sensor."""
+class EDFTempoTarifsSensor(CoordinatorEntity, RestoreSensor):
+    """Representation of an EDF Tempo Tarifs sensor.
+
+    Au démarrage, tant que le coordinateur n'a pas de données, la dernière valeur
+    connue est restaurée et marquée périmée (attribut stale) jusqu'à la revalidation.
+    """
 
     _attr_has_entity_name = True
+    _sensor_types = SENSOR_TYPES
 
     def __init__(
         self, coordinator: EDFTempoTarifsCoordinator, sensor_key: str, entry_id: str
@@ -41,8 +112,12 @@ class EDFTempoTarifsSensor(CoordinatorEntity, SensorEntity):
         super().__init__(coordinator)
         self._sensor_key = sensor_key
         self._entry_id = entry_id
+        self._circuit_state: str | None = None
+        self._puissance = coordinator.puissance_souscrite
+        self._stale = False
+        self._restored_attributes: dict[str, Any] = {}
 
-        sensor_info = SENSOR_TYPES[sensor_key]
+        sensor_info = self._sensor_types[sensor_key]
 
         self._attr_name = sensor_info["name"]
         self._attr_unique_id = f"{entry_id}_{sensor_key}"
@@ -74,6 +149,9 @@ class EDFTempoTarifsSensor(CoordinatorEntity, SensorEntity):
     @property
     def native_value(self) -> Any:
         """Return the state of the sensor."""
+        if self._stale:
+            return self._attr_native_value
+
         if not self.coordinator.data:
             return None
 
@@ -82,27 +160,61 @@ class EDFTempoTarifsSensor(CoordinatorEntity, SensorEntity):
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return extra state attributes."""
+        if self._stale:
+            return {**self._restored_attributes, ATTR_STALE: True}
+
         attrs = {}
 
         if self.coordinator.data:
             attrs["puissance_souscrite_kva"] = self.coordinator.puissance_souscrite
 
-            last_update = self.coordinator.data.get("last_update")
-            if last_update:
+            if last_update := self.coordinator.last_update:
                 attrs["last_update"] = last_update.isoformat()
 
+            if next_planned_fetch := self.coordinator.next_planned_fetch:
+                attrs["next_update"] = next_planned_fetch.isoformat()
+
+            attrs["circuit_breaker"] = self.coordinator.circuit_state
+
         return attrs
 
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        return (
+        return self._stale or (
             super().available
             and self.coordinator.data
             and self._sensor_key in self.coordinator.data
             and self.coordinator.data[self._sensor_key] is not None
         )
 
+    async def async_added_to_hass(self) -> None:
+        """Restore the last known state until the coordinator has data."""
+        await super().async_added_to_hass()
+
+        if self.coordinator.data:
+            return
+
+        if (last_state := await self.async_get_last_state()) is None or (
+            last_sensor_data := await self.async_get_last_sensor_data()
+        ) is None:
+            return
+
+        if last_sensor_data.native_value is None or not self._can_restore(last_state):
+            return
+
+        self._attr_native_value = last_sensor_data.native_value
+        self._restored_attributes = {
+            key: last_state.attributes[key]
+            for key in RESTORED_ATTRIBUTES
+            if key in last_state.attributes
+        }
+        self._stale = True
+
+    def _can_restore(self, last_state: State) -> bool:
+        """Return True if the restored value still applies now."""
+        return True
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
@@ -118,15 +230,205 @@ class EDFTempoTarifsSensor(CoordinatorEntity, SensorEntity):
         old_value = self._attr_native_value
 
         # Comparaison simple et directe
-        if old_value == new_value and self.available:
+        circuit_state = self.coordinator.circuit_state
+        puissance = self.coordinator.puissance_souscrite
+        if (
+            old_value == new_value
+            and self.available
+            and circuit_state == self._circuit_state
+            and puissance == self._puissance
+            and not self._stale
+        ):
             # Même valeur ET déjà disponible, on ne fait RIEN
             return
 
-        # Si la valeur a changé OU si l'entité n'est pas encore disponible
+        # Si la valeur ou la puissance a changé OU si l'entité n'est pas encore disponible ou périmée
         self._attr_native_value = new_value
+        self._circuit_state = circuit_state
+        self._puissance = puissance
+        self._stale = False
 
         # Force l'entité à devenir disponible si elle ne l'est pas déjà
         if not self.available:
             self._attr_available = True
 
         self.async_write_ha_state()
+
+
+class EDFTempoTarifsCurrentPriceSensor(EDFTempoTarifsSensor):
+    """Prix du kWh en vigueur, mis à jour aux changements de période HC/HP.
+
+    Les instants de changement (6h et 22h) sont calculés une fois par jour et
+    seul le prochain est programmé : aucune interrogation périodique.
+    """
+
+    _sensor_types = LIVE_SENSOR_TYPES
+
+    def __init__(
+        self, coordinator: EDFTempoTarifsCoordinator, sensor_key: str, entry_id: str
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, sensor_key, entry_id)
+        self._period = period_at(dt_util.now())
+        self._transitions: list[tuple[datetime, str]] = []
+        self._unsub_transition: CALLBACK_TYPE | None = None
+        self._known_colors: tuple[str | None, str | None] = (None, None)
+
+    def _colors(self) -> tuple[str | None, str | None]:
+        """Return the Tempo colors of today and tomorrow."""
+        now = dt_util.now()
+        return (
+            self.coordinator.color_at(now),
+            self.coordinator.color_at(now + timedelta(days=1)),
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        if self._stale:
+            return self._attr_native_value
+
+        return self.coordinator.price_at(dt_util.now())
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return extra state attributes."""
+        attrs = super().extra_state_attributes
+        attrs["period"] = self._period
+        attrs["tempo_color"], attrs["tempo_color_tomorrow"] = self._colors()
+        attrs["remaining_blanc_days"] = self.coordinator.remaining_days("blanc")
+        attrs["remaining_rouge_days"] = self.coordinator.remaining_days("rouge")
+
+        if self._transitions:
+            attrs["next_period_change"] = self._transitions[0][0].isoformat()
+
+        return attrs
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        return self._stale or (self.coordinator.last_update_success and bool(self.coordinator.data))
+
+    def _can_restore(self, last_state: State) -> bool:
+        """Return True if the restored price was written in the current period."""
+        now = dt_util.now()
+        return (period_at(last_state.last_updated), tempo_day(last_state.last_updated)) == (
+            period_at(now),
+            tempo_day(now),
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Schedule the next period change when added to hass."""
+        await super().async_added_to_hass()
+        self._period = period_at(dt_util.now())
+        self._schedule_transition()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the scheduled period change."""
+        if self._unsub_transition is not None:
+            self._unsub_transition()
+            self._unsub_transition = None
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def _schedule_transition(self) -> None:
+        """Schedule the next precomputed period change."""
+        if not self._transitions:
+            self._transitions = upcoming_transitions(dt_util.now())
+
+        self._unsub_transition = async_track_point_in_time(
+            self.hass, self._handle_transition, self._transitions[0][0]
+        )
+
+    @callback
+    def _handle_transition(self, now: datetime) -> None:
+        """Switch to the period starting now."""
+        _, self._period = self._transitions.pop(0)
+        # Le prix restauré ne vaut plus pour la nouvelle période
+        self._stale = False
+        self._schedule_transition()
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if not self.coordinator.last_update_success:
+            return
+
+        new_value = self.coordinator.price_at(dt_util.now())
+        circuit_state = self.coordinator.circuit_state
+        colors = self._colors()
+
+        puissance = self.coordinator.puissance_souscrite
+
+        if (
+            new_value == self._attr_native_value
+            and circuit_state == self._circuit_state
+            and colors == self._known_colors
+            and puissance == self._puissance
+            and not self._stale
+        ):
+            return
+
+        self._attr_native_value = new_value
+        self._circuit_state = circuit_state
+        self._puissance = puissance
+        self._stale = False
+        self._known_colors = colors
+        self.async_write_ha_state()
+
+
+class EDFTempoTarifsDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Mesure de performance des rafraîchissements, désactivée par défaut.
+
+    Mise à jour après chaque tentative de rafraîchissement, y compris lorsque
+    les tarifs sont inchangés.
+    """
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self, coordinator: EDFTempoTarifsCoordinator, sensor_key: str, entry_id: str
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._sensor_key = sensor_key
+
+        sensor_info = DIAGNOSTIC_SENSOR_TYPES[sensor_key]
+
+        self._attr_name = sensor_info["name"]
+        self._attr_unique_id = f"{entry_id}_{sensor_key}"
+        self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
+        self._attr_device_class = sensor_info.get("device_class")
+        self._attr_native_unit_of_measurement = sensor_info.get("unit")
+        self._attr_icon = sensor_info.get("icon")
+        self._attr_state_class = sensor_info.get("state_class")
+        self._attr_suggested_display_precision = sensor_info.get("suggested_display_precision")
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        return DIAGNOSTIC_VALUES[self._sensor_key](self.coordinator)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return extra state attributes."""
+        if (attributes := DIAGNOSTIC_ATTRIBUTES.get(self._sensor_key)) is None:
+            return None
+        return attributes(self.coordinator)
+
+    @property
+    def available(self) -> bool:
+        """Return True: the measures are available even when the API is not."""
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Ignore data updates: the metrics listener already writes the state."""
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the metrics of every refresh attempt."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_add_metrics_listener(self.async_write_ha_state))
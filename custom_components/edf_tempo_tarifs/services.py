@@ -0,0 +1,221 @@
+"""Services for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .backfill import async_get_backfill
+from .const import CONF_PUISSANCE_SOUSCRITE, DOMAIN, VALID_PUISSANCES
+from .cost import async_get_cost_engine
+from .exceptions import FETCH_ERRORS
+from .hub import async_get_hub
+
+SERVICE_CALCULATE_COST = "calculate_cost"
+SERVICE_IMPORT_STATISTICS = "import_statistics"
+SERVICE_COMPARE_PUISSANCES = "compare_puissances"
+SERVICE_GET_TARIFF = "get_tariff"
+
+ATTR_STATISTIC_ID = "statistic_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_PEAK_STATISTIC_ID = "peak_statistic_id"
+ATTR_DATE = "date"
+
+CALCULATE_COST_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_STATISTIC_ID): cv.string,
+        vol.Required(ATTR_START): cv.date,
+        vol.Optional(ATTR_END): cv.date,
+        vol.Optional(CONF_PUISSANCE_SOUSCRITE): vol.All(vol.Coerce(int), vol.In(VALID_PUISSANCES)),
+    }
+)
+
+IMPORT_STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_PUISSANCE_SOUSCRITE): vol.All(vol.Coerce(int), vol.In(VALID_PUISSANCES)),
+    }
+)
+
+COMPARE_PUISSANCES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_STATISTIC_ID): cv.string,
+        vol.Optional(ATTR_PEAK_STATISTIC_ID): cv.string,
+        vol.Optional(ATTR_START): cv.date,
+        vol.Optional(ATTR_END): cv.date,
+    }
+)
+
+GET_TARIFF_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DATE): cv.date,
+        vol.Optional(CONF_PUISSANCE_SOUSCRITE): vol.All(vol.Coerce(int), vol.In(VALID_PUISSANCES)),
+    }
+)
+
+
+@callback
+def _check_recorder(hass: HomeAssistant) -> None:
+    """Raise if the recorder is not loaded."""
+    if "recorder" not in hass.config.components:
+        raise ServiceValidationError("The recorder is required by this service")
+
+
+def _history_unavailable(err: Exception) -> HomeAssistantError:
+    """Return the service error for a failed history or color fetch."""
+    return HomeAssistantError(
+        f"Tariff history unavailable: {err}",
+        translation_domain=DOMAIN,
+        translation_key="history_unavailable",
+        translation_placeholders={"error": str(err)},
+    )
+
+
+@callback
+def _default_puissance(hass: HomeAssistant) -> int:
+    """Return the subscribed power of the first configured entry."""
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        return int(entry.data[CONF_PUISSANCE_SOUSCRITE])
+
+    raise ServiceValidationError("No EDF Tempo Tarifs entry configured")
+
+
+async def _async_calculate_cost(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the cost of an energy statistic over a range of days."""
+    _check_recorder(hass)
+
+    start = call.data[ATTR_START]
+    # Par défaut jusqu'à aujourd'hui inclus
+    end = call.data.get(ATTR_END) or dt_util.now().date()
+
+    if end < start:
+        raise ServiceValidationError("end must not be before start")
+
+    puissance = call.data.get(CONF_PUISSANCE_SOUSCRITE) or _default_puissance(hass)
+
+    try:
+        return await async_get_cost_engine(hass).async_get_costs(
+            call.data[ATTR_STATISTIC_ID], puissance, start, end + timedelta(days=1)
+        )
+    except FETCH_ERRORS as err:
+        raise _history_unavailable(err) from err
+
+
+async def _async_import_statistics(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Import the missing hours of the tariff statistics of every configured power."""
+    _check_recorder(hass)
+
+    if CONF_PUISSANCE_SOUSCRITE in call.data:
+        puissances = {call.data[CONF_PUISSANCE_SOUSCRITE]}
+    else:
+        puissances = {
+            int(entry.data[CONF_PUISSANCE_SOUSCRITE])
+            for entry in hass.config_entries.async_entries(DOMAIN)
+        }
+
+    backfill = async_get_backfill(hass)
+    try:
+        imported = {str(p): await backfill.async_backfill(p) for p in sorted(puissances)}
+    except FETCH_ERRORS as err:
+        raise _history_unavailable(err) from err
+
+    return {"imported_hours": imported}
+
+
+async def _async_compare_puissances(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Rank every subscribable power by the cost of a consumption."""
+    _check_recorder(hass)
+
+    # Par défaut, les 365 derniers jours terminés
+    end = call.data.get(ATTR_END) or dt_util.now().date() - timedelta(days=1)
+    start = call.data.get(ATTR_START) or end - timedelta(days=364)
+
+    if end < start:
+        raise ServiceValidationError("end must not be before start")
+
+    try:
+        return await async_get_cost_engine(hass).async_compare_puissances(
+            call.data[ATTR_STATISTIC_ID],
+            call.data.get(ATTR_PEAK_STATISTIC_ID),
+            start,
+            end + timedelta(days=1),
+        )
+    except FETCH_ERRORS as err:
+        raise _history_unavailable(err) from err
+
+
+async def _async_get_tariff(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the tariff row in effect on a given day, from the local history."""
+    day = call.data.get(ATTR_DATE) or dt_util.now().date()
+    puissance = call.data.get(CONF_PUISSANCE_SOUSCRITE) or _default_puissance(hass)
+
+    try:
+        tariff = await async_get_hub(hass).async_tariff_at(puissance, day)
+    except FETCH_ERRORS as err:
+        raise _history_unavailable(err) from err
+
+    return {
+        "puissance_souscrite": puissance,
+        "date": day.isoformat(),
+        "tariff": tariff,
+    }
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_calculate_cost(call: ServiceCall) -> ServiceResponse:
+        return await _async_calculate_cost(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CALCULATE_COST,
+        async_calculate_cost,
+        schema=CALCULATE_COST_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_import_statistics(call: ServiceCall) -> ServiceResponse:
+        return await _async_import_statistics(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_STATISTICS,
+        async_import_statistics,
+        schema=IMPORT_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_compare_puissances(call: ServiceCall) -> ServiceResponse:
+        return await _async_compare_puissances(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_COMPARE_PUISSANCES,
+        async_compare_puissances,
+        schema=COMPARE_PUISSANCES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_get_tariff(call: ServiceCall) -> ServiceResponse:
+        return await _async_get_tariff(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TARIFF,
+        async_get_tariff,
+        schema=GET_TARIFF_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
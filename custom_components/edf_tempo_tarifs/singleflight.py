@@ -0,0 +1,72 @@
+"""Single-flight coalescing of concurrent identical calls."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from typing import Any, TypeVar
+
+_T = TypeVar("_T")
+
+
+def params_key(params: Mapping[str, Any]) -> tuple[tuple[str, str], ...]:
+    """Return a hashable key for API query parameters, independent of their order."""
+    return tuple(sorted((key, str(value)) for key, value in params.items()))
+
+
+class SingleFlight:
+    """Partage d'un appel en cours entre les appelants concurrents de même clé.
+
+    Le premier appelant exécute l'appel ; ceux qui arrivent avant sa fin attendent
+    son résultat (ou son exception) au lieu d'en lancer un second.
+    """
+
+    __slots__ = ("_pending", "calls", "coalesced")
+
+    def __init__(self) -> None:
+        """Initialize the single-flight group."""
+        self._pending: dict[Hashable, asyncio.Future[Any]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls currently running."""
+        return len(self._pending)
+
+    async def async_run(self, key: Hashable, call: Callable[[], Awaitable[_T]]) -> _T:
+        """Await call(), or the call of the same key already running."""
+        if (pending := self._pending.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                # L'annulation d'un appelant en attente n'annule pas l'appel partagé
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+            # Appel partagé annulé avec son premier appelant : il est relancé
+            return await self.async_run(key, call)
+
+        self.calls += 1
+        future: asyncio.Future[_T] = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as err:
+            future.set_exception(err)
+            # Marque l'exception comme lue lorsqu'aucun autre appelant n'attend
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._pending[key]
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the coalescing metrics."""
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": self.in_flight}
@@ -0,0 +1,101 @@
+"""Parsed tariff snapshots for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+from weakref import WeakValueDictionary
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .const import LOGGER, SENSOR_TYPES
+
+
+def _to_date(raw_value: Any) -> date:
+    """Convert a DATE_DEBUT value."""
+    return date.fromisoformat(str(raw_value))
+
+
+def _identity(raw_value: Any) -> Any:
+    """Return the value unchanged."""
+    return raw_value
+
+
+_CONVERTERS_BY_DEVICE_CLASS: dict[str | None, Callable[[Any], Any]] = {
+    "date": _to_date,
+    "monetary": float,
+}
+
+# Plan de conversion compilé une fois : (clé capteur, champ API, fonction de conversion)
+CONVERSION_PLAN: tuple[tuple[str, str, Callable[[Any], Any]], ...] = tuple(
+    (
+        sensor_key,
+        sensor_info["api_field"],
+        _CONVERTERS_BY_DEVICE_CLASS.get(sensor_info.get("device_class"), _identity),
+    )
+    for sensor_key, sensor_info in SENSOR_TYPES.items()
+)
+SENSOR_INDEX: dict[str, int] = {key: index for index, (key, _, _) in enumerate(CONVERSION_PLAN)}
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class TariffSnapshot:
+    """Valeurs converties d'une ligne de tarifs, dans l'ordre de SENSOR_TYPES."""
+
+    puissance_souscrite: int
+    values: tuple[Any, ...]
+
+    def __contains__(self, sensor_key: object) -> bool:
+        """Return True for a known sensor key."""
+        return sensor_key in SENSOR_INDEX
+
+    def __getitem__(self, sensor_key: str) -> Any:
+        """Return the value of a sensor."""
+        return self.values[SENSOR_INDEX[sensor_key]]
+
+    def get(self, sensor_key: str, default: Any = None) -> Any:
+        """Return the value of a sensor, or default for an unknown key."""
+        if (index := SENSOR_INDEX.get(sensor_key)) is None:
+            return default
+        return self.values[index]
+
+
+# Instances identiques partagées entre entrées et rafraîchissements
+_SNAPSHOTS: WeakValueDictionary[tuple[int, tuple[Any, ...]], TariffSnapshot] = WeakValueDictionary()
+
+
+def parse_row(row: dict[str, Any], puissance_souscrite: int) -> TariffSnapshot:
+    """Convert an API row with the compiled plan."""
+    values = []
+
+    for sensor_key, api_field, convert in CONVERSION_PLAN:
+        raw_value = row.get(api_field)
+        value = None
+
+        if raw_value is not None:
+            try:
+                value = convert(raw_value)
+            except (ValueError, TypeError) as e:
+                LOGGER.error(
+                    "Erreur conversion %s: %s (valeur: %s, type: %s)",
+                    sensor_key,
+                    e,
+                    raw_value,
+                    type(raw_value),
+                )
+
+        values.append(value)
+
+    if all(value is None for value in values):
+        if all(row.get(api_field) is None for _, api_field, _ in CONVERSION_PLAN):
+            raise UpdateFailed("No valid data found in API response")
+        raise UpdateFailed("No valid data after conversion")
+
+    key = (puissance_souscrite, tuple(values))
+
+    if (snapshot := _SNAPSHOTS.get(key)) is None:
+        snapshot = _SNAPSHOTS[key] = TariffSnapshot(*key)
+
+    return snapshot
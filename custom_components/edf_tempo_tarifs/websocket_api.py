@@ -0,0 +1,50 @@
+"""Websocket commands for EDF Tempo Tarifs."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+
+from .const import CONF_PUISSANCE_SOUSCRITE, DOMAIN, VALID_PUISSANCES
+from .exceptions import FETCH_ERRORS
+from .hub import async_get_hub
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, websocket_get_tariff)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/tariff",
+        vol.Required("date"): cv.date,
+        vol.Required(CONF_PUISSANCE_SOUSCRITE): vol.All(vol.Coerce(int), vol.In(VALID_PUISSANCES)),
+    }
+)
+@websocket_api.async_response
+async def websocket_get_tariff(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the tariff row in effect on a given day, from the local history."""
+    try:
+        tariff = await async_get_hub(hass).async_tariff_at(
+            msg[CONF_PUISSANCE_SOUSCRITE], msg["date"]
+        )
+    except FETCH_ERRORS as err:
+        connection.send_error(msg["id"], "history_unavailable", str(err))
+        return
+
+    connection.send_result(
+        msg["id"],
+        {
+            "puissance_souscrite": msg[CONF_PUISSANCE_SOUSCRITE],
+            "date": msg["date"].isoformat(),
+            "tariff": tariff,
+        },
+    )
@@ -0,0 +1 @@
+"""Benchmarks for EDF Tempo Tarifs."""
@@ -0,0 +1,84 @@
+"""Fixtures for benchmarks."""
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+import pytest
+
+# Résultats de la session, affichés en fin de run et écrits si EDF_TEMPO_BENCH_JSON est défini
+RESULTS = []
+
+
+def pytest_collection_modifyitems(items):
+    """Mark every benchmark, so that they only run with -m bench."""
+    for item in items:
+        if "benchmarks" in item.path.parts:
+            item.add_marker(pytest.mark.bench)
+
+
+class BenchRecorder:
+    """Measure latency and allocations of an async operation.
+
+    Le fixture benchmark de pytest-benchmark n'appelle que des fonctions
+    synchrones : il ne peut pas attendre une coroutine dans la boucle
+    d'événements de Home Assistant déjà lancée par le test, et ne relève pas
+    les allocations. Les durées ne sont que rapportées ; les tests vérifient
+    des compteurs (requêtes, pages, octets, écritures d'état).
+    """
+
+    def __init__(self, name):
+        """Initialize the recorder."""
+        self.name = name
+        self.metrics = {}
+
+    async def measure(self, target, rounds=5, before=None):
+        """Await target() rounds times, recording latency and peak allocations.
+
+        before(), s'il est fourni, est attendu avant chaque tour, hors mesure.
+        """
+        durations = []
+        peaks = []
+
+        for _ in range(rounds):
+            if before is not None:
+                await before()
+            tracemalloc.start()
+            start = time.perf_counter()
+            await target()
+            durations.append(time.perf_counter() - start)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        self.metrics["latency_ms_median"] = round(statistics.median(durations) * 1000, 3)
+        self.metrics["latency_ms_max"] = round(max(durations) * 1000, 3)
+        self.metrics["alloc_peak_kib"] = round(max(peaks) / 1024, 1)
+
+    def record(self, **metrics):
+        """Record extra metrics."""
+        self.metrics.update(metrics)
+
+
+@pytest.fixture
+def bench(request):
+    """Return a recorder whose metrics are reported at the end of the session."""
+    recorder = BenchRecorder(request.node.name)
+    yield recorder
+    if recorder.metrics:
+        RESULTS.append({"name": recorder.name, **recorder.metrics})
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print the benchmark results."""
+    if not RESULTS:
+        return
+
+    terminalreporter.section("EDF Tempo Tarifs benchmarks")
+    for result in RESULTS:
+        metrics = ", ".join(f"{k}={v}" for k, v in result.items() if k != "name")
+        terminalreporter.write_line(f"{result['name']}: {metrics}")
+
+    if path := os.environ.get("EDF_TEMPO_BENCH_JSON"):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(RESULTS, file, indent=2)
@@ -0,0 +1,42 @@
+"""Benchmarks for the decoding of tabular API pages."""
+import json
+from datetime import date
+
+import pytest
+
+from custom_components.edf_tempo_tarifs.decoding import JSON_DECODERS, decode_page
+
+from tests.tabular_api import make_row
+
+DECODES_PER_ROUND = 20
+
+
+def _page(rows, padding_columns):
+    """Return the JSON body of a page of rows."""
+    data = [make_row(6, date(2000, 1, 1), padding_columns=padding_columns) for _ in range(rows)]
+    links = {"profile": None, "swagger": None, "next": None, "prev": None}
+    meta = {"page": 1, "page_size": rows, "total": rows}
+    return json.dumps({"data": data, "links": links, "meta": meta}).encode()
+
+
+@pytest.mark.parametrize("backend", list(JSON_DECODERS))
+@pytest.mark.parametrize(("rows", "padding_columns"), [(1, 0), (50, 0), (50, 200)])
+async def test_bench_decode_page(bench, backend, rows, padding_columns):
+    """Measure the decode cost of a page for each available JSON decoder."""
+    body = _page(rows, padding_columns)
+    loads = JSON_DECODERS[backend]
+
+    async def decode_pages():
+        for _ in range(DECODES_PER_ROUND):
+            page = decode_page(body, loads)
+        assert len(page["data"]) == rows
+
+    await bench.measure(decode_pages, rounds=3)
+    bench.record(
+        backend=backend,
+        rows=rows,
+        payload_bytes=len(body),
+        decode_us_per_page=round(
+            bench.metrics["latency_ms_median"] * 1000 / DECODES_PER_ROUND, 1
+        ),
+    )
@@ -0,0 +1,175 @@
+"""Benchmarks for the fetch/parse/fan-out pipeline."""
+from datetime import date
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.edf_tempo_tarifs.const import CONF_PUISSANCE_SOUSCRITE, DOMAIN, SENSOR_TYPES
+from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+from custom_components.edf_tempo_tarifs.sensor import EDFTempoTarifsSensor
+
+from tests.tabular_api import make_row
+
+# Une page incrémentale de lignes réduites aux colonnes demandées
+PAYLOAD_BYTES_MAX = 4096
+
+
+@pytest.fixture
+def state_writes(monkeypatch):
+    """Count the state writes of the tariff sensors."""
+    counter = {"count": 0}
+    original = EDFTempoTarifsSensor.async_write_ha_state
+
+    def counting_write(self):
+        counter["count"] += 1
+        original(self)
+
+    monkeypatch.setattr(EDFTempoTarifsSensor, "async_write_ha_state", counting_write)
+    return counter
+
+
+@pytest.fixture
+def listener_calls(monkeypatch):
+    """Count the coordinator updates handled by the tariff sensors."""
+    counter = {"count": 0}
+    original = EDFTempoTarifsSensor._handle_coordinator_update
+
+    def counting_update(self):
+        counter["count"] += 1
+        original(self)
+
+    monkeypatch.setattr(EDFTempoTarifsSensor, "_handle_coordinator_update", counting_update)
+    return counter
+
+
+async def _setup_entries(hass, tabular_api, count):
+    """Set up count config entries against the emulator."""
+    async_get_hub(hass).api_url = tabular_api.url
+
+    entries = []
+    for index in range(count):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_PUISSANCE_SOUSCRITE: "6"},
+            entry_id=f"bench_{index}",
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+
+    await hass.async_block_till_done()
+    return [hass.data[DOMAIN][entry.entry_id] for entry in entries]
+
+
+async def test_bench_parse_row(hass: HomeAssistant, bench):
+    """Benchmark the conversion of 1000 API rows."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    row = make_row(6, date(2024, 2, 1))
+
+    async def parse():
+        for _ in range(1000):
+            snapshot = coordinator._parse_row(row)
+        assert snapshot.puissance_souscrite == 6
+
+    await bench.measure(parse)
+
+
+@pytest.mark.parametrize("entries", [1, 10, 100])
+async def test_bench_refresh_fan_out(hass: HomeAssistant, tabular_api, state_writes, bench, entries):
+    """Benchmark a refresh bringing a new tariff to every entry."""
+    coordinators = await _setup_entries(hass, tabular_api, entries)
+    hub = coordinators[0].hub
+
+    async def changed_refresh():
+        tabular_api.add_revision()
+        hub._fetched_at = None
+        await coordinators[0].async_refresh()
+        await hass.async_block_till_done()
+
+    # Tour de chauffe : seul le régime établi est mesuré
+    await changed_refresh()
+
+    requests_before = tabular_api.request_count
+    writes_before = state_writes["count"]
+
+    await bench.measure(changed_refresh, rounds=5)
+
+    requests = (tabular_api.request_count - requests_before) / 5
+    writes = (state_writes["count"] - writes_before) / 5
+    bench.record(entries=entries, http_requests_per_refresh=requests, state_writes_per_refresh=writes)
+
+    # Un seul appel quel que soit le nombre d'entrées, et chaque capteur tarifaire est mis à jour
+    assert requests == 1
+    assert writes == entries * len(SENSOR_TYPES)
+
+
+@pytest.mark.parametrize("entries", [1, 10, 100])
+async def test_bench_refresh_unchanged(
+    hass: HomeAssistant, tabular_api, state_writes, listener_calls, bench, entries
+):
+    """Benchmark a refresh finding no new tariff."""
+    coordinators = await _setup_entries(hass, tabular_api, entries)
+    hub = coordinators[0].hub
+
+    async def unchanged_refresh():
+        hub._fetched_at = None
+        await coordinators[0].async_refresh()
+        await hass.async_block_till_done()
+
+    await unchanged_refresh()
+    requests_before = tabular_api.request_count
+    writes_before = state_writes["count"]
+    calls_before = listener_calls["count"]
+
+    await bench.measure(unchanged_refresh, rounds=5)
+
+    requests = (tabular_api.request_count - requests_before) / 5
+    writes = (state_writes["count"] - writes_before) / 5
+    calls = (listener_calls["count"] - calls_before) / 5
+    bench.record(
+        entries=entries,
+        http_requests_per_refresh=requests,
+        state_writes_per_refresh=writes,
+        listener_calls_per_refresh=calls,
+    )
+
+    assert requests == 1
+    assert writes == 0
+    assert calls == 0
+
+
+@pytest.mark.parametrize(("latency", "padding_columns"), [(0.0, 0), (0.0, 200), (0.05, 0)])
+async def test_bench_refresh_payload(
+    hass: HomeAssistant, tabular_api, bench, latency, padding_columns
+):
+    """Benchmark a changed refresh for 10 entries with API latency and wider rows."""
+    tabular_api.latency = latency
+    tabular_api.padding_columns = padding_columns
+    coordinators = await _setup_entries(hass, tabular_api, 10)
+    hub = coordinators[0].hub
+
+    async def changed_refresh():
+        tabular_api.add_revision()
+        hub._fetched_at = None
+        await coordinators[0].async_refresh()
+        await hass.async_block_till_done()
+
+    await changed_refresh()
+    requests_before = tabular_api.request_count
+
+    await bench.measure(changed_refresh, rounds=5)
+
+    requests = (tabular_api.request_count - requests_before) / 5
+    bench.record(
+        api_latency_ms=latency * 1000,
+        padding_columns=padding_columns,
+        http_requests_per_refresh=requests,
+        payload_bytes=hub.metrics.payload_bytes,
+    )
+
+    # Une page, limitée aux colonnes utiles : les colonnes ajoutées ne sont pas transférées
+    assert requests == 1
+    assert hub.metrics.pages == 1
+    assert 0 < hub.metrics.payload_bytes <= PAYLOAD_BYTES_MAX
@@ -0,0 +1,72 @@
+"""Benchmarks for the config entry setup."""
+import asyncio
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.edf_tempo_tarifs.const import (
+    CONF_BACKGROUND_SETUP,
+    CONF_PUISSANCE_SOUSCRITE,
+    DOMAIN,
+)
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+API_LATENCY = 0.2
+
+
+@pytest.mark.parametrize("background_setup", [False, True])
+async def test_bench_startup(hass: HomeAssistant, tabular_api, bench, background_setup):
+    """Benchmark the time until a config entry is set up, without cache, with a slow API."""
+    tabular_api.latency = API_LATENCY
+    hub = async_get_hub(hass)
+    hub.api_url = tabular_api.url
+    entries = []
+    awaited_requests = []
+
+    async def cold_setup():
+        # Démarrage à froid : ni ligne en mémoire, ni cache sur disque
+        hub._rows = {}
+        hub._fetched_at = None
+        requests_before = hub.metrics.requests
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_PUISSANCE_SOUSCRITE: "6"},
+            options={CONF_BACKGROUND_SETUP: background_setup},
+            entry_id=f"startup_{len(entries)}",
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        # Réponses de l'API attendues avant la fin de la mise en place
+        awaited_requests.append(hub.metrics.requests - requests_before)
+
+    async def settle():
+        # Chaque tour part d'un état stable : en arrière-plan, l'API ne répond qu'une
+        # fois la mise en place finie, et le premier appel du tour précédent (partagé
+        # par le hub avec cette synchronisation) est terminé avant le tour suivant
+        if tabular_api.hold is not None:
+            tabular_api.hold.set()
+            await hub.async_refresh_rows()
+        await hass.async_block_till_done()
+        if background_setup:
+            tabular_api.hold = asyncio.Event()
+
+    await bench.measure(cold_setup, before=settle)
+    if tabular_api.hold is not None:
+        tabular_api.hold.set()
+    bench.record(
+        api_latency_ms=API_LATENCY * 1000,
+        background_setup=background_setup,
+        awaited_requests=max(awaited_requests),
+    )
+
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    if background_setup:
+        # Seule la création des entités est sur le chemin critique
+        assert awaited_requests == [0] * 5
+    else:
+        assert awaited_requests == [1] * 5
@@ -1,6 +1,13 @@
 """Fixtures for tests."""
+import json
 import pytest
 import threading
+from unittest.mock import MagicMock
+
+from custom_components.edf_tempo_tarifs import hub as hub_module
+
+from tests.tabular_api import TabularApiEmulator
+from tests.tempo_colors import TempoColorStandIn
 
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
@@ -35,3 +42,30 @@ def patch_thread_check(monkeypatch):
     
     monkeypatch.setattr(threading, 'enumerate', patched_enumerate)
     yield
+
+
+def mock_body(payload):
+    """Return the content stream of a mocked aiohttp response, readable again on each call."""
+    body = json.dumps(payload).encode()
+
+    async def iter_chunked(_size):
+        yield body
+
+    return MagicMock(iter_chunked=iter_chunked)
+
+
+@pytest.fixture
+async def tabular_api(socket_enabled):
+    """Start a local emulator of the tabular API."""
+    emulator = TabularApiEmulator()
+    await emulator.start()
+    yield emulator
+    await emulator.close()
+
+
+@pytest.fixture(autouse=True)
+def tempo_colors(monkeypatch):
+    """Serve the Tempo colors locally instead of querying the color API."""
+    stand_in = TempoColorStandIn()
+    monkeypatch.setattr(hub_module, "ApiCouleurTempoProvider", lambda hass: stand_in)
+    return stand_in
@@ -0,0 +1,268 @@
+"""Local emulator of the data.gouv tabular API.
+
+Utilisable comme fixture (tabular_api, voir conftest.py) ou seul :
+
+    python -m tests.tabular_api --port 8080 --revisions 40 --latency 0.2 --fault-rate 0.1
+
+puis pointer le hub dessus (hub.api_url = "http://127.0.0.1:8080" + RESOURCE_PATH).
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+from datetime import date, timedelta
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from custom_components.edf_tempo_tarifs.const import SENSOR_TYPES, VALID_PUISSANCES
+
+RESOURCE_PATH = "/api/resources/0c3d1d36-c412-4620-8566-e5cbb4fa2b5a/data/"
+MAX_PAGE_SIZE = 50
+
+FAULT_LATENCY = "latency"
+FAULT_RATE_LIMIT = "rate_limit"
+FAULT_SERVER_ERROR = "server_error"
+FAULT_UNAVAILABLE = "unavailable"
+FAULT_TRUNCATED = "truncated"
+FAULT_SCHEMA_DRIFT = "schema_drift"
+FAULTS = (
+    FAULT_LATENCY,
+    FAULT_RATE_LIMIT,
+    FAULT_SERVER_ERROR,
+    FAULT_UNAVAILABLE,
+    FAULT_TRUNCATED,
+    FAULT_SCHEMA_DRIFT,
+)
+
+
+def make_row(puissance, date_debut, price=0.15, padding_columns=0):
+    """Build a tariff row as returned by the tabular API."""
+    row = {"__id": 0, "P_SOUSCRITE": puissance, "DATE_DEBUT": date_debut.isoformat()}
+
+    for sensor_key, sensor_info in SENSOR_TYPES.items():
+        if sensor_key == "DATE_DEBUT":
+            continue
+        row[sensor_info["api_field"]] = round(price + puissance / 1000, 6)
+
+    # Colonnes inutilisées pour faire varier la taille de la réponse
+    for index in range(padding_columns):
+        row[f"COLONNE_{index}"] = "x" * 16
+
+    return row
+
+
+def _drift(row):
+    """Return a row whose schema drifted (renamed columns, values as strings)."""
+    return {key.lower(): str(value) for key, value in row.items()}
+
+
+class TabularApiEmulator:
+    """Serve tariff rows with filtering, pagination, latency and fault injection."""
+
+    def __init__(
+        self,
+        revisions=1,
+        latency=0.0,
+        padding_columns=0,
+        fault_rate=0.0,
+        seed=None,
+        start_date=date(2000, 1, 1),
+    ):
+        """Initialize the emulator with a history of revisions for every power."""
+        self.latency = latency
+        self.padding_columns = padding_columns
+        self.fault_rate = fault_rate
+        self.retry_after = 60
+        self.supports_columns = True
+        self.supports_etag = True
+        self.compress = False
+        self.not_modified_count = 0
+        # Événement non levé : les réponses attendent qu'il le soit
+        self.hold = None
+        self.request_count = 0
+        self.requests = []
+        self.rows = []
+        self._faults = []
+        self._random = random.Random(seed)
+        self._next_date = start_date
+        self._server = None
+        self.url = None
+
+        for _ in range(revisions):
+            self.add_revision()
+
+    def add_revision(self, price=None, date_debut=None):
+        """Publish a new tariff revision for every power."""
+        if date_debut is None:
+            date_debut = self._next_date
+        self._next_date = max(self._next_date, date_debut + timedelta(days=1))
+        price = price if price is not None else 0.1 + len(self.rows) / 100000
+
+        for puissance in VALID_PUISSANCES:
+            row = make_row(puissance, date_debut, price, self.padding_columns)
+            row["__id"] = len(self.rows) + 1
+            self.rows.append(row)
+
+        return date_debut
+
+    def csv_body(self):
+        """Return the rows as the CSV file of the resource (";", decimal comma, DD/MM/YYYY)."""
+        columns = [key for key in self.rows[0] if not key.startswith("__")] if self.rows else []
+        lines = [";".join(columns)]
+
+        for row in self.rows:
+            values = []
+            for column in columns:
+                value = row[column]
+                if column == "DATE_DEBUT":
+                    value = date.fromisoformat(value).strftime("%d/%m/%Y")
+                elif isinstance(value, float):
+                    value = str(value).replace(".", ",")
+                values.append(str(value))
+            lines.append(";".join(values))
+
+        return ("\r\n".join(lines) + "\r\n").encode("utf-8-sig")
+
+    def inject(self, *faults):
+        """Apply the given faults, in order, to the next requests."""
+        for fault in faults:
+            if fault not in FAULTS:
+                raise ValueError(f"Unknown fault {fault}")
+        self._faults.extend(faults)
+
+    def _next_fault(self):
+        """Return the fault to apply to the current request, if any."""
+        if self._faults:
+            return self._faults.pop(0)
+        if self.fault_rate and self._random.random() < self.fault_rate:
+            return self._random.choice(FAULTS)
+        return None
+
+    def _select(self, query):
+        """Apply the query operators emitted by the integration."""
+        rows = self.rows
+
+        if "P_SOUSCRITE__exact" in query:
+            rows = [r for r in rows if r["P_SOUSCRITE"] == int(query["P_SOUSCRITE__exact"])]
+        if "P_SOUSCRITE__in" in query:
+            puissances = {int(p) for p in query["P_SOUSCRITE__in"].split(",")}
+            rows = [r for r in rows if r["P_SOUSCRITE"] in puissances]
+        if "DATE_DEBUT__less" in query:
+            rows = [r for r in rows if r["DATE_DEBUT"] <= query["DATE_DEBUT__less"]]
+        if "DATE_DEBUT__strictly_less" in query:
+            rows = [r for r in rows if r["DATE_DEBUT"] < query["DATE_DEBUT__strictly_less"]]
+        if "DATE_DEBUT__greater" in query:
+            rows = [r for r in rows if r["DATE_DEBUT"] >= query["DATE_DEBUT__greater"]]
+        if "DATE_DEBUT__strictly_greater" in query:
+            rows = [r for r in rows if r["DATE_DEBUT"] > query["DATE_DEBUT__strictly_greater"]]
+
+        if (order := query.get("DATE_DEBUT__sort")) in ("asc", "desc"):
+            rows = sorted(rows, key=lambda r: r["DATE_DEBUT"], reverse=order == "desc")
+
+        return rows
+
+    async def handle_data(self, request):
+        """Handle GET on the resource data endpoint."""
+        self.request_count += 1
+        self.requests.append(dict(request.query))
+        fault = self._next_fault()
+
+        if self.hold is not None:
+            await self.hold.wait()
+        if self.latency or fault == FAULT_LATENCY:
+            await asyncio.sleep(self.latency or 1.0)
+
+        if fault == FAULT_RATE_LIMIT:
+            return web.Response(status=429, headers={"Retry-After": str(self.retry_after)})
+        if fault == FAULT_SERVER_ERROR:
+            return web.Response(status=500)
+        if fault == FAULT_UNAVAILABLE:
+            return web.Response(status=503, headers={"Retry-After": str(self.retry_after)})
+
+        rows = self._select(request.query)
+        page_size = min(int(request.query.get("page_size", 20)), MAX_PAGE_SIZE)
+        page = int(request.query.get("page", 1))
+        page_rows = rows[(page - 1) * page_size : page * page_size]
+
+        if self.supports_columns and (columns := request.query.get("columns")):
+            selected = columns.split(",")
+            page_rows = [{c: row[c] for c in selected if c in row} for row in page_rows]
+
+        if fault == FAULT_SCHEMA_DRIFT:
+            page_rows = [_drift(row) for row in page_rows]
+
+        links = {"profile": None, "swagger": None, "next": None, "prev": None}
+        if page * page_size < len(rows):
+            links["next"] = str(request.url.update_query(page=page + 1))
+        if page > 1:
+            links["prev"] = str(request.url.update_query(page=page - 1))
+
+        response = web.json_response(
+            {
+                "data": page_rows,
+                "links": links,
+                "meta": {"page": page, "page_size": page_size, "total": len(rows)},
+            }
+        )
+
+        etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+        if self.supports_etag and fault is None:
+            if request.headers.get("If-None-Match") == etag:
+                self.not_modified_count += 1
+                return web.Response(status=304, headers={"ETag": etag})
+            response.headers["ETag"] = etag
+
+        if self.compress:
+            response.enable_compression()
+
+        if fault == FAULT_TRUNCATED:
+            response = web.Response(
+                body=response.body[: len(response.body) // 2],
+                content_type="application/json",
+            )
+
+        return response
+
+    def make_app(self):
+        """Return the aiohttp application."""
+        app = web.Application()
+        app.router.add_get(RESOURCE_PATH, self.handle_data)
+        return app
+
+    async def start(self):
+        """Start the server on a free local port and return the resource URL."""
+        self._server = TestServer(self.make_app())
+        await self._server.start_server()
+        self.url = str(self._server.make_url(RESOURCE_PATH))
+        return self.url
+
+    async def close(self):
+        """Stop the server."""
+        await self._server.close()
+
+
+def main():
+    """Run the emulator as a standalone server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--revisions", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--padding-columns", type=int, default=0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    emulator = TabularApiEmulator(
+        revisions=args.revisions,
+        latency=args.latency,
+        padding_columns=args.padding_columns,
+        fault_rate=args.fault_rate,
+        seed=args.seed,
+    )
+    web.run_app(emulator.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
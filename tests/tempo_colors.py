@@ -0,0 +1,21 @@
+"""Local stand-in for the Tempo color provider."""
+from custom_components.edf_tempo_tarifs.colors import TempoColorProvider, season_start
+
+
+class TempoColorStandIn(TempoColorProvider):
+    """Serve Tempo colors from a dict, recording every request."""
+
+    def __init__(self, colors=None):
+        """Initialize the stand-in with known colors by day."""
+        self.colors = dict(colors or {})
+        self.requests = []
+
+    async def async_get_color(self, day):
+        """Return the color of a day, or None if not published yet."""
+        self.requests.append(("day", day))
+        return self.colors.get(day)
+
+    async def async_get_season(self, start):
+        """Return the colors of the season starting on a given day."""
+        self.requests.append(("season", start))
+        return {day: color for day, color in self.colors.items() if season_start(day) == start}
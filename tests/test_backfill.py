@@ -0,0 +1,175 @@
+"""Tests for the tariff statistics backfill."""
+import pytest
+from unittest.mock import patch
+from datetime import date, datetime, timedelta
+
+from aiohttp import ClientError
+from homeassistant.components.recorder.models import StatisticMeanType
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.edf_tempo_tarifs import _async_backfill_statistics
+from custom_components.edf_tempo_tarifs import backfill as backfill_module
+from custom_components.edf_tempo_tarifs.backfill import (
+    async_get_backfill,
+    statistic_id,
+    statistic_metadata,
+)
+from custom_components.edf_tempo_tarifs.const import DOMAIN
+from custom_components.edf_tempo_tarifs.exceptions import (
+    EDFTempoTarifsApiError,
+    EDFTempoTarifsPayloadTooLargeError,
+)
+from custom_components.edf_tempo_tarifs.history import TariffHistory
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+from tests.tabular_api import make_row
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_mock, enable_custom_integrations):
+    """Start the recorder before Home Assistant, then enable custom integrations."""
+    yield
+
+
+async def _hcjb_means(hass):
+    """Return the imported hourly means of the HC Bleu price for 6 kVA."""
+    stat_id = statistic_id("HCJB", 6)
+    stats = await hass.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        dt_util.utc_from_timestamp(0),
+        None,
+        {stat_id},
+        "hour",
+        None,
+        {"mean"},
+    )
+    return [row["mean"] for row in stats.get(stat_id, [])]
+
+
+@pytest.mark.asyncio
+async def test_backfill_then_incremental(hass: HomeAssistant, freezer):
+    """Test a complete import, then imports of the missing hours only."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 12, 12, 30, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    hub = async_get_hub(hass)
+    hub._histories = {
+        6: TariffHistory([make_row(6, date(2024, 1, 10), 0.1), make_row(6, date(2024, 1, 11), 0.2)])
+    }
+    hub._history_synced = True
+    backfill = async_get_backfill(hass)
+
+    # 10 janvier 0h -> 12 janvier 12h : 60 heures pour chacun des 6 créneaux
+    assert await backfill.async_backfill(6) == 360
+    await async_wait_recording_done(hass)
+
+    means = await _hcjb_means(hass)
+    assert means == [0.106] * 24 + [0.206] * 36
+
+    # Rien de nouveau : aucun import
+    with patch.object(backfill_module, "async_add_external_statistics") as mock_add:
+        assert await backfill.async_backfill(6) == 0
+        mock_add.assert_not_called()
+
+    freezer.tick(timedelta(hours=3))
+    assert await backfill.async_backfill(6) == 18
+    await async_wait_recording_done(hass)
+
+    assert len(await _hcjb_means(hass)) == 63
+
+
+@pytest.mark.asyncio
+async def test_backfill_in_batches(hass: HomeAssistant, freezer):
+    """Test that long histories are imported in several recorder calls."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 12, 0, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    hub = async_get_hub(hass)
+    hub._histories = {6: TariffHistory([make_row(6, date(2024, 1, 10), 0.1)])}
+    hub._history_synced = True
+
+    with (
+        patch.object(backfill_module, "STATISTICS_BATCH_SIZE", 20),
+        patch.object(backfill_module, "async_add_external_statistics") as mock_add,
+    ):
+        assert await async_get_backfill(hass).async_backfill(6) == 288
+
+    assert [len(call.args[2]) for call in mock_add.call_args_list] == [20, 20, 8] * 6
+    assert mock_add.call_args_list[0].args[1]["statistic_id"] == "edf_tempo_tarifs:hcjb_6kva"
+
+
+@pytest.mark.asyncio
+async def test_import_statistics_service(hass: HomeAssistant, freezer):
+    """Test the import service response."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 11, 0, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    assert await async_setup_component(hass, DOMAIN, {})
+    hub = async_get_hub(hass)
+    hub._histories = {6: TariffHistory([make_row(6, date(2024, 1, 10), 0.1)])}
+    hub._history_synced = True
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "import_statistics",
+        {"puissance_souscrite": 6},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert response == {"imported_hours": {"6": 144}}
+
+
+@pytest.mark.asyncio
+async def test_import_statistics_service_fetch_error(hass: HomeAssistant):
+    """Test that a failed history fetch is reported as a service error."""
+    assert await async_setup_component(hass, DOMAIN, {})
+    error = EDFTempoTarifsPayloadTooLargeError(2048, 1024)
+
+    with patch.object(
+        async_get_hub(hass), "async_get_history", side_effect=error
+    ), pytest.raises(HomeAssistantError) as exc_info:
+        await hass.services.async_call(
+            DOMAIN,
+            "import_statistics",
+            {"puissance_souscrite": 6},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert exc_info.value.translation_key == "history_unavailable"
+    assert exc_info.value.__cause__ is error
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error",
+    [
+        ClientError("connection reset"),
+        TimeoutError(),
+        EDFTempoTarifsPayloadTooLargeError(2048, 1024),
+        EDFTempoTarifsApiError(404),
+    ],
+)
+async def test_backfill_task_logs_fetch_errors(hass: HomeAssistant, caplog, error):
+    """Test that the startup backfill logs a warning instead of failing the task."""
+    with patch.object(
+        async_get_backfill(hass), "async_backfill", side_effect=error
+    ):
+        await _async_backfill_statistics(hass, 6)
+
+    assert "Unable to import EDF Tempo Tarifs statistics" in caplog.text
+    assert caplog.records[-1].levelname == "WARNING"
+
+
+def test_statistic_metadata_mean_type():
+    """Test that the metadata declares an arithmetic mean without unit class."""
+    metadata = statistic_metadata("HCJB", 6)
+
+    assert metadata["mean_type"] is StatisticMeanType.ARITHMETIC
+    assert metadata["unit_class"] is None
+    assert "has_mean" not in metadata
+    assert metadata["has_sum"] is False
+    assert metadata["statistic_id"] == statistic_id("HCJB", 6)
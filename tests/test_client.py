@@ -0,0 +1,77 @@
+"""Tests for the dedicated HTTP client."""
+from multidict import CIMultiDict
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import HomeAssistant
+
+from custom_components.edf_tempo_tarifs.client import (
+    REQUEST_TIMEOUT,
+    ValidatorCache,
+    async_close_session,
+    async_get_session,
+)
+from custom_components.edf_tempo_tarifs.const import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_READ_TIMEOUT,
+)
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+
+async def test_session_shared_and_closed(hass: HomeAssistant):
+    """Test that every fetch path uses one tuned session, closed with Home Assistant."""
+    session = async_get_session(hass)
+    hub = async_get_hub(hass)
+
+    assert hub._session is session
+    assert session.connector.use_dns_cache
+    assert session.connector.limit_per_host == HTTP_POOL_LIMIT_PER_HOST
+    assert session.timeout is REQUEST_TIMEOUT
+    assert REQUEST_TIMEOUT.connect == HTTP_CONNECT_TIMEOUT
+    assert REQUEST_TIMEOUT.sock_read == HTTP_READ_TIMEOUT
+    assert "gzip" in session.headers["Accept-Encoding"]
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert session.closed
+    assert async_get_session(hass) is not session
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+
+async def test_session_closed_on_demand(hass: HomeAssistant):
+    """Test that a closed session is replaced, and no longer closed with Home Assistant."""
+    session = async_get_session(hass)
+
+    await async_close_session(hass)
+    replacement = async_get_session(hass)
+
+    assert session.closed
+    assert replacement is not session
+    assert async_get_hub(hass)._session is replacement
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert replacement.closed
+
+
+def test_validator_cache():
+    """Test the conditional headers and the least recently used eviction."""
+    cache = ValidatorCache(max_entries=2)
+
+    cache.store("a", CIMultiDict(etag='"1"'), {"data": "a"})
+    cache.store("b", CIMultiDict({"Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}), {"data": "b"})
+    cache.store("none", CIMultiDict(), {"data": "none"})
+
+    assert cache.request_headers("a") == {"If-None-Match": '"1"'}
+    assert cache.request_headers("b") == {"If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    assert cache.request_headers("none") == {}
+
+    assert cache.get("a") == {"data": "a"}
+    cache.store("c", CIMultiDict(ETag='"3"'), {"data": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"data": "a"}
+    assert len(cache) == 2
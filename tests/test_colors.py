@@ -0,0 +1,160 @@
+"""Tests for the Tempo day colors."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import date, datetime
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.edf_tempo_tarifs.colors import (
+    ApiCouleurTempoProvider,
+    TempoCalendar,
+    TempoColorProvider,
+    season_start,
+)
+from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
+from custom_components.edf_tempo_tarifs.snapshot import parse_row
+
+
+SEASON_COLORS = {
+    date(2023, 8, 31): "rouge",  # saison précédente
+    date(2023, 11, 20): "rouge",
+    date(2024, 1, 10): "blanc",
+    date(2024, 1, 15): "bleu",
+}
+
+
+def _local(*args):
+    """Build a local datetime."""
+    return datetime(*args, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+def test_season_start():
+    """Test that a season runs from September 1st to August 31st."""
+    assert season_start(date(2024, 1, 15)) == date(2023, 9, 1)
+    assert season_start(date(2024, 8, 31)) == date(2023, 9, 1)
+    assert season_start(date(2024, 9, 1)) == date(2024, 9, 1)
+
+
+def test_provider_must_implement_lookups():
+    """Test that a color source must implement both lookups to be instantiated."""
+
+    class DayOnlyProvider(TempoColorProvider):
+        async def async_get_color(self, day):
+            return "bleu"
+
+    with pytest.raises(TypeError, match="async_get_season"):
+        DayOnlyProvider()
+
+
+def test_calendar_remaining_days():
+    """Test that remaining days only count the current season."""
+    calendar = TempoCalendar(SEASON_COLORS)
+    today = date(2024, 1, 15)
+
+    assert calendar.remaining_days("rouge", today) == 21
+    assert calendar.remaining_days("blanc", today) == 42
+    assert calendar.remaining_days("bleu", today) is None
+
+    calendar.prune(date(2024, 10, 1))
+    assert date(2023, 8, 31) not in calendar
+    assert date(2023, 11, 20) in calendar
+
+    assert TempoCalendar.from_dict(calendar.as_dict()).as_dict() == calendar.as_dict()
+
+
+@pytest.mark.asyncio
+async def test_api_provider(hass: HomeAssistant):
+    """Test the parsing of the color API responses."""
+    provider = ApiCouleurTempoProvider(hass)
+    season = [
+        {"dateJour": "2023-09-01", "codeJour": 1, "periode": "2023-2024"},
+        {"dateJour": "2023-11-20", "codeJour": 3, "periode": "2023-2024"},
+        {"dateJour": "2023-11-21", "codeJour": 0, "periode": "2023-2024"},
+    ]
+
+    with patch.object(provider._session, 'get') as mock_get:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json = AsyncMock(return_value=season)
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        colors = await provider.async_get_season(date(2023, 9, 1))
+
+        assert mock_get.call_args.kwargs["params"] == {"periode": "2023-2024"}
+
+        mock_response.json = AsyncMock(return_value={"dateJour": "2024-01-16", "codeJour": 0})
+        assert await provider.async_get_color(date(2024, 1, 16)) is None
+
+        mock_response.json = AsyncMock(return_value={"dateJour": "2024-01-16", "codeJour": 2})
+        assert await provider.async_get_color(date(2024, 1, 16)) == "blanc"
+        assert mock_get.call_args.args[0].endswith("/jourTempo/2024-01-16")
+
+    assert colors == {date(2023, 9, 1): "bleu", date(2023, 11, 20): "rouge"}
+
+
+@pytest.mark.asyncio
+async def test_hub_fetches_tomorrow_after_publication(hass: HomeAssistant, tempo_colors, freezer):
+    """Test that the season is fetched once, then only the missing J+1 color."""
+    freezer.move_to(dt_util.as_utc(_local(2024, 1, 15, 12, 0)))
+    tempo_colors.colors.update(SEASON_COLORS)
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    hub = coordinator.hub
+    hub._coordinators.add(coordinator)
+    coordinator.async_update_listeners = MagicMock()
+    coordinator.data = MagicMock()
+
+    assert await hub.async_refresh_colors() is True
+    assert tempo_colors.requests == [("season", date(2023, 9, 1)), ("day", date(2024, 1, 16))]
+    assert hub.remaining_days("rouge", date(2024, 1, 15)) == 21
+
+    # Couleur J+1 publiée : seule elle est demandée
+    tempo_colors.requests.clear()
+    tempo_colors.colors[date(2024, 1, 16)] = "rouge"
+
+    assert await hub.async_refresh_colors() is True
+    assert tempo_colors.requests == [("day", date(2024, 1, 16))]
+    assert hub.remaining_days("rouge", date(2024, 1, 15)) == 20
+    assert coordinator.async_update_listeners.call_count == 2
+    assert hub._data_to_store()["colors"]["2024-01-16"] == "rouge"
+
+    # Tout est connu : plus aucune requête
+    tempo_colors.requests.clear()
+    assert await hub.async_refresh_colors() is False
+    assert tempo_colors.requests == []
+
+
+@pytest.mark.asyncio
+async def test_hub_waits_for_publication(hass: HomeAssistant, tempo_colors, freezer):
+    """Test that tomorrow's color is not requested before its publication."""
+    freezer.move_to(dt_util.as_utc(_local(2024, 1, 15, 9, 0)))
+    tempo_colors.colors.update(SEASON_COLORS)
+    hub = EDFTempoTarifsCoordinator(hass, 6).hub
+
+    await hub.async_refresh_colors()
+
+    assert tempo_colors.requests == [("season", date(2023, 9, 1))]
+
+
+@pytest.mark.asyncio
+async def test_coordinator_price_at(hass: HomeAssistant, freezer):
+    """Test that the active price follows the period and the Tempo day."""
+    freezer.move_to(dt_util.as_utc(_local(2024, 1, 15, 12, 0)))
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    coordinator.hub.colors.update({date(2024, 1, 15): "blanc", date(2024, 1, 16): "rouge"})
+    coordinator.data = parse_row(
+        {
+            "PART_VARIABLE_HCBlanc_TTC": 0.1345,
+            "PART_VARIABLE_HPBlanc_TTC": 0.1678,
+            "PART_VARIABLE_HCRouge_TTC": 0.1456,
+            "PART_VARIABLE_HPRouge_TTC": 0.1789,
+        },
+        6,
+    )
+
+    assert coordinator.price_at(_local(2024, 1, 15, 12, 0)) == 0.1678
+    assert coordinator.price_at(_local(2024, 1, 15, 23, 0)) == 0.1345
+    # Avant 6h, la journée Tempo est encore celle de la veille
+    assert coordinator.price_at(_local(2024, 1, 16, 5, 0)) == 0.1345
+    assert coordinator.price_at(_local(2024, 1, 16, 7, 0)) == 0.1789
+    assert coordinator.price_at(_local(2024, 1, 17, 7, 0)) is None
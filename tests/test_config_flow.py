@@ -118,11 +118,48 @@ async def test_options_flow_update_puissance(hass: HomeAssistant):
             user_input={CONF_PUISSANCE_SOUSCRITE: "9"}
         )
         
-        # Should reload when power changes (to update device name)
-        mock_reload.assert_called_once_with(entry.entry_id)
-        # update_puissance should NOT be called because we're reloading
-        mock_coordinator.update_puissance.assert_not_called()
+        # Power changed in place: no reload, the coordinator swaps its data
+        mock_reload.assert_not_called()
+        mock_coordinator.update_puissance.assert_called_once_with(9)
         assert result["type"] == FlowResultType.CREATE_ENTRY
+        assert entry.title == "EDF Tempo Tarifs 9 kVA"
+
+
+@pytest.mark.asyncio
+async def test_options_flow_update_puissance_backfills(hass: HomeAssistant):
+    """Test that a power changed in place imports the statistics of the new power."""
+    hass.config.components.add("recorder")
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={CONF_PUISSANCE_SOUSCRITE: "6"}
+    )
+    entry = result["result"]
+
+    mock_coordinator = MagicMock()
+    mock_coordinator.update_puissance = AsyncMock(return_value=None)
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = mock_coordinator
+
+    with patch(
+        "custom_components.edf_tempo_tarifs._async_backfill_statistics", new_callable=AsyncMock
+    ) as mock_backfill:
+        result = await hass.config_entries.options.async_init(entry.entry_id)
+        await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input={CONF_PUISSANCE_SOUSCRITE: "9"}
+        )
+        await hass.async_block_till_done()
+
+        mock_backfill.assert_awaited_once_with(hass, 9)
+
+        # Même puissance : rien à importer
+        result = await hass.config_entries.options.async_init(entry.entry_id)
+        await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input={CONF_PUISSANCE_SOUSCRITE: "9"}
+        )
+        await hass.async_block_till_done()
+
+        assert mock_backfill.await_count == 1
 
 
 @pytest.mark.asyncio
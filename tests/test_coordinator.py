@@ -5,7 +5,9 @@ from datetime import date
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import UpdateFailed
 
-from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
+from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator, _row_hash
+
+from tests.conftest import mock_body
 
 
 # Marquer tous les tests de ce module pour accepter les tâches en attente
@@ -35,11 +37,11 @@ async def test_fetch_data_success(hass: HomeAssistant, mock_api_response):
     """Test successful data fetch."""
     coordinator = EDFTempoTarifsCoordinator(hass, 6)
     
-    with patch.object(coordinator._session, 'get') as mock_get:
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
         # Mock the async context manager
         mock_response = AsyncMock()
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=mock_api_response)
+        mock_response.content = mock_body(mock_api_response)
         
         mock_get.return_value.__aenter__.return_value = mock_response
         
@@ -48,7 +50,8 @@ async def test_fetch_data_success(hass: HomeAssistant, mock_api_response):
         assert result["DATE_DEBUT"] == date(2024, 1, 1)
         assert result["PART_FIXE_TTC"] == 150.50
         assert result["HCJB"] == 0.1234
-        assert result["puissance_souscrite"] == 6
+        assert result.puissance_souscrite == 6
+        assert coordinator.last_update is not None
 
 
 @pytest.mark.asyncio
@@ -56,10 +59,10 @@ async def test_fetch_data_empty_response(hass: HomeAssistant):
     """Test fetch with empty API response."""
     coordinator = EDFTempoTarifsCoordinator(hass, 6)
     
-    with patch.object(coordinator._session, 'get') as mock_get:
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
         mock_response = AsyncMock()
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value={"data": []})
+        mock_response.content = mock_body({"data": []})
         
         mock_get.return_value.__aenter__.return_value = mock_response
         
@@ -72,7 +75,7 @@ async def test_fetch_data_invalid_status(hass: HomeAssistant):
     """Test fetch with invalid HTTP status."""
     coordinator = EDFTempoTarifsCoordinator(hass, 6)
     
-    with patch.object(coordinator._session, 'get') as mock_get:
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
         mock_response = AsyncMock()
         mock_response.status = 500
         
@@ -97,13 +100,14 @@ async def test_fetch_data_conversion_error(hass: HomeAssistant):
             "PART_VARIABLE_HPBlanc_TTC": None,
             "PART_VARIABLE_HCRouge_TTC": None,
             "PART_VARIABLE_HPRouge_TTC": None,
+            "P_SOUSCRITE": "6"
         }]
     }
     
-    with patch.object(coordinator._session, 'get') as mock_get:
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
         mock_response = AsyncMock()
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=invalid_data)
+        mock_response.content = mock_body(invalid_data)
         
         mock_get.return_value.__aenter__.return_value = mock_response
         
@@ -127,13 +131,14 @@ async def test_fetch_data_partial_conversion_error(hass: HomeAssistant):
             "PART_VARIABLE_HPBlanc_TTC": 0.1678,
             "PART_VARIABLE_HCRouge_TTC": 0.1456,
             "PART_VARIABLE_HPRouge_TTC": 0.1789,
+            "P_SOUSCRITE": "6"
         }]
     }
     
-    with patch.object(coordinator._session, 'get') as mock_get:
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
         mock_response = AsyncMock()
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=partial_data)
+        mock_response.content = mock_body(partial_data)
         
         mock_get.return_value.__aenter__.return_value = mock_response
         
@@ -146,19 +151,87 @@ async def test_fetch_data_partial_conversion_error(hass: HomeAssistant):
 
 @pytest.mark.asyncio
 async def test_update_interval_reset_on_success(hass: HomeAssistant, mock_api_response):
-    """Test that update interval resets after successful fetch."""
-    from custom_components.edf_tempo_tarifs.const import UPDATE_INTERVAL, RETRY_INTERVAL
+    """Test that update interval follows the scheduler after successful fetch."""
+    from custom_components.edf_tempo_tarifs.const import RETRY_INTERVAL, SPARSE_UPDATE_INTERVAL
     
     coordinator = EDFTempoTarifsCoordinator(hass, 6)
     coordinator.update_interval = RETRY_INTERVAL  # Simulate retry state
     
-    with patch.object(coordinator._session, 'get') as mock_get:
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
         mock_response = AsyncMock()
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value=mock_api_response)
+        mock_response.content = mock_body(mock_api_response)
         
         mock_get.return_value.__aenter__.return_value = mock_response
         
         await coordinator._async_update_data_logic()
         
-        assert coordinator.update_interval == UPDATE_INTERVAL
+        assert coordinator.update_interval != RETRY_INTERVAL
+        assert coordinator.update_interval <= SPARSE_UPDATE_INTERVAL
+        assert coordinator.next_planned_fetch is not None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_row_does_not_notify_listeners(hass: HomeAssistant, mock_api_response):
+    """Test that a refresh returning the same row content skips the listeners."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    listener = MagicMock()
+    coordinator.async_add_listener(listener)
+
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.content = mock_body(mock_api_response)
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        await coordinator.async_refresh()
+        assert listener.call_count == 1
+        last_update = coordinator.last_update
+
+        # Nouvelle synchronisation complète : nouvel objet, même contenu
+        coordinator.hub._histories.clear()
+        coordinator.hub._fetched_at = None
+        await coordinator.async_refresh()
+
+        assert mock_get.call_count == 2
+
+    assert listener.call_count == 1
+    assert coordinator.last_update == last_update
+    assert coordinator.last_checked >= last_update
+
+
+def test_row_hash_with_drifted_values(mock_api_response):
+    """Test that list or dict values do not break the row comparison."""
+    row = mock_api_response["data"][0]
+    drifted = {**row, "PART_VARIABLE_HPRouge_TTC": [0.1789], "PART_FIXE_TTC": {"value": 150.5}}
+
+    assert _row_hash(drifted) == _row_hash(dict(reversed(drifted.items())))
+    assert _row_hash(drifted) != _row_hash(row)
+    # Colonnes sans effet sur l'instantané ignorées
+    assert _row_hash({**row, "COMMENTAIRE": ["x"]}) == _row_hash(row)
+
+
+@pytest.mark.asyncio
+async def test_update_puissance_uses_cached_row(hass: HomeAssistant, mock_api_response):
+    """Test that a power change swaps the data in place from the rows already fetched."""
+    row_9 = {**mock_api_response["data"][0], "P_SOUSCRITE": "9", "PART_FIXE_TTC": 190.0}
+    mock_api_response["data"].append(row_9)
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    listener = MagicMock()
+    coordinator.async_add_listener(listener)
+
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.content = mock_body(mock_api_response)
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        await coordinator.async_refresh()
+        await coordinator.update_puissance(9)
+
+        assert mock_get.call_count == 1
+
+    assert listener.call_count == 2
+    assert coordinator.puissance_souscrite == 9
+    assert coordinator.data.puissance_souscrite == 9
+    assert coordinator.data["PART_FIXE_TTC"] == 190.0
@@ -0,0 +1,456 @@
+"""Tests for the cost engine."""
+import pytest
+from unittest.mock import patch
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from homeassistant.components.recorder.statistics import async_import_statistics
+from aiohttp import ClientError
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.edf_tempo_tarifs import cost as cost_module
+from custom_components.edf_tempo_tarifs.const import CONF_PUISSANCE_SOUSCRITE, DOMAIN
+from custom_components.edf_tempo_tarifs.cost import (
+    async_get_cost_engine,
+    compare_costs,
+    complete_days,
+    compute_costs,
+    power_tables,
+    price_matrix,
+)
+from custom_components.edf_tempo_tarifs.history import TariffHistory
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+ROW = {
+    "DATE_DEBUT": "2024-01-01",
+    "P_SOUSCRITE": 6,
+    "PART_VARIABLE_HCBleu_TTC": 0.1,
+    "PART_VARIABLE_HPBleu_TTC": 0.2,
+    "PART_VARIABLE_HCBlanc_TTC": 0.3,
+    "PART_VARIABLE_HPBlanc_TTC": 0.4,
+    "PART_VARIABLE_HCRouge_TTC": 0.5,
+    "PART_VARIABLE_HPRouge_TTC": 0.6,
+}
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_mock, enable_custom_integrations):
+    """Start the recorder before Home Assistant, then enable custom integrations."""
+    yield
+
+
+def _hours(first_day, count):
+    """Return the POSIX start of each local hour from a given day."""
+    start = dt_util.start_of_local_day(first_day)
+    return np.array([(start + timedelta(hours=h)).timestamp() for h in range(count)])
+
+
+def test_compute_costs():
+    """Test the mapping of hours to period, Tempo day and color."""
+    revision_ordinals, prices = price_matrix([ROW])
+    # Couleurs depuis la veille : 14 bleu, 15 blanc, 16 rouge
+    colors = np.array([0, 1, 2])
+
+    costs, energy, unpriced = compute_costs(
+        _hours(date(2024, 1, 15), 48),
+        np.ones(48),
+        date(2024, 1, 15),
+        2,
+        colors,
+        revision_ordinals,
+        prices,
+    )
+
+    # 15 : 6h HC bleu + 16h HP blanc + 2h HC blanc ; 16 : 6h HC blanc + 16h HP rouge + 2h HC rouge
+    np.testing.assert_allclose(costs, [0.6 + 6.4 + 0.6, 1.8 + 9.6 + 1.0])
+    np.testing.assert_allclose(energy, [24, 24])
+    np.testing.assert_allclose(unpriced, [0, 0])
+
+
+def test_compute_costs_unpriced_hours():
+    """Test that hours without a color or a tariff are reported apart."""
+    revision_ordinals, prices = price_matrix([{**ROW, "DATE_DEBUT": "2024-01-16"}])
+
+    costs, _, unpriced = compute_costs(
+        _hours(date(2024, 1, 15), 48),
+        np.full(48, 2.0),
+        date(2024, 1, 15),
+        2,
+        np.array([-1, 1, -1]),
+        revision_ordinals,
+        prices,
+    )
+
+    # Aucun tarif le 15 ; le 16, seules les heures de 0h à 6h (blanc) ont une couleur
+    np.testing.assert_allclose(costs, [0, 6 * 2 * 0.3])
+    np.testing.assert_allclose(unpriced, [48, 36])
+
+
+@pytest.mark.asyncio
+async def test_calculate_cost_service(hass: HomeAssistant, freezer):
+    """Test the service against recorder statistics, then from the cache."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 20, 12, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    hub = async_get_hub(hass)
+    hub._histories = {6: TariffHistory([ROW])}
+    hub._history_synced = True
+    hub.colors.update({date(2024, 1, 14): "bleu", date(2024, 1, 15): "blanc", date(2024, 1, 16): "rouge"})
+
+    start = dt_util.start_of_local_day(date(2024, 1, 15))
+    async_import_statistics(
+        hass,
+        {
+            "has_mean": False,
+            "has_sum": True,
+            "name": None,
+            "source": "recorder",
+            "statistic_id": "sensor.energie",
+            "unit_of_measurement": "kWh",
+        },
+        [
+            {"start": start + timedelta(hours=h), "state": h + 1.0, "sum": h + 1.0}
+            for h in range(48)
+        ],
+    )
+    await async_wait_recording_done(hass)
+
+    data = {
+        "statistic_id": "sensor.energie",
+        "start": "2024-01-15",
+        "end": "2024-01-16",
+        CONF_PUISSANCE_SOUSCRITE: 6,
+    }
+
+    with patch.object(
+        cost_module, "statistics_during_period", wraps=cost_module.statistics_during_period
+    ) as mock_stats:
+        response = await hass.services.async_call(
+            DOMAIN, "calculate_cost", data, blocking=True, return_response=True
+        )
+        cached = await hass.services.async_call(
+            DOMAIN, "calculate_cost", data, blocking=True, return_response=True
+        )
+
+        # Jours terminés et valorisés : la seconde demande ne relit pas les statistiques
+        assert mock_stats.call_count == 1
+
+    assert response == cached
+    assert response["puissance_souscrite"] == 6
+    assert response["energy_kwh"] == 48
+    assert response["unpriced_energy_kwh"] == 0
+    assert [day["cost"] for day in response["days"]] == [7.6, 12.4]
+    assert response["months"] == [{"month": "2024-01", "cost": 20.0, "energy_kwh": 48}]
+
+
+@pytest.mark.asyncio
+async def test_calculate_cost_fetch_error(hass: HomeAssistant):
+    """Test that a failed history fetch is reported as a service error."""
+    assert await async_setup_component(hass, DOMAIN, {})
+    error = ClientError("connection reset")
+    data = {"statistic_id": "sensor.energie", "start": "2024-01-15", CONF_PUISSANCE_SOUSCRITE: 6}
+
+    with patch.object(
+        async_get_hub(hass), "async_get_history", side_effect=error
+    ), pytest.raises(HomeAssistantError) as exc_info:
+        await hass.services.async_call(
+            DOMAIN, "calculate_cost", data, blocking=True, return_response=True
+        )
+
+    assert exc_info.value.translation_key == "history_unavailable"
+    assert exc_info.value.__cause__ is error
+
+
+def test_compare_costs():
+    """Test the cost of one consumption for several powers in one pass."""
+    histories = {
+        6: TariffHistory([{**ROW, "PART_FIXE_TTC": 365.0}]),
+        9: TariffHistory(
+            [
+                {**ROW, "P_SOUSCRITE": 9, "PART_FIXE_TTC": 730.0},
+                # Révision le 16 : tous les prix du 9 kVA augmentent de 0,1
+                {
+                    **{key: value + 0.1 for key, value in ROW.items() if key.startswith("PART")},
+                    "DATE_DEBUT": "2024-01-16",
+                    "P_SOUSCRITE": 9,
+                    "PART_FIXE_TTC": 730.0,
+                },
+            ]
+        ),
+    }
+    revision_ordinals, prices, fixed = power_tables(histories, (6, 9))
+    peaks = np.array([3.0, 7.5, 5.0])
+
+    variable, fixed_cost, hours_over, unpriced = compare_costs(
+        _hours(date(2024, 1, 15), 48),
+        np.ones(48),
+        peaks,
+        date(2024, 1, 15),
+        2,
+        np.array([0, 1, 2]),
+        revision_ordinals,
+        prices,
+        fixed,
+        (6, 9),
+    )
+
+    np.testing.assert_allclose(variable, [20.0, 20.0 + 24 * 0.1])
+    np.testing.assert_allclose(fixed_cost, [2.0, 4.0])
+    assert hours_over.tolist() == [1, 0]
+    assert unpriced == 0
+
+
+@pytest.mark.asyncio
+async def test_compare_puissances_fetch_error(hass: HomeAssistant):
+    """Test that a failed history fetch is reported as a service error."""
+    assert await async_setup_component(hass, DOMAIN, {})
+    error = TimeoutError()
+
+    with patch.object(
+        async_get_hub(hass), "async_get_history", side_effect=error
+    ), pytest.raises(HomeAssistantError) as exc_info:
+        await hass.services.async_call(
+            DOMAIN,
+            "compare_puissances",
+            {"statistic_id": "sensor.energie", "start": "2024-01-15", "end": "2024-01-16"},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert exc_info.value.translation_key == "history_unavailable"
+    assert exc_info.value.__cause__ is error
+
+
+@pytest.mark.asyncio
+async def test_compare_puissances_service(hass: HomeAssistant, freezer):
+    """Test the ranking of the powers from recorder statistics."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 20, 12, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    hub = async_get_hub(hass)
+    hub._histories = {
+        p: TariffHistory([{**ROW, "P_SOUSCRITE": p, "PART_FIXE_TTC": 100.0 * p}])
+        for p in (6, 9, 12, 15, 18, 30, 36)
+    }
+    hub._history_synced = True
+    hub.colors.update({date(2024, 1, 14): "bleu", date(2024, 1, 15): "blanc", date(2024, 1, 16): "rouge"})
+
+    start = dt_util.start_of_local_day(date(2024, 1, 15))
+    async_import_statistics(
+        hass,
+        {
+            "has_mean": False,
+            "has_sum": True,
+            "name": None,
+            "source": "recorder",
+            "statistic_id": "sensor.energie",
+            "unit_of_measurement": "kWh",
+        },
+        [
+            {"start": start + timedelta(hours=h), "state": h + 1.0, "sum": h + 1.0}
+            for h in range(48)
+        ],
+    )
+    async_import_statistics(
+        hass,
+        {
+            "has_mean": True,
+            "has_sum": False,
+            "name": None,
+            "source": "recorder",
+            "statistic_id": "sensor.puissance",
+            "unit_of_measurement": "VA",
+        },
+        [
+            {"start": start + timedelta(hours=h), "mean": 2000.0, "min": 0.0, "max": 7000.0 if h == 20 else 3000.0}
+            for h in range(48)
+        ],
+    )
+    await async_wait_recording_done(hass)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "compare_puissances",
+        {
+            "statistic_id": "sensor.energie",
+            "peak_statistic_id": "sensor.puissance",
+            "start": "2024-01-15",
+            "end": "2024-01-16",
+        },
+        blocking=True,
+        return_response=True,
+    )
+
+    ranking = [entry["puissance_souscrite"] for entry in response["puissances"]]
+    # 6 kVA est dépassé une heure : classé après les autres malgré son prix
+    assert ranking == [9, 12, 15, 18, 30, 36, 6]
+    assert response["puissances"][0] == {
+        "puissance_souscrite": 9,
+        "total_cost": round(20.0 + 2 * 900.0 / 365, 2),
+        "fixed_cost": round(2 * 900.0 / 365, 2),
+        "variable_cost": 20.0,
+        "hours_over_capacity": 0,
+    }
+    assert response["puissances"][-1]["hours_over_capacity"] == 1
+    assert response["energy_kwh"] == 48
+
+
+def _import_energy(hass, first_day, hours=48):
+    """Import an hourly energy statistic, 1 kWh more each hour, from a given day."""
+    start = dt_util.start_of_local_day(first_day)
+    async_import_statistics(
+        hass,
+        {
+            "has_mean": False,
+            "has_sum": True,
+            "name": None,
+            "source": "recorder",
+            "statistic_id": "sensor.energie",
+            "unit_of_measurement": "kWh",
+        },
+        [
+            {"start": start + timedelta(hours=h), "state": h + 1.0, "sum": h + 1.0}
+            for h in range(hours)
+        ],
+    )
+
+
+def test_complete_days(monkeypatch):
+    """Test that a day is complete once every local hour, DST included, has a row."""
+    monkeypatch.setattr(dt_util, "DEFAULT_TIME_ZONE", dt_util.get_time_zone("Europe/Paris"))
+    starts = _hours(date(2024, 3, 30), 47)
+
+    # 30 mars : 24 heures ; 31 mars (passage à l'heure d'été) : 23 heures
+    np.testing.assert_array_equal(complete_days(starts, date(2024, 3, 30), 2), [True, True])
+    np.testing.assert_array_equal(
+        complete_days(starts[:-1], date(2024, 3, 30), 2), [True, False]
+    )
+
+
+@pytest.mark.asyncio
+async def test_calculate_cost_truncated_day(hass: HomeAssistant, freezer):
+    """Test that a day whose last hour is not compiled yet is computed again later."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 17, 0, 5, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    hub = async_get_hub(hass)
+    hub._histories = {6: TariffHistory([ROW])}
+    hub._history_synced = True
+    hub.colors.update({date(2024, 1, 14): "bleu", date(2024, 1, 15): "blanc", date(2024, 1, 16): "rouge"})
+
+    # 23h du 16 pas encore compilée juste après minuit
+    _import_energy(hass, date(2024, 1, 15), hours=47)
+    await async_wait_recording_done(hass)
+
+    data = {
+        "statistic_id": "sensor.energie",
+        "start": "2024-01-15",
+        "end": "2024-01-16",
+        CONF_PUISSANCE_SOUSCRITE: 6,
+    }
+    first = await hass.services.async_call(
+        DOMAIN, "calculate_cost", data, blocking=True, return_response=True
+    )
+
+    start = dt_util.start_of_local_day(date(2024, 1, 15))
+    async_import_statistics(
+        hass,
+        {
+            "has_mean": False,
+            "has_sum": True,
+            "name": None,
+            "source": "recorder",
+            "statistic_id": "sensor.energie",
+            "unit_of_measurement": "kWh",
+        },
+        [{"start": start + timedelta(hours=47), "state": 48.0, "sum": 48.0}],
+    )
+    await async_wait_recording_done(hass)
+
+    second = await hass.services.async_call(
+        DOMAIN, "calculate_cost", data, blocking=True, return_response=True
+    )
+
+    assert [day["cost"] for day in first["days"]] == [7.6, 11.9]
+    assert [day["cost"] for day in second["days"]] == [7.6, 12.4]
+    assert second["energy_kwh"] == 48
+
+
+@pytest.mark.asyncio
+async def test_calculate_cost_past_season(hass: HomeAssistant, freezer, tempo_colors):
+    """Test that the colors of a season the hub no longer keeps are fetched once."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 20, 12, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    hub = async_get_hub(hass)
+    hub._histories = {6: TariffHistory([{**ROW, "DATE_DEBUT": "2021-08-01"}])}
+    hub._history_synced = True
+    assert len(hub.colors) == 0
+    tempo_colors.colors.update(
+        {date(2022, 1, 14): "bleu", date(2022, 1, 15): "blanc", date(2022, 1, 16): "rouge"}
+    )
+
+    _import_energy(hass, date(2022, 1, 15))
+    await async_wait_recording_done(hass)
+
+    data = {
+        "statistic_id": "sensor.energie",
+        "start": "2022-01-15",
+        "end": "2022-01-16",
+        CONF_PUISSANCE_SOUSCRITE: 6,
+    }
+    response = await hass.services.async_call(
+        DOMAIN, "calculate_cost", data, blocking=True, return_response=True
+    )
+
+    assert response["unpriced_energy_kwh"] == 0
+    assert [day["cost"] for day in response["days"]] == [7.6, 12.4]
+    assert tempo_colors.requests == [("season", date(2021, 9, 1))]
+    # Couleurs gardées par le moteur, sans toucher au calendrier élagué du hub
+    assert len(hub.colors) == 0
+
+    await async_get_cost_engine(hass)._async_colors(date(2022, 1, 15), 2)
+    assert len(tempo_colors.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_compare_puissances_past_season(hass: HomeAssistant, freezer, tempo_colors):
+    """Test that powers are ranked on fully priced hours outside the current season."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 20, 12, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    hub = async_get_hub(hass)
+    hub._histories = {
+        p: TariffHistory(
+            [{**ROW, "DATE_DEBUT": "2021-08-01", "P_SOUSCRITE": p, "PART_FIXE_TTC": 100.0 * p}]
+        )
+        for p in (6, 9, 12, 15, 18, 30, 36)
+    }
+    hub._history_synced = True
+    tempo_colors.colors.update(
+        {date(2022, 1, 14): "bleu", date(2022, 1, 15): "blanc", date(2022, 1, 16): "rouge"}
+    )
+
+    _import_energy(hass, date(2022, 1, 15))
+    await async_wait_recording_done(hass)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "compare_puissances",
+        {"statistic_id": "sensor.energie", "start": "2022-01-15", "end": "2022-01-16"},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert response["unpriced_energy_kwh"] == 0
+    assert [entry["puissance_souscrite"] for entry in response["puissances"]] == [
+        6, 9, 12, 15, 18, 30, 36
+    ]
+    assert response["puissances"][0]["variable_cost"] == 20.0
+    assert tempo_colors.requests == [("season", date(2021, 9, 1))]
@@ -0,0 +1,110 @@
+"""Tests for the streaming CSV history backend."""
+from datetime import date
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from homeassistant.core import HomeAssistant
+
+from custom_components.edf_tempo_tarifs.csv_history import iter_csv_rows, iter_lines
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+from tests.tabular_api import TabularApiEmulator
+
+
+async def _chunks(body, size):
+    """Yield a body in chunks of the given size."""
+    for index in range(0, len(body), size):
+        yield body[index : index + size]
+
+
+async def _collect(iterator):
+    """Return the items of an async iterator."""
+    return [item async for item in iterator]
+
+
+@pytest.fixture
+async def file_server(socket_enabled, tmp_path):
+    """Serve the files of a temporary directory over HTTP."""
+    app = web.Application()
+    app.router.add_static("/files/", tmp_path)
+    server = TestServer(app)
+    await server.start_server()
+    yield lambda name: str(server.make_url(f"/files/{name}"))
+    await server.close()
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+async def test_iter_lines_across_chunks(size):
+    """Test that lines, CRLF and multi-byte characters split between chunks are rebuilt."""
+    body = "﻿P_SOUSCRITE;LIBELLÉ\r\n6;été\r\n9;hiver".encode()
+
+    lines = await _collect(iter_lines(_chunks(body, size)))
+
+    assert lines == ["P_SOUSCRITE;LIBELLÉ", "6;été", "9;hiver"]
+
+
+async def test_iter_csv_rows_converts_and_filters():
+    """Test conversion to API values, column projection and the power filter."""
+    body = (
+        b"DATE_DEBUT;DATE_FIN;P_SOUSCRITE;PART_FIXE_TTC;COMMENTAIRE\n"
+        b'01/02/2024;;6;15,72;"ligne\n sur deux"\n'
+        b"2024-02-01;;3;9,5;\n"
+        b"\n"
+        b"01/02/2024;;9;19,70;\n"
+    )
+
+    rows = await _collect(iter_csv_rows(_chunks(body, 5), [6, 9]))
+
+    assert rows == [
+        {"P_SOUSCRITE": 6, "DATE_DEBUT": "2024-02-01", "PART_FIXE_TTC": 15.72},
+        {"P_SOUSCRITE": 9, "DATE_DEBUT": "2024-02-01", "PART_FIXE_TTC": 19.7},
+    ]
+
+
+async def test_iter_csv_rows_comma_separated():
+    """Test a comma separated file with ISO dates."""
+    body = b"P_SOUSCRITE,DATE_DEBUT,PART_FIXE_TTC\n6,2024-02-01,15.72\n"
+
+    rows = await _collect(iter_csv_rows(_chunks(body, 64), [6]))
+
+    assert rows == [{"P_SOUSCRITE": 6, "DATE_DEBUT": "2024-02-01", "PART_FIXE_TTC": 15.72}]
+
+
+async def test_iter_csv_rows_missing_columns():
+    """Test that a file without the power or date column is rejected."""
+    with pytest.raises(ValueError, match="P_SOUSCRITE"):
+        await _collect(iter_csv_rows(_chunks(b"DATE_DEBUT;PRIX\n01/02/2024;1\n", 64), [6]))
+
+
+async def test_history_streamed_from_file(hass: HomeAssistant, file_server, tmp_path):
+    """Test that the hub builds the same history from the CSV file as from the API."""
+    emulator = TabularApiEmulator(revisions=30)
+    (tmp_path / "tarifs.csv").write_bytes(emulator.csv_body())
+    hub = async_get_hub(hass)
+    hub.csv_url = file_server("tarifs.csv")
+    hub.api_url = "http://127.0.0.1:1/unused"
+
+    history = await hub.async_get_history(9)
+
+    assert len(history) == 30
+    expected = {
+        key: value
+        for key, value in emulator.rows[-6].items()
+        if not key.startswith("__")
+    }
+    assert expected["P_SOUSCRITE"] == 9
+    assert history.at(date(2099, 1, 1)) == expected
+    assert hub.metrics.payload_bytes == len(emulator.csv_body())
+
+
+async def test_history_falls_back_to_api(hass: HomeAssistant, file_server, tabular_api):
+    """Test that the history is paged through the API when the file is missing."""
+    hub = async_get_hub(hass)
+    hub.csv_url = file_server("absent.csv")
+    hub.api_url = tabular_api.url
+
+    history = await hub.async_get_history(6)
+
+    assert len(history) == 1
+    assert tabular_api.request_count == 1
@@ -0,0 +1,73 @@
+"""Tests for the decoding of tabular API responses."""
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.edf_tempo_tarifs.client import async_get_session
+from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
+from custom_components.edf_tempo_tarifs.decoding import (
+    JSON_BACKEND,
+    JSON_DECODERS,
+    decode_page,
+    read_body,
+)
+from custom_components.edf_tempo_tarifs.exceptions import EDFTempoTarifsPayloadTooLargeError
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+
+@pytest.mark.parametrize("backend", list(JSON_DECODERS))
+def test_decode_page(backend):
+    """Test that every available decoder returns the same normalized envelope."""
+    loads = JSON_DECODERS[backend]
+    body = b'{"data": [{"P_SOUSCRITE": 6, "PART_FIXE_TTC": 15.72}], "links": {"next": null}}'
+
+    assert decode_page(body, loads) == {
+        "data": [{"P_SOUSCRITE": 6, "PART_FIXE_TTC": 15.72}],
+        "links": {"next": None},
+        "meta": {},
+    }
+    assert decode_page(b'{"data": {"P_SOUSCRITE": 6}, "links": []}', loads)["data"] == []
+
+    with pytest.raises(ValueError):
+        decode_page(b"[]", loads)
+    with pytest.raises(ValueError):
+        decode_page(b'{"data": [', loads)
+
+
+def test_stdlib_fallback():
+    """Test that the standard library decoder is always available, last."""
+    assert list(JSON_DECODERS)[-1] == "json"
+    assert JSON_BACKEND == next(iter(JSON_DECODERS))
+
+
+async def test_body_size_limit(hass: HomeAssistant, tabular_api):
+    """Test that announced and streamed bodies larger than the limit are refused."""
+    session = async_get_session(hass)
+
+    async with session.get(tabular_api.url) as response:
+        with pytest.raises(EDFTempoTarifsPayloadTooLargeError, match="exceeds 100 bytes"):
+            await read_body(response, max_bytes=100)
+
+    async def iter_chunked(_size):
+        for _ in range(10):
+            yield b"x" * 20
+
+    chunked = MagicMock(content_length=None, content=MagicMock(iter_chunked=iter_chunked))
+
+    with pytest.raises(EDFTempoTarifsPayloadTooLargeError, match="40 bytes exceeds 30 bytes"):
+        await read_body(chunked, max_bytes=30)
+    assert await read_body(chunked, max_bytes=200) == b"x" * 200
+
+
+async def test_oversized_page_fails_update(hass: HomeAssistant, tabular_api, monkeypatch):
+    """Test that an oversized page fails the update as invalid data."""
+    async_get_hub(hass).api_url = tabular_api.url
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    monkeypatch.setattr("custom_components.edf_tempo_tarifs.decoding.API_MAX_BODY_SIZE", 100)
+
+    with pytest.raises(UpdateFailed, match="exceeds 100 bytes"):
+        await coordinator._async_update_data_logic()
+
+    assert coordinator.hub.retry_policy.last_error == "invalid_data"
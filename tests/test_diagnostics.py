@@ -0,0 +1,92 @@
+"""Tests for the diagnostics and performance metrics."""
+import pytest
+from unittest.mock import MagicMock, patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.edf_tempo_tarifs.const import (
+    CACHE_HIT_RATIO_KEY,
+    CONF_PUISSANCE_SOUSCRITE,
+    DOMAIN,
+    REFRESH_DURATION_KEY,
+)
+from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
+from custom_components.edf_tempo_tarifs.diagnostics import async_get_config_entry_diagnostics
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+from custom_components.edf_tempo_tarifs.sensor import EDFTempoTarifsDiagnosticSensor
+
+
+@pytest.fixture
+async def entry(hass: HomeAssistant, tabular_api):
+    """Set up a 6 kVA entry against the emulator."""
+    tabular_api.add_revision(price=0.2)
+    async_get_hub(hass).api_url = tabular_api.url
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={CONF_PUISSANCE_SOUSCRITE: "6"}, entry_id="entry"
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    yield entry
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_diagnostics(hass: HomeAssistant, entry):
+    """Test the timings and state reported by the diagnostics."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    # Second rafraîchissement servi par le cache du hub
+    await coordinator.async_refresh()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["coordinator"]["puissance_souscrite"] == 6
+    assert diagnostics["coordinator"]["data"]["DATE_DEBUT"] == "2000-01-02"
+    assert diagnostics["coordinator"]["metrics"]["refreshes"] == 2
+    assert diagnostics["coordinator"]["metrics"]["parse_ms"] is not None
+
+    api = diagnostics["hub"]["metrics"]
+    assert api["requests"] == 1
+    assert api["payload_bytes"] > 0
+    assert api["http_ms"] > 0
+    assert api["cache_hit_ratio"] == 0.5
+    assert diagnostics["hub"]["retry_policy"]["attempts"] == 0
+    assert diagnostics["hub"]["circuit_breaker"]["state"] == "closed"
+
+
+async def test_diagnostic_sensors_disabled_by_default(hass: HomeAssistant, entry):
+    """Test that the diagnostic sensors are registered but disabled."""
+    registry = er.async_get(hass)
+    entity_id = registry.async_get_entity_id("sensor", DOMAIN, "entry_REFRESH_DURATION")
+
+    assert registry.async_get(entity_id).disabled_by is er.RegistryEntryDisabler.INTEGRATION
+    assert hass.states.get(entity_id) is None
+
+
+async def test_diagnostic_sensor_follows_every_refresh(hass: HomeAssistant):
+    """Test that the diagnostic sensors are written after each refresh attempt."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    coordinator.hub.metrics.cache_hits = 3
+    coordinator.hub.metrics.cache_misses = 1
+    ratio = EDFTempoTarifsDiagnosticSensor(coordinator, CACHE_HIT_RATIO_KEY, "entry")
+    duration = EDFTempoTarifsDiagnosticSensor(coordinator, REFRESH_DURATION_KEY, "entry")
+    duration.hass = hass
+    duration.entity_id = "sensor.duree_du_dernier_rafraichissement"
+    duration.async_write_ha_state = MagicMock()
+    await duration.async_added_to_hass()
+
+    assert ratio.native_value == 75
+    assert ratio.extra_state_attributes == {"cache_hits": 3, "cache_misses": 1}
+
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.side_effect = TimeoutError
+        await coordinator.async_refresh()
+
+    assert duration.async_write_ha_state.call_count == 1
+    assert duration.available is True
+    assert duration.native_value is not None
+    assert duration.extra_state_attributes["failures"] == 1
+    assert duration.extra_state_attributes["retry"]["last_error"] == "network"
+
+    await duration.async_will_remove_from_hass()
@@ -0,0 +1,165 @@
+"""Tests against the local tabular API emulator."""
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from custom_components.edf_tempo_tarifs.const import API_COLUMNS, HISTORY_FIELDS, get_api_params
+from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+from tests.tabular_api import FAULT_RATE_LIMIT, FAULT_SCHEMA_DRIFT, FAULT_TRUNCATED
+
+
+@pytest.fixture
+async def coordinator(hass: HomeAssistant, tabular_api):
+    """Return a coordinator pointed at the emulator."""
+    async_get_hub(hass).api_url = tabular_api.url
+    return EDFTempoTarifsCoordinator(hass, 6)
+
+
+async def test_emulator_single_power_query(hass: HomeAssistant, tabular_api):
+    """Test the operators emitted by get_api_params."""
+    tabular_api.add_revision(price=0.2)
+    tabular_api.add_revision(price=0.3, date_debut=date(2099, 1, 1))
+    session = async_get_clientsession(hass)
+
+    async with session.get(tabular_api.url, params=get_api_params(9)) as response:
+        data = await response.json()
+
+    assert len(data["data"]) == 1
+    assert data["data"][0]["P_SOUSCRITE"] == 9
+    assert data["data"][0]["DATE_DEBUT"] == "2000-01-02"
+    assert data["meta"]["total"] == 2
+
+
+async def test_latest_rows_from_emulator(hass: HomeAssistant, tabular_api, coordinator):
+    """Test a first refresh against the emulator."""
+    tabular_api.add_revision(price=0.2)
+
+    data = await coordinator._fetch_data()
+
+    assert data["DATE_DEBUT"] == date(2000, 1, 2)
+    assert tabular_api.request_count == 1
+
+
+async def test_history_paged_through(hass: HomeAssistant, tabular_api, coordinator):
+    """Test that the history sync follows links.next over several pages."""
+    for _ in range(19):
+        tabular_api.add_revision()
+
+    history = await coordinator.hub.async_get_history(6)
+
+    assert len(history) == 20
+    # 20 révisions x 7 puissances = 140 lignes, soit 3 pages de 50
+    assert tabular_api.request_count == 3
+    assert tabular_api.requests[-1]["page"] == "3"
+
+
+async def test_rate_limited_by_emulator(hass: HomeAssistant, tabular_api, coordinator):
+    """Test that a 429 from the emulator backs off until Retry-After."""
+    tabular_api.retry_after = 600
+    tabular_api.inject(FAULT_RATE_LIMIT)
+
+    with pytest.raises(UpdateFailed, match="429"):
+        await coordinator._async_update_data_logic()
+
+    hub = coordinator.hub
+    assert hub.retry_policy.last_error == "rate_limited"
+    assert hub.retry_policy.retry_at >= dt_util.utcnow() + timedelta(seconds=590)
+
+
+async def test_truncated_json_from_emulator(hass: HomeAssistant, tabular_api, coordinator):
+    """Test that a truncated body fails the update as invalid data."""
+    tabular_api.inject(FAULT_TRUNCATED)
+
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data_logic()
+
+    assert coordinator.hub.retry_policy.last_error == "invalid_data"
+
+
+async def test_schema_drift_from_emulator(hass: HomeAssistant, tabular_api, coordinator):
+    """Test that rows with unknown columns are rejected."""
+    tabular_api.inject(FAULT_SCHEMA_DRIFT)
+
+    with pytest.raises(UpdateFailed, match="No data returned from API"):
+        await coordinator._fetch_data()
+
+
+@pytest.mark.parametrize("supports_columns", [True, False])
+async def test_unused_columns_dropped(
+    hass: HomeAssistant, tabular_api, coordinator, supports_columns
+):
+    """Test the column projection, and that unused columns are never stored."""
+    tabular_api.supports_columns = supports_columns
+    tabular_api.padding_columns = 50
+    tabular_api.add_revision(price=0.2)
+
+    data = await coordinator._fetch_data()
+    hub = coordinator.hub
+
+    assert data["HCJB"] == 0.206
+    assert tabular_api.requests[0]["columns"] == API_COLUMNS
+    assert set(hub.rows[6]) == set(HISTORY_FIELDS)
+    assert set(hub._data_to_store()["rows"]["9"]) == set(HISTORY_FIELDS)
+    # Colonnes de remplissage (16 octets chacune) absentes de la réponse projetée
+    assert (hub.metrics.payload_bytes < 7 * 50 * 16) is supports_columns
+
+
+async def test_unchanged_page_not_modified(hass: HomeAssistant, tabular_api, coordinator):
+    """Test that a page already received is revalidated with its ETag."""
+    hub = coordinator.hub
+    await hub.async_refresh_rows()
+
+    hub._fetched_at = None
+    with patch.object(hub, "_merge_new_rows", wraps=hub._merge_new_rows) as mock_merge:
+        await hub.async_refresh_rows()
+        hub._fetched_at = None
+        await hub.async_refresh_rows()
+
+    # Même requête incrémentale deux fois : la seconde est servie par un 304
+    assert tabular_api.not_modified_count == 1
+    assert hub.metrics.not_modified == 1
+    assert mock_merge.call_args_list[0] == mock_merge.call_args_list[1]
+
+    tabular_api.add_revision(date_debut=date(2099, 1, 1))
+    hub._fetched_at = None
+    await hub.async_refresh_rows()
+
+    assert tabular_api.not_modified_count == 1
+    assert hub.watermark == date(2099, 1, 1)
+
+
+async def test_corrected_row_refetched(hass: HomeAssistant, tabular_api, coordinator):
+    """Test that a correction published on the latest row is picked up."""
+    hub = coordinator.hub
+    await hub.async_refresh_rows()
+
+    # Le producteur corrige la ligne en vigueur sans changer sa DATE_DEBUT
+    latest = next(r for r in reversed(tabular_api.rows) if r["P_SOUSCRITE"] == 6)
+    latest["PART_VARIABLE_HCBleu_TTC"] = 0.42
+    hub._fetched_at = None
+    await hub.async_refresh_rows()
+
+    assert tabular_api.requests[-1]["DATE_DEBUT__greater"] == "2000-01-01"
+    assert hub.rows[6]["PART_VARIABLE_HCBleu_TTC"] == 0.42
+    assert hub.watermark == date(2000, 1, 1)
+
+
+async def test_compressed_response(hass: HomeAssistant, tabular_api, coordinator):
+    """Test that the client negotiates compression and decodes it."""
+    tabular_api.compress = True
+    tabular_api.padding_columns = 50
+    tabular_api.supports_columns = False
+    tabular_api.add_revision(price=0.2)
+
+    data = await coordinator._fetch_data()
+
+    assert data["HCJB"] == 0.206
+    # 7 lignes x 50 colonnes de remplissage de 16 octets, très compressibles
+    assert coordinator.hub.metrics.payload_bytes < 7 * 50 * 16
@@ -0,0 +1,118 @@
+"""Tests for the point-in-time tariff lookup."""
+import pytest
+from unittest.mock import patch
+from datetime import date
+
+from aiohttp import ClientError
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.setup import async_setup_component
+
+from custom_components.edf_tempo_tarifs.const import CONF_PUISSANCE_SOUSCRITE, DOMAIN
+from custom_components.edf_tempo_tarifs.exceptions import (
+    EDFTempoTarifsApiError,
+    EDFTempoTarifsPayloadTooLargeError,
+)
+from custom_components.edf_tempo_tarifs.history import TariffHistory
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+from tests.tabular_api import make_row
+
+
+@pytest.fixture
+async def history(hass: HomeAssistant):
+    """Set up the integration with a synced local history."""
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    hub = async_get_hub(hass)
+    hub._loaded = True
+    hub._histories = {6: TariffHistory(
+        [make_row(6, date(2023, 2, 1), 0.1), make_row(6, date(2023, 8, 1), 0.2)]
+    )}
+    hub._history_synced = True
+    return hub
+
+
+@pytest.mark.asyncio
+async def test_get_tariff_service(hass: HomeAssistant, history):
+    """Test that the service answers from the local history, without any request."""
+    with patch.object(history._session, 'get') as mock_get:
+        response = await hass.services.async_call(
+            DOMAIN,
+            "get_tariff",
+            {"date": "2023-05-01", CONF_PUISSANCE_SOUSCRITE: 6},
+            blocking=True,
+            return_response=True,
+        )
+        before = await hass.services.async_call(
+            DOMAIN,
+            "get_tariff",
+            {"date": "2023-01-31", CONF_PUISSANCE_SOUSCRITE: 6},
+            blocking=True,
+            return_response=True,
+        )
+
+    mock_get.assert_not_called()
+    assert response["date"] == "2023-05-01"
+    assert response["tariff"]["DATE_DEBUT"] == "2023-02-01"
+    assert response["tariff"]["PART_VARIABLE_HCBleu_TTC"] == 0.106
+    assert before["tariff"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_tariff_websocket(hass: HomeAssistant, history, hass_ws_client):
+    """Test the websocket command."""
+    client = await hass_ws_client(hass)
+
+    await client.send_json(
+        {"id": 1, "type": f"{DOMAIN}/tariff", "date": "2024-01-15", CONF_PUISSANCE_SOUSCRITE: 6}
+    )
+    msg = await client.receive_json()
+
+    assert msg["success"]
+    assert msg["result"]["puissance_souscrite"] == 6
+    assert msg["result"]["tariff"]["PART_VARIABLE_HCBleu_TTC"] == 0.206
+    assert (await history.async_tariff_at(6, date(2024, 1, 15)))["DATE_DEBUT"] == "2023-08-01"
+
+
+FETCH_ERRORS = [
+    ClientError("connection reset"),
+    TimeoutError(),
+    EDFTempoTarifsPayloadTooLargeError(2048, 1024),
+    EDFTempoTarifsApiError(404),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", FETCH_ERRORS)
+async def test_get_tariff_service_fetch_error(hass: HomeAssistant, history, error):
+    """Test that a failed history sync is reported as a service error."""
+    with patch.object(history, "async_tariff_at", side_effect=error), pytest.raises(
+        HomeAssistantError
+    ) as exc_info:
+        await hass.services.async_call(
+            DOMAIN,
+            "get_tariff",
+            {"date": "2023-05-01", CONF_PUISSANCE_SOUSCRITE: 6},
+            blocking=True,
+            return_response=True,
+        )
+
+    assert exc_info.value.translation_key == "history_unavailable"
+    assert exc_info.value.__cause__ is error
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", FETCH_ERRORS)
+async def test_get_tariff_websocket_fetch_error(hass: HomeAssistant, history, hass_ws_client, error):
+    """Test that a failed history sync is reported as a websocket error."""
+    client = await hass_ws_client(hass)
+
+    with patch.object(history, "async_tariff_at", side_effect=error):
+        await client.send_json(
+            {"id": 1, "type": f"{DOMAIN}/tariff", "date": "2024-01-15", CONF_PUISSANCE_SOUSCRITE: 6}
+        )
+        msg = await client.receive_json()
+
+    assert not msg["success"]
+    assert msg["error"]["code"] == "history_unavailable"
@@ -0,0 +1,51 @@
+"""Tests for the tariff history."""
+from datetime import date
+
+from custom_components.edf_tempo_tarifs.history import TariffHistory
+
+from tests.tabular_api import make_row
+
+
+def test_history_sorted_lookup():
+    """Test the row in effect on a date."""
+    history = TariffHistory([
+        make_row(6, date(2024, 2, 1), 0.3),
+        make_row(6, date(2023, 8, 1), 0.2),
+        make_row(6, date(2023, 2, 1), 0.1),
+    ])
+
+    assert len(history) == 3
+    assert history.latest_date == date(2024, 2, 1)
+    assert history.at(date(2023, 1, 31)) is None
+    assert history.at(date(2023, 2, 1))["PART_VARIABLE_HCBleu_TTC"] == 0.106
+    assert history.at(date(2023, 12, 25))["PART_VARIABLE_HCBleu_TTC"] == 0.206
+    assert history.at(date(2030, 1, 1))["PART_VARIABLE_HCBleu_TTC"] == 0.306
+
+
+def test_history_only_keeps_known_fields():
+    """Test that unused columns are not stored."""
+    history = TariffHistory([make_row(6, date(2024, 2, 1), padding_columns=1)])
+
+    assert "COLONNE_0" not in history.at(date(2024, 2, 1))
+
+
+def test_history_add_replaces_same_date():
+    """Test that a row with a known DATE_DEBUT replaces the previous one."""
+    history = TariffHistory([make_row(6, date(2024, 2, 1), 0.1)])
+
+    assert history.add(make_row(6, date(2024, 2, 1), 0.1)) is False
+    assert history.add(make_row(6, date(2024, 2, 1), 0.2)) is True
+    assert history.add({**make_row(6, date(2024, 2, 1)), "DATE_DEBUT": "invalid-date"}) is False
+
+    assert len(history) == 1
+    assert history.at(date(2024, 2, 1))["PART_VARIABLE_HCBleu_TTC"] == 0.206
+
+
+def test_history_round_trip():
+    """Test the compact serialization."""
+    history = TariffHistory([make_row(6, date(2023, 8, 1), 0.2), make_row(6, date(2024, 2, 1), 0.3)])
+
+    restored = TariffHistory.from_list(history.as_list())
+
+    assert restored.rows() == history.rows()
+    assert restored.latest_date == date(2024, 2, 1)
@@ -0,0 +1,416 @@
+"""Tests for the shared data hub."""
+import asyncio
+import logging
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from datetime import date, datetime, timedelta, timezone
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.edf_tempo_tarifs.const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+from tests.conftest import mock_body
+from tests.tabular_api import make_row
+
+
+def _response(payload):
+    """Build a mocked aiohttp response."""
+    mock_response = AsyncMock()
+    mock_response.status = 200
+    mock_response.content = mock_body(payload)
+    return mock_response
+
+
+@pytest.mark.asyncio
+async def test_hub_is_shared(hass: HomeAssistant):
+    """Test that all coordinators use the same hub."""
+    coordinator_6 = EDFTempoTarifsCoordinator(hass, 6)
+    coordinator_9 = EDFTempoTarifsCoordinator(hass, 9)
+
+    assert coordinator_6.hub is coordinator_9.hub
+    assert coordinator_6.hub is async_get_hub(hass)
+
+
+@pytest.mark.asyncio
+async def test_single_request_for_all_powers(hass: HomeAssistant):
+    """Test that two entries share one HTTP call."""
+    coordinator_6 = EDFTempoTarifsCoordinator(hass, 6)
+    coordinator_9 = EDFTempoTarifsCoordinator(hass, 9)
+    hub = coordinator_6.hub
+
+    payload = {"data": [make_row(6, date(2024, 2, 1)), make_row(9, date(2024, 2, 1)), make_row(6, date(2023, 8, 1))]}
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response(payload)
+
+        result_6 = await coordinator_6._fetch_data()
+        result_9 = await coordinator_9._fetch_data()
+
+        assert mock_get.call_count == 1
+        params = mock_get.call_args.kwargs["params"]
+        assert params["P_SOUSCRITE__in"] == "6,9,12,15,18,30,36"
+
+    # La première ligne vue pour une puissance est la plus récente
+    assert result_6["DATE_DEBUT"] == date(2024, 2, 1)
+    assert result_6["PART_FIXE_TTC"] == 0.156
+    assert result_9["PART_FIXE_TTC"] == 0.159
+
+
+@pytest.mark.asyncio
+async def test_hub_follows_pagination(hass: HomeAssistant):
+    """Test that the hub follows links.next until every power is found."""
+    hub = async_get_hub(hass)
+
+    first_page = {
+        "data": [make_row(6, date(2024, 1, 1)), make_row(9, date(2024, 1, 1))],
+        "links": {"next": "https://example.invalid/page2"},
+    }
+    second_page = {
+        "data": [make_row(p, date(2024, 1, 1)) for p in (12, 15, 18, 30, 36)],
+        "links": {"next": None},
+    }
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.side_effect = [
+            _response(first_page),
+            _response(second_page),
+        ]
+
+        rows = await hub.async_refresh_rows()
+
+        assert mock_get.call_count == 2
+        assert mock_get.call_args.args[0] == "https://example.invalid/page2"
+
+    assert set(rows) == {6, 9, 12, 15, 18, 30, 36}
+
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_to_other_coordinators(hass: HomeAssistant):
+    """Test that a fetch for one entry updates the other registered entries."""
+    coordinator_6 = EDFTempoTarifsCoordinator(hass, 6)
+    coordinator_9 = EDFTempoTarifsCoordinator(hass, 9)
+    hub = coordinator_6.hub
+    hub.async_register(coordinator_6)
+    hub.async_register(coordinator_9)
+
+    payload = {"data": [make_row(6, date(2024, 1, 1)), make_row(9, date(2024, 1, 1))]}
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response(payload)
+
+        await coordinator_6._fetch_data()
+
+    assert coordinator_9.data["PART_FIXE_TTC"] == 0.159
+
+
+@pytest.mark.asyncio
+async def test_hub_missing_power(hass: HomeAssistant):
+    """Test that a power absent from the response fails the update."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 36)
+
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response({"data": [make_row(6, date(2024, 1, 1))]})
+
+        with pytest.raises(UpdateFailed, match="No data returned from API"):
+            await coordinator._fetch_data()
+
+
+@pytest.mark.asyncio
+async def test_cached_data_served_without_request(hass: HomeAssistant, hass_storage):
+    """Test that the snapshot saved on disk is served without an HTTP call."""
+    hass_storage[STORAGE_KEY] = {
+        "version": STORAGE_VERSION,
+        "key": STORAGE_KEY,
+        "data": {"rows": {"6": make_row(6, date(2024, 1, 1))}, "fetched_at": "2024-01-02T00:00:00+00:00"},
+    }
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+
+    with patch.object(coordinator.hub._session, 'get') as mock_get:
+        assert await coordinator.async_load_cached_data() is True
+        mock_get.assert_not_called()
+
+    assert coordinator.data["PART_FIXE_TTC"] == 0.156
+    assert coordinator.last_update_success is True
+
+
+@pytest.mark.asyncio
+async def test_fetch_time_restored(hass: HomeAssistant, hass_storage, freezer):
+    """Test that rows saved just before a restart are not fetched again."""
+    freezer.move_to("2024-01-02T00:00:30+00:00")
+    hass_storage[STORAGE_KEY] = {
+        "version": STORAGE_VERSION,
+        "key": STORAGE_KEY,
+        "data": {"rows": {"6": make_row(6, date(2024, 1, 1))}, "fetched_at": "2024-01-02T00:00:00+00:00"},
+    }
+    hub = async_get_hub(hass)
+    await hub.async_load()
+
+    assert hub._fetched_at == datetime(2024, 1, 2, tzinfo=timezone.utc)
+    with patch.object(hub._session, 'get') as mock_get:
+        rows = await hub.async_refresh_rows()
+        mock_get.assert_not_called()
+
+    assert rows[6]["P_SOUSCRITE"] == 6
+    assert hub.metrics.cache_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_no_cached_data(hass: HomeAssistant, hass_storage):
+    """Test that a power absent from the cache needs a first refresh."""
+    hass_storage[STORAGE_KEY] = {
+        "version": STORAGE_VERSION,
+        "key": STORAGE_KEY,
+        "data": {"rows": {"6": make_row(6, date(2024, 1, 1))}, "fetched_at": None},
+    }
+    coordinator = EDFTempoTarifsCoordinator(hass, 9)
+
+    assert await coordinator.async_load_cached_data() is False
+    assert coordinator.data is None
+
+
+@pytest.mark.asyncio
+async def test_fetched_rows_are_persisted(hass: HomeAssistant):
+    """Test that fetched rows are what the hub persists."""
+    hub = async_get_hub(hass)
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response({"data": [make_row(6, date(2024, 1, 1))]})
+        await hub.async_refresh_rows()
+
+    stored = hub._data_to_store()
+    assert stored["rows"]["6"]["P_SOUSCRITE"] == 6
+    assert stored["fetched_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_history_synced_once(hass: HomeAssistant):
+    """Test that the whole history is paged through once, then served locally."""
+    hub = async_get_hub(hass)
+
+    first_page = {
+        "data": [make_row(6, date(2023, 2, 1), 0.1), make_row(9, date(2023, 2, 1), 0.1)],
+        "links": {"next": "https://example.invalid/page2"},
+    }
+    second_page = {
+        "data": [make_row(6, date(2023, 8, 1), 0.2), make_row(9, date(2023, 8, 1), 0.2)],
+        "links": {"next": None},
+    }
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.side_effect = [
+            _response(first_page),
+            _response(second_page),
+        ]
+
+        history = await hub.async_get_history(6)
+        row = await hub.async_tariff_at(9, date(2023, 5, 1))
+
+        assert mock_get.call_count == 2
+        assert mock_get.call_args_list[0].kwargs["params"]["DATE_DEBUT__sort"] == "asc"
+
+    assert len(history) == 2
+    assert row["PART_VARIABLE_HCBleu_TTC"] == 0.109
+    assert hub._data_to_store()["history"]["6"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_empty_page(hass: HomeAssistant):
+    """Test that once a watermark is known only newer rows are requested."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    hub = coordinator.hub
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response({"data": [make_row(6, date(2024, 2, 1))]})
+        first = await coordinator._fetch_data()
+
+    assert hub.watermark == date(2024, 2, 1)
+    coordinator.data = first
+    hub._fetched_at = None  # Forcer une nouvelle synchronisation
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response({"data": []})
+        second = await coordinator._fetch_data()
+
+        params = mock_get.call_args.kwargs["params"]
+        assert params["DATE_DEBUT__greater"] == "2024-02-01"
+        assert "DATE_DEBUT__less" not in params
+
+    # Page vide : les données précédentes sont renvoyées telles quelles
+    assert second is first
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_merges_new_rows(hass: HomeAssistant):
+    """Test that newer rows are merged, and future rows wait for their date."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    hub = coordinator.hub
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response({"data": [make_row(6, date(2024, 2, 1))]})
+        coordinator.data = await coordinator._fetch_data()
+
+    hub._fetched_at = None
+    new_rows = {"data": [make_row(6, date(2024, 8, 1), 0.2), make_row(6, date(2099, 2, 1), 0.9)]}
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response(new_rows)
+        result = await coordinator._fetch_data()
+
+    assert result["DATE_DEBUT"] == date(2024, 8, 1)
+    assert result["HCJB"] == 0.206
+    assert hub.watermark == date(2099, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_late_power(hass: HomeAssistant):
+    """Test that a row published late for one power is not skipped by the watermark."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 9)
+    hub = coordinator.hub
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response(
+            {"data": [make_row(6, date(2024, 8, 1)), make_row(9, date(2024, 2, 1))]}
+        )
+        coordinator.data = await coordinator._fetch_data()
+
+    assert hub.watermark == date(2024, 2, 1)
+    hub._fetched_at = None
+    late_rows = {"data": [make_row(6, date(2024, 8, 1)), make_row(9, date(2024, 5, 1), 0.2)]}
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response(late_rows)
+        result = await coordinator._fetch_data()
+
+        params = mock_get.call_args.kwargs["params"]
+        assert params["DATE_DEBUT__greater"] == "2024-02-01"
+
+    assert result["DATE_DEBUT"] == date(2024, 5, 1)
+    assert result["HCJB"] == 0.209
+    assert hub.watermark == date(2024, 5, 1)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_backs_off(hass: HomeAssistant):
+    """Test that a 429 with Retry-After blocks requests until that time."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    hub = coordinator.hub
+
+    mock_response = AsyncMock()
+    mock_response.status = 429
+    mock_response.headers = {"Retry-After": "3600"}
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        with pytest.raises(UpdateFailed, match="API returned status 429"):
+            await coordinator._async_update_data_logic()
+
+        # La requête suivante n'atteint pas l'API
+        with pytest.raises(UpdateFailed, match="Backing off"):
+            await coordinator._async_update_data_logic()
+
+        assert mock_get.call_count == 1
+
+    assert hub.retry_policy.last_error == "rate_limited"
+    assert coordinator.update_interval >= timedelta(minutes=59)
+
+
+@pytest.mark.asyncio
+async def test_backoff_serves_cached_data(hass: HomeAssistant, caplog):
+    """Test that a request skipped by the backoff keeps serving the last known data."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    hub = coordinator.hub
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response({"data": [make_row(6, date(2024, 1, 1))]})
+        coordinator.data = await coordinator._async_update_data_logic()
+
+    mock_response = AsyncMock()
+    mock_response.status = 429
+    mock_response.headers = {"Retry-After": "3600"}
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        hub._fetched_at = None
+        with pytest.raises(UpdateFailed, match="API returned status 429"):
+            await coordinator._async_update_data_logic()
+
+        caplog.clear()
+        cached = await coordinator._async_update_data_logic()
+
+        assert mock_get.call_count == 1
+
+    assert cached is coordinator.data
+    assert not [r for r in caplog.records if r.levelno >= logging.WARNING]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_cached_data(hass: HomeAssistant):
+    """Test that an open circuit keeps serving the last known data."""
+    coordinator = EDFTempoTarifsCoordinator(hass, 6)
+    hub = coordinator.hub
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = _response({"data": [make_row(6, date(2024, 1, 1))]})
+        coordinator.data = await coordinator._async_update_data_logic()
+
+    mock_response = AsyncMock()
+    mock_response.status = 500
+
+    with patch.object(hub._session, 'get') as mock_get:
+        mock_get.return_value.__aenter__.return_value = mock_response
+
+        for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+            hub._fetched_at = None
+            hub.retry_policy.retry_at = None  # Ignorer le délai entre les essais
+            with pytest.raises(UpdateFailed):
+                await coordinator._async_update_data_logic()
+
+        hub._fetched_at = None
+        hub.retry_policy.retry_at = None
+        cached = await coordinator._async_update_data_logic()
+
+    assert coordinator.circuit_state == "open"
+    assert cached is coordinator.data
+
+
+@pytest.mark.asyncio
+async def test_load_shared_by_concurrent_callers(hass: HomeAssistant, hass_storage):
+    """Test that callers arriving during the cache load wait for it, even if one gives up."""
+    hass_storage[STORAGE_KEY] = {
+        "version": STORAGE_VERSION,
+        "key": STORAGE_KEY,
+        "data": {"rows": {"6": make_row(6, date(2024, 1, 1))}, "fetched_at": None},
+    }
+    hub = async_get_hub(hass)
+    release = asyncio.Event()
+    store_load = hub._store.async_load
+
+    async def slow_load():
+        await release.wait()
+        return await store_load()
+
+    with patch.object(hub._store, "async_load", side_effect=slow_load) as mock_load:
+        first = hass.async_create_task(hub.async_load())
+        second = hass.async_create_task(hub.async_load())
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert not second.done()
+        assert hub.rows == {}
+
+        release.set()
+        await second
+        await hub.async_load()
+
+    assert mock_load.call_count == 1
+    assert hub.rows[6]["P_SOUSCRITE"] == 6
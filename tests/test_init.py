@@ -0,0 +1,151 @@
+"""Tests for the integration setup."""
+from datetime import date
+
+import pytest
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, State
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    mock_restore_cache_with_extra_data,
+)
+
+from custom_components.edf_tempo_tarifs.const import (
+    CONF_BACKGROUND_SETUP,
+    CONF_CSV_HISTORY,
+    CONF_PUISSANCE_SOUSCRITE,
+    CSV_URL,
+    DOMAIN,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+
+from tests.tabular_api import FAULT_SERVER_ERROR, make_row
+
+
+def _entry(hass, background_setup, csv_history=False):
+    """Add a 6 kVA config entry."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_PUISSANCE_SOUSCRITE: "6"},
+        options={CONF_BACKGROUND_SETUP: background_setup, CONF_CSV_HISTORY: csv_history},
+        entry_id="entry",
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.mark.asyncio
+async def test_setup_retried_when_api_fails(hass: HomeAssistant, tabular_api):
+    """Test that the default setup waits for the first fetch."""
+    async_get_hub(hass).api_url = tabular_api.url
+    tabular_api.inject(FAULT_SERVER_ERROR)
+    entry = _entry(hass, False)
+
+    await hass.config_entries.async_setup(entry.entry_id)
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert hass.states.get("sensor.edf_tempo_tarifs_6_kva_tarif_hc_bleu_ttc") is None
+
+
+@pytest.mark.asyncio
+async def test_background_setup(hass: HomeAssistant, tabular_api):
+    """Test that entities are created right away and the first fetch runs in background."""
+    async_get_hub(hass).api_url = tabular_api.url
+    tabular_api.inject(FAULT_SERVER_ERROR)
+    mock_restore_cache_with_extra_data(
+        hass,
+        (
+            (
+                State("sensor.edf_tempo_tarifs_6_kva_tarif_hc_bleu_ttc", "0.1234"),
+                {"native_value": 0.1234, "native_unit_of_measurement": "€/kWh"},
+            ),
+        ),
+    )
+    entry = _entry(hass, True)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    state = hass.states.get("sensor.edf_tempo_tarifs_6_kva_tarif_hc_bleu_ttc")
+    assert state.state == "0.1234"
+    assert state.attributes["stale"] is True
+
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_csv_history_option(hass: HomeAssistant, tabular_api):
+    """Test that the option points the shared hub at the CSV file while it is enabled."""
+    hub = async_get_hub(hass)
+    hub.api_url = tabular_api.url
+    entry = _entry(hass, False, csv_history=True)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+
+    assert hub.csv_url == CSV_URL
+
+    hass.config_entries.async_update_entry(entry, options={CONF_CSV_HISTORY: False})
+    await hass.async_block_till_done()
+    assert hub.csv_url is None
+
+    hass.config_entries.async_update_entry(entry, options={CONF_CSV_HISTORY: True})
+    await hass.async_block_till_done()
+    assert hub.csv_url == CSV_URL
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    assert hub.csv_url is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_setup_shares_cache_load(hass: HomeAssistant, hass_storage, tabular_api):
+    """Test that entries set up together all wait for the cache and use it."""
+    hass_storage[STORAGE_KEY] = {
+        "version": STORAGE_VERSION,
+        "key": STORAGE_KEY,
+        "data": {
+            "rows": {str(p): make_row(p, date(2024, 2, 1), 0.1) for p in (6, 9)},
+            "fetched_at": None,
+        },
+    }
+    hub = async_get_hub(hass)
+    hub.api_url = tabular_api.url
+    tabular_api.inject(FAULT_SERVER_ERROR, FAULT_SERVER_ERROR)
+    entries = []
+    for puissance in ("6", "9"):
+        entry = MockConfigEntry(
+            domain=DOMAIN, data={CONF_PUISSANCE_SOUSCRITE: puissance}, entry_id=puissance
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+
+    # Le premier async_setup configure toutes les entrées du domaine en parallèle
+    assert await hass.config_entries.async_setup(entries[0].entry_id)
+    await hass.async_block_till_done()
+
+    assert [entry.state for entry in entries] == [ConfigEntryState.LOADED] * 2
+    assert hass.states.get("sensor.edf_tempo_tarifs_9_kva_tarif_hc_bleu_ttc").state == "0.109"
+
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_session_closed_with_last_entry(hass: HomeAssistant, tabular_api):
+    """Test that unloading the last entry closes the HTTP session, and a reload opens another."""
+    hub = async_get_hub(hass)
+    hub.api_url = tabular_api.url
+    entry = _entry(hass, False)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    session = hub._session
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+
+    assert session.closed
+    assert entry.state is ConfigEntryState.LOADED
+    assert not hub._session.closed
+
+    await hass.config_entries.async_unload(entry.entry_id)
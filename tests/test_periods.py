@@ -0,0 +1,75 @@
+"""Tests for the HC/HP periods."""
+from datetime import datetime, timedelta
+
+import pytest
+from homeassistant.util import dt as dt_util
+
+from custom_components.edf_tempo_tarifs.periods import (
+    day_transitions,
+    period_at,
+    price_key,
+    tempo_day,
+    upcoming_transitions,
+)
+
+
+PARIS = dt_util.get_time_zone("Europe/Paris")
+
+
+@pytest.fixture(autouse=True)
+def paris_time_zone():
+    """Use the French time zone."""
+    dt_util.set_default_time_zone(PARIS)
+    yield
+    dt_util.set_default_time_zone(dt_util.UTC)
+
+
+def _local(*args):
+    """Build a local datetime."""
+    return datetime(*args, tzinfo=PARIS)
+
+
+def test_period_at():
+    """Test the HC/HP boundaries."""
+    assert period_at(_local(2024, 1, 15, 5, 59)) == "HC"
+    assert period_at(_local(2024, 1, 15, 6, 0)) == "HP"
+    assert period_at(_local(2024, 1, 15, 21, 59)) == "HP"
+    assert period_at(_local(2024, 1, 15, 22, 0)) == "HC"
+
+
+def test_day_transitions_across_dst():
+    """Test that transitions stay at 6h and 22h local on a DST change day."""
+    hp_start, hc_start = day_transitions(_local(2024, 3, 31).date())
+
+    assert hp_start[0].hour == 6 and hp_start[1] == "HP"
+    assert hc_start[0].hour == 22 and hc_start[1] == "HC"
+    assert hc_start[0] - hp_start[0] == timedelta(hours=16)
+    assert hp_start[0].utcoffset() == timedelta(hours=2)
+
+
+def test_upcoming_transitions():
+    """Test that the remaining transitions of the day come first."""
+    transitions = upcoming_transitions(_local(2024, 1, 15, 12, 0))
+
+    assert [(t.hour, t.day, period) for t, period in transitions] == [
+        (22, 15, "HC"),
+        (6, 16, "HP"),
+        (22, 16, "HC"),
+    ]
+
+    # Après 22h, le prochain changement est le lendemain à 6h
+    late = upcoming_transitions(_local(2024, 1, 15, 22, 0))
+    assert late[0][0] == _local(2024, 1, 16, 6, 0)
+
+
+def test_price_key():
+    """Test the SENSOR_TYPES key of a period and a color."""
+    assert price_key("HC", "bleu") == "HCJB"
+    assert price_key("HP", "blanc") == "HPJW"
+    assert price_key("HP", "rouge") == "HPJR"
+
+
+def test_tempo_day():
+    """Test that a Tempo day runs from 6h to 6h."""
+    assert tempo_day(_local(2024, 1, 16, 5, 59)) == _local(2024, 1, 15).date()
+    assert tempo_day(_local(2024, 1, 16, 6, 0)) == _local(2024, 1, 16).date()
@@ -0,0 +1,94 @@
+"""Tests for the retry policy and circuit breaker."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiohttp import ClientError
+
+from custom_components.edf_tempo_tarifs.const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_OPEN_DURATION,
+    RETRY_BACKOFF,
+)
+from custom_components.edf_tempo_tarifs.exceptions import (
+    EDFTempoTarifsRateLimitError,
+    EDFTempoTarifsServerError,
+)
+from custom_components.edf_tempo_tarifs.retry import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    RetryPolicy,
+    classify_error,
+    parse_retry_after,
+)
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    ("err", "kind"),
+    [
+        (EDFTempoTarifsRateLimitError(429), "rate_limited"),
+        (EDFTempoTarifsServerError(502), "server"),
+        (TimeoutError(), "network"),
+        (ClientError(), "network"),
+        (ValueError(), "invalid_data"),
+    ],
+)
+def test_classify_error(err, kind):
+    """Test error classification."""
+    assert classify_error(err) == kind
+
+
+def test_backoff_grows_and_is_capped():
+    """Test exponential backoff with jitter per error class."""
+    policy = RetryPolicy()
+    base, maximum = RETRY_BACKOFF["server"]
+
+    delays = [policy.record_failure(EDFTempoTarifsServerError(500), NOW) - NOW for _ in range(10)]
+
+    assert base / 2 <= delays[0] <= base
+    assert base <= delays[2] <= base * 4
+    assert all(delay <= maximum for delay in delays)
+    assert policy.attempts == 10
+
+    policy.reset()
+    assert policy.retry_at is None
+
+
+def test_retry_after_is_honored():
+    """Test that a Retry-After longer than the backoff wins."""
+    policy = RetryPolicy()
+    retry_after = parse_retry_after("86400", NOW)
+
+    retry_at = policy.record_failure(EDFTempoTarifsRateLimitError(429, retry_after), NOW)
+
+    assert retry_at == NOW + timedelta(days=1)
+    assert parse_retry_after("Mon, 01 Jan 2024 13:00:00 GMT", NOW) == NOW + timedelta(hours=1)
+    assert parse_retry_after("garbage", NOW) is None
+
+
+def test_circuit_breaker_cycle():
+    """Test that the circuit opens, half-opens after the cooldown, then closes."""
+    breaker = CircuitBreaker()
+
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        assert breaker.allow_request(NOW)
+        breaker.record_failure(NOW)
+
+    assert breaker.state == CIRCUIT_OPEN
+    assert not breaker.allow_request(NOW + timedelta(minutes=1))
+
+    later = NOW + CIRCUIT_OPEN_DURATION
+    assert breaker.allow_request(later)
+    assert breaker.state == CIRCUIT_HALF_OPEN
+
+    # Un échec en demi-ouverture rouvre le circuit
+    breaker.record_failure(later)
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.open_until == later + CIRCUIT_OPEN_DURATION
+
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.failures == 0
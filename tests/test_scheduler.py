@@ -0,0 +1,50 @@
+"""Tests for the update scheduler."""
+from datetime import date, datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.edf_tempo_tarifs.const import DENSE_UPDATE_INTERVAL
+from custom_components.edf_tempo_tarifs.scheduler import next_update_time
+
+
+def _local(*args):
+    """Build a local datetime."""
+    return datetime(*args, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+async def test_sparse_outside_windows(hass: HomeAssistant):
+    """Test that polling is sparse far from any revision date."""
+    now = _local(2024, 5, 10, 14, 30)
+
+    planned = next_update_time(now)
+
+    assert planned.hour == 0 and planned.minute == 0
+    assert timedelta(hours=9) < planned - now <= timedelta(days=3)
+    # Toutes les entrées planifient le même instant
+    assert next_update_time(now + timedelta(minutes=5)) == planned
+
+
+async def test_dense_inside_revision_window(hass: HomeAssistant):
+    """Test that polling is dense just before a regulatory revision."""
+    now = _local(2024, 1, 28, 10, 15)
+
+    planned = next_update_time(now)
+
+    assert planned == _local(2024, 1, 28, 12, 0)
+    assert planned - now <= DENSE_UPDATE_INTERVAL
+
+
+async def test_window_start_is_planned(hass: HomeAssistant):
+    """Test that the start of an upcoming window cuts a sparse interval short."""
+    now = _local(2024, 7, 24, 20, 0)
+
+    assert next_update_time(now) == _local(2024, 7, 25, 0, 0)
+
+
+async def test_future_date_debut_is_watched(hass: HomeAssistant):
+    """Test that a newly seen future DATE_DEBUT opens a dense window."""
+    now = _local(2024, 10, 30, 10, 0)
+
+    assert next_update_time(now) - now > DENSE_UPDATE_INTERVAL
+    assert next_update_time(now, {date(2024, 11, 1)}) == _local(2024, 10, 30, 12, 0)
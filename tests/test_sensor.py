@@ -3,10 +3,20 @@ import pytest
 from unittest.mock import MagicMock, PropertyMock
 from datetime import date, datetime
 
-from homeassistant.core import HomeAssistant
-from custom_components.edf_tempo_tarifs.sensor import EDFTempoTarifsSensor
+from homeassistant.core import HomeAssistant, State
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_fire_time_changed,
+    mock_restore_cache_with_extra_data,
+)
+
+from custom_components.edf_tempo_tarifs.sensor import (
+    EDFTempoTarifsCurrentPriceSensor,
+    EDFTempoTarifsSensor,
+)
 from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
-from custom_components.edf_tempo_tarifs.const import DOMAIN
+from custom_components.edf_tempo_tarifs.const import CURRENT_PRICE_KEY, DOMAIN
+from custom_components.edf_tempo_tarifs.periods import period_at
 
 
 @pytest.fixture
@@ -23,9 +33,10 @@ def mock_coordinator(hass: HomeAssistant):
         "HPJW": 0.1678,
         "HCJR": 0.1456,
         "HPJR": 0.1789,
-        "last_update": datetime(2024, 1, 1, 12, 0, 0),
-        "puissance_souscrite": 6
     }
+    coordinator.last_update = datetime(2024, 1, 1, 12, 0, 0)
+    coordinator.next_planned_fetch = datetime(2024, 1, 2, 0, 0, 0)
+    coordinator.circuit_state = "closed"
     # Mock last_update_success pour simuler CoordinatorEntity
     coordinator.last_update_success = True
     return coordinator
@@ -65,6 +76,8 @@ def test_sensor_extra_attributes(mock_coordinator):
     
     assert attrs["puissance_souscrite_kva"] == 6
     assert "last_update" in attrs
+    assert attrs["next_update"] == "2024-01-02T00:00:00"
+    assert attrs["circuit_breaker"] == "closed"
 
 
 def test_sensor_availability_with_data(mock_coordinator):
@@ -190,3 +203,134 @@ def test_sensor_with_different_entry_ids(mock_coordinator):
     # Different entries should have different device identifiers
     assert sensor1.device_info["identifiers"] == {(DOMAIN, entry_id1)}
     assert sensor2.device_info["identifiers"] == {(DOMAIN, entry_id2)}
+
+
+@pytest.mark.asyncio
+async def test_current_price_sensor_switches_at_boundaries(hass: HomeAssistant, mock_coordinator, freezer):
+    """Test that the current price follows the HC/HP boundaries without polling."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 15, 21, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    mock_coordinator.color_at.return_value = "blanc"
+    mock_coordinator.price_at.side_effect = lambda moment: {"HP": 0.1678, "HC": 0.1345}[
+        period_at(moment)
+    ]
+
+    sensor = EDFTempoTarifsCurrentPriceSensor(mock_coordinator, CURRENT_PRICE_KEY, "entry")
+    sensor.hass = hass
+    sensor.entity_id = "sensor.tarif_actuel_ttc"
+    sensor.async_write_ha_state = MagicMock()
+    await sensor.async_added_to_hass()
+
+    assert sensor.native_value == 0.1678
+    assert sensor.extra_state_attributes["period"] == "HP"
+    assert sensor.extra_state_attributes["next_period_change"].startswith("2024-01-15T22:00")
+
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 15, 22, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    assert sensor.async_write_ha_state.call_count == 1
+    assert sensor.native_value == 0.1345
+    assert sensor.extra_state_attributes["next_period_change"].startswith("2024-01-16T06:00")
+
+    await sensor.async_will_remove_from_hass()
+
+
+def test_current_price_sensor_unknown_color(mock_coordinator):
+    """Test that the current price is unknown until the Tempo color is known."""
+    mock_coordinator.color_at.return_value = None
+    mock_coordinator.price_at.return_value = None
+    mock_coordinator.remaining_days.return_value = None
+    sensor = EDFTempoTarifsCurrentPriceSensor(mock_coordinator, CURRENT_PRICE_KEY, "entry")
+
+    assert sensor.native_value is None
+    assert sensor.available is True
+    assert sensor.extra_state_attributes["period"] in ("HC", "HP")
+    assert sensor.extra_state_attributes["tempo_color"] is None
+
+
+@pytest.mark.asyncio
+async def test_sensor_restores_last_state(hass: HomeAssistant, mock_coordinator):
+    """Test the warm start from the restore cache, marked stale until revalidation."""
+    data = mock_coordinator.data
+    mock_coordinator.data = None
+    mock_restore_cache_with_extra_data(
+        hass,
+        (
+            (
+                State(
+                    "sensor.tarif_hc_bleu_ttc",
+                    "0.1234",
+                    {"puissance_souscrite_kva": 6, "circuit_breaker": "closed", "unit_of_measurement": "€/kWh"},
+                ),
+                {"native_value": 0.1234, "native_unit_of_measurement": "€/kWh"},
+            ),
+        ),
+    )
+
+    sensor = EDFTempoTarifsSensor(mock_coordinator, "HCJB", "entry")
+    sensor.hass = hass
+    sensor.entity_id = "sensor.tarif_hc_bleu_ttc"
+    sensor.async_write_ha_state = MagicMock()
+    await sensor.async_added_to_hass()
+
+    assert sensor.available is True
+    assert sensor.native_value == 0.1234
+    assert sensor.extra_state_attributes == {
+        "puissance_souscrite_kva": 6,
+        "circuit_breaker": "closed",
+        "stale": True,
+    }
+
+    # Revalidation : même valeur, seul le marqueur périmé disparaît
+    mock_coordinator.data = data
+    sensor._handle_coordinator_update()
+
+    assert sensor.async_write_ha_state.call_count == 1
+    assert sensor.native_value == 0.1234
+    assert "stale" not in sensor.extra_state_attributes
+
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_current_price_not_restored_across_periods(hass: HomeAssistant, mock_coordinator, freezer):
+    """Test that a price written in another HC/HP period is not restored."""
+    freezer.move_to(dt_util.as_utc(datetime(2024, 1, 15, 21, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+    mock_coordinator.data = None
+    mock_coordinator.last_update_success = False
+    mock_coordinator.price_at.return_value = None
+    last_updated = dt_util.as_utc(datetime(2024, 1, 15, 5, 0, tzinfo=dt_util.DEFAULT_TIME_ZONE))
+    mock_restore_cache_with_extra_data(
+        hass,
+        (
+            (
+                State("sensor.tarif_actuel_ttc", "0.1345", {}, last_updated=last_updated),
+                {"native_value": 0.1345, "native_unit_of_measurement": "€/kWh"},
+            ),
+        ),
+    )
+
+    sensor = EDFTempoTarifsCurrentPriceSensor(mock_coordinator, CURRENT_PRICE_KEY, "entry")
+    sensor.hass = hass
+    sensor.entity_id = "sensor.tarif_actuel_ttc"
+    await sensor.async_added_to_hass()
+
+    assert sensor.available is False
+    assert sensor.native_value is None
+
+    await sensor.async_will_remove_from_hass()
+
+
+def test_sensor_rewritten_on_power_change(mock_coordinator):
+    """Test that a power change with the same price still updates the attributes."""
+    sensor = EDFTempoTarifsSensor(mock_coordinator, "HCJB", "entry")
+    sensor.async_write_ha_state = MagicMock()
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 1
+
+    mock_coordinator.puissance_souscrite = 9
+    sensor._handle_coordinator_update()
+
+    assert sensor.async_write_ha_state.call_count == 2
+    assert sensor.extra_state_attributes["puissance_souscrite_kva"] == 9
@@ -0,0 +1,102 @@
+"""Tests for the single-flight coalescing."""
+import asyncio
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.edf_tempo_tarifs.coordinator import EDFTempoTarifsCoordinator
+from custom_components.edf_tempo_tarifs.hub import async_get_hub
+from custom_components.edf_tempo_tarifs.singleflight import SingleFlight, params_key
+
+
+def test_params_key_ignores_order():
+    """Test that the same parameters give the same key in any order."""
+    assert params_key({"a": 1, "b": "2"}) == params_key({"b": 2, "a": "1"})
+    assert params_key({"a": 1}) != params_key({"a": 2})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_call():
+    """Test that concurrent callers of the same key await a single call."""
+    group = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def call():
+        calls.append(None)
+        await release.wait()
+        return len(calls)
+
+    tasks = [asyncio.create_task(group.async_run("key", call)) for _ in range(3)]
+    other = asyncio.create_task(group.async_run("other", call))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == [2, 2, 2]
+    assert await other == 2
+    assert group.as_dict() == {"calls": 2, "coalesced": 2, "in_flight": 0}
+
+    # Appel terminé : le suivant est de nouveau exécuté
+    assert await group.async_run("key", call) == 3
+
+
+@pytest.mark.asyncio
+async def test_exception_shared():
+    """Test that the waiting callers receive the error of the shared call."""
+    group = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        raise ValueError("boom")
+
+    tasks = [asyncio.create_task(group.async_run("key", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert group.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_leader_cancelled():
+    """Test that a waiting caller runs the call itself if the first caller is cancelled."""
+    group = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(group.async_run("key", call))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(group.async_run("key", call))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == "done"
+    assert leader.cancelled()
+
+
+async def test_concurrent_refreshes_coalesced(hass: HomeAssistant, tabular_api):
+    """Test that entries refreshing at the same moment share one request."""
+    tabular_api.latency = 0.05
+    tabular_api.add_revision(price=0.2)
+    hub = async_get_hub(hass)
+    hub.api_url = tabular_api.url
+    coordinator_6 = EDFTempoTarifsCoordinator(hass, 6)
+    coordinator_9 = EDFTempoTarifsCoordinator(hass, 9)
+
+    results = await asyncio.gather(
+        coordinator_6._fetch_data(),
+        coordinator_9._fetch_data(),
+    )
+
+    assert tabular_api.request_count == 1
+    assert results[0].puissance_souscrite == 6
+    assert results[1].puissance_souscrite == 9
+    assert hub.single_flight.coalesced == 1
@@ -0,0 +1,61 @@
+"""Tests for the tariff snapshots."""
+import dataclasses
+from datetime import date
+
+import pytest
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.edf_tempo_tarifs.snapshot import TariffSnapshot, parse_row
+
+ROW = {
+    "DATE_DEBUT": "2024-01-01",
+    "PART_FIXE_TTC": "150.50",
+    "PART_VARIABLE_HCBleu_TTC": 0.1234,
+    "PART_VARIABLE_HPBleu_TTC": 0.1567,
+    "PART_VARIABLE_HCBlanc_TTC": 0.1345,
+    "PART_VARIABLE_HPBlanc_TTC": 0.1678,
+    "PART_VARIABLE_HCRouge_TTC": 0.1456,
+    "PART_VARIABLE_HPRouge_TTC": 0.1789,
+    "P_SOUSCRITE": "6",
+}
+
+
+def test_parse_row_converts_values():
+    """Test the compiled conversion plan."""
+    snapshot = parse_row(ROW, 6)
+
+    assert snapshot["DATE_DEBUT"] == date(2024, 1, 1)
+    assert snapshot["PART_FIXE_TTC"] == 150.50
+    assert snapshot.get("HCJB") == 0.1234
+    assert snapshot.get("unknown", "default") == "default"
+    assert "HPJR" in snapshot
+    assert "raw_data" not in snapshot
+
+
+def test_identical_snapshots_are_shared():
+    """Test that identical rows give the same instance."""
+    first = parse_row(ROW, 6)
+    second = parse_row(dict(ROW), 6)
+
+    assert first is second
+    assert parse_row(ROW, 9) is not first
+
+
+def test_snapshot_is_immutable():
+    """Test that a shared snapshot cannot be modified."""
+    snapshot = parse_row(ROW, 6)
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.puissance_souscrite = 9
+
+    assert not hasattr(snapshot, "__dict__")
+    assert isinstance(snapshot, TariffSnapshot)
+
+
+def test_parse_row_without_values():
+    """Test the errors raised for empty and unconvertible rows."""
+    with pytest.raises(UpdateFailed, match="No valid data found in API response"):
+        parse_row({"P_SOUSCRITE": "6"}, 6)
+
+    with pytest.raises(UpdateFailed, match="No valid data after conversion"):
+        parse_row({"DATE_DEBUT": "invalid-date", "PART_FIXE_TTC": "not-a-number"}, 6)